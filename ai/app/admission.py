@@ -0,0 +1,109 @@
+from constant.main import (
+    DEGRADE_CPU_PERCENT,
+    DEGRADE_MEMORY_PERCENT,
+    DEGRADE_SESSION_FPS,
+    DEGRADED_MAX_FPS,
+    DEGRADED_MAX_WIDTH,
+    HIGH_INFERENCE_LOAD,
+    MAX_RSS_MB,
+    REJECT_CPU_PERCENT,
+    REJECT_MEMORY_PERCENT,
+    REJECT_RETRY_AFTER_SECONDS,
+    REJECT_SESSION_FPS,
+)
+from config import WORKER_CAPACITY
+from resource_monitor import get_resource_monitor
+from video_transform_track import get_inference_load, get_pool_status, get_session_rates
+
+ACCEPT = "accept"
+DEGRADED = "degraded"
+REJECT = "reject"
+
+_admission_controller = None
+
+
+class AdmissionDecision:
+    __slots__ = ("mode", "reason", "stats")
+
+    def __init__(self, mode, reason=None, stats=None):
+        self.mode = mode
+        self.reason = reason  # short machine readable code, e.g. "cpu", "sessions"
+        self.stats = stats or {}
+
+    def to_message(self):
+        """What the browser gets to know about the decision (answer / reject payload)"""
+        message = {"mode": self.mode, "reason": self.reason}
+        if self.mode == DEGRADED:
+            message["maxWidth"] = DEGRADED_MAX_WIDTH
+            message["maxFps"] = DEGRADED_MAX_FPS
+        elif self.mode == REJECT:
+            message["retryAfter"] = REJECT_RETRY_AFTER_SECONDS
+        return message
+
+
+class AdmissionController:
+    """
+    Decides for every new offer whether this worker can take the session.
+
+    Existing sessions come first: an offer is rejected when taking it would
+    push them past the limits (session cap, CPU, memory, already starved
+    sessions) and admitted degraded - capped inference rate, smaller video
+    requested from the browser - while the host is merely busy.
+    """
+
+    def __init__(self, monitor=None):
+        self._monitor = monitor or get_resource_monitor()
+
+    def decide(self, active_sessions):
+        snapshot = self._monitor.snapshot()
+        rates = get_session_rates()
+        stats = {
+            **snapshot,
+            "sessions": active_sessions,
+            "pool": get_pool_status(),
+            "inference_load": get_inference_load(),
+            "avg_session_fps": sum(rates) / len(rates) if rates else None,
+        }
+
+        reason = self._reject_reason(stats)
+        if reason is not None:
+            return AdmissionDecision(REJECT, reason, stats)
+        reason = self._degrade_reason(stats)
+        if reason is not None:
+            return AdmissionDecision(DEGRADED, reason, stats)
+        return AdmissionDecision(ACCEPT, None, stats)
+
+    @staticmethod
+    def _reject_reason(stats):
+        if stats["sessions"] >= WORKER_CAPACITY:
+            return "sessions"
+        if stats["cpu_percent"] >= REJECT_CPU_PERCENT:
+            return "cpu"
+        if stats["memory_percent"] >= REJECT_MEMORY_PERCENT:
+            return "memory"
+        if stats["rss_mb"] >= MAX_RSS_MB:
+            return "rss"
+        if stats["avg_session_fps"] is not None and stats["avg_session_fps"] < REJECT_SESSION_FPS:
+            return "inference_rate"
+        return None
+
+    @staticmethod
+    def _degrade_reason(stats):
+        if stats["cpu_percent"] >= DEGRADE_CPU_PERCENT:
+            return "cpu"
+        if stats["memory_percent"] >= DEGRADE_MEMORY_PERCENT:
+            return "memory"
+        if stats["rss_mb"] >= 0.8 * MAX_RSS_MB:
+            return "rss"
+        if stats["inference_load"] >= HIGH_INFERENCE_LOAD:
+            return "pool"
+        if stats["avg_session_fps"] is not None and stats["avg_session_fps"] < DEGRADE_SESSION_FPS:
+            return "inference_rate"
+        return None
+
+
+def get_admission_controller():
+    global _admission_controller
+    if _admission_controller is None:
+        _admission_controller = AdmissionController()
+    return _admission_controller
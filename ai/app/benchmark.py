@@ -0,0 +1,468 @@
+"""
+Throughput and latency benchmark of the video pipeline, no browser needed.
+
+    python benchmark.py                                   # synthetic video, 1, 2 and 4 sessions
+    python benchmark.py --sessions 1 8 --duration 30 --video clip.mp4
+    python benchmark.py --e2e --sessions 2                # signaling + real aiortc client peers
+    python benchmark.py --output results.json
+    python benchmark.py --offline --video clip.mp4        # offline transcription, cold then cached
+
+"direct" runs pull every session's source track straight through VideoTransformTrack.recv.
+"e2e" runs start the stand-in signaling server (dev_signaling.py) and this worker's
+signaling loop in-process and connect one aiortc client peer per session, so offer/ICE
+handling, encoding and the data channel are measured too (the client peers run in the same
+process and are part of the CPU numbers; OUTPUT_MODE comes from the environment there).
+"offline" runs transcribe --video as a batch job twice: the first run extracts landmarks
+into the landmark cache, the second one only re-classifies the cached hand crops.
+Compare landmark tiers by running it with different LANDMARK_TIER environment values.
+
+Results go to stdout (or --output) as JSON, one entry per session count.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import tempfile
+import time
+from fractions import Fraction
+
+import cv2
+import numpy as np
+import psutil
+from aiortc import MediaStreamTrack, RTCPeerConnection, RTCSessionDescription
+from aiortc.contrib.media import MediaPlayer
+from av import VideoFrame
+
+import logs
+import metrics
+from config import INFERENCE_BACKEND, LANDMARK_TIER, OUTPUT_MODE
+import startup
+from constant.main import CPU_SAMPLE_SECONDS
+from resource_monitor import get_resource_monitor
+from transcription import DONE, FAILED, TranscriptionJobs
+from video_transform_track import VideoTransformTrack, cleanup_global_resources
+
+STAMP_HISTORY = 1000  # frames per session remembered for latency lookups
+
+
+def _synthetic_frames(width, height, count):
+    """yuv420p frames of a bright square moving over noise, enough motion to be sampled"""
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 80, (height, width, 3), dtype=np.uint8)
+    size = height // 4
+    frames = []
+    for i in range(count):
+        img = background.copy()
+        x = int((width - size) * (0.5 + 0.5 * np.sin(2 * np.pi * i / count)))
+        y = (height - size) // 2
+        img[y : y + size, x : x + size] = 220
+        frames.append(cv2.cvtColor(img, cv2.COLOR_BGR2YUV_I420))
+    return frames
+
+
+class SyntheticVideoTrack(MediaStreamTrack):
+    """Camera stand-in paced at fps, frames are precomputed so generating them costs nothing"""
+
+    kind = "video"
+
+    def __init__(self, width, height, fps, frames):
+        super().__init__()
+        self._frames = frames
+        self._fps = fps
+        self._index = 0
+        self._start = None
+
+    async def recv(self):
+        if self._start is None:
+            self._start = time.monotonic()
+        delay = self._start + self._index / self._fps - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        frame = VideoFrame.from_ndarray(self._frames[self._index % len(self._frames)], format="yuv420p")
+        frame.pts = self._index
+        frame.time_base = Fraction(1, self._fps)
+        self._index += 1
+        return frame
+
+
+class StampedTrack(MediaStreamTrack):
+    """Passes frames through and remembers when each pts left the source"""
+
+    kind = "video"
+
+    def __init__(self, source):
+        super().__init__()
+        self._source = source
+        self.sent_at = {}
+
+    async def recv(self):
+        frame = await self._source.recv()
+        self.sent_at[frame.pts] = time.monotonic()
+        while len(self.sent_at) > STAMP_HISTORY:
+            del self.sent_at[next(iter(self.sent_at))]
+        return frame
+
+
+class SessionStats:
+    def __init__(self):
+        self.frames = 0
+        self.results = 0
+        self.output_latency = []  # source -> recv() returned, seconds
+        self.result_latency = []  # source -> inference result, seconds
+        self.answer_latency = None  # e2e: offer sent -> answer received
+        self.rejected = None  # e2e: reject reason
+
+
+class ResourceSampler:
+    """CPU (% of one core) and RSS of this process and its children (worker processes)"""
+
+    def __init__(self, interval=0.5):
+        self._interval = interval
+        self._processes = {}
+        self.cpu = []
+        self.rss = []
+        self._task = None
+
+    def _sample(self):
+        me = psutil.Process()
+        cpu, rss = 0.0, 0
+        for process in [me, *me.children(recursive=True)]:
+            known = self._processes.setdefault(process.pid, process)
+            try:
+                cpu += known.cpu_percent(None)
+                rss += known.memory_info().rss
+            except psutil.NoSuchProcess:
+                self._processes.pop(process.pid, None)
+        return cpu, rss / 1024**2
+
+    async def _run(self):
+        self._sample()  # prime cpu_percent
+        while True:
+            await asyncio.sleep(self._interval)
+            cpu, rss = self._sample()
+            self.cpu.append(cpu)
+            self.rss.append(rss)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        return {
+            "cpu_percent": _summary(self.cpu),
+            "rss_mb": _summary(self.rss),
+        }
+
+
+def _summary(values):
+    if not values:
+        return None
+    return {"mean": round(float(np.mean(values)), 1), "max": round(float(np.max(values)), 1)}
+
+
+def _percentiles_ms(seconds):
+    if not seconds:
+        return None
+    values = np.asarray(seconds) * 1000
+    return {
+        f"p{q}": round(float(np.percentile(values, q)), 2) for q in (50, 90, 99)
+    } | {"max": round(float(values.max()), 2)}
+
+
+def _source_track(args):
+    if args.video:
+        return MediaPlayer(args.video, loop=True).video
+    return SyntheticVideoTrack(args.width, args.height, args.fps, args.synthetic_frames)
+
+
+def _report(mode, sessions, stats, elapsed, resources):
+    per_session = [
+        {
+            "fps": round(s.frames / elapsed, 2),
+            "inference_rate": round(s.results / elapsed, 2),
+            **({"answer_ms": round(s.answer_latency * 1000, 1)} if s.answer_latency is not None else {}),
+            **({"rejected": s.rejected} if s.rejected else {}),
+        }
+        for s in stats
+    ]
+    admitted = [p for p in per_session if "rejected" not in p] or per_session
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "rejected": sum("rejected" in p for p in per_session),
+        "seconds": round(elapsed, 2),
+        # averages over admitted sessions, rejected ones would only dilute them
+        "fps_per_session": round(float(np.mean([p["fps"] for p in admitted])), 2),
+        "inference_rate_per_session": round(float(np.mean([p["inference_rate"] for p in admitted])), 2),
+        "output_latency_ms": _percentiles_ms([x for s in stats for x in s.output_latency]),
+        "result_latency_ms": _percentiles_ms([x for s in stats for x in s.result_latency]),
+        **resources,
+        "stages": metrics.snapshot(),
+        "per_session": per_session,
+    }
+
+
+async def run_direct(args, sessions):
+    stats = [SessionStats() for _ in range(sessions)]
+    measuring = False
+
+    def make_on_result(source, s):
+        def on_result(session_id, result, pts):
+            sent = source.sent_at.get(pts)
+            if measuring and sent is not None:
+                s.results += 1
+                s.result_latency.append(time.monotonic() - sent)
+        return on_result
+
+    pairs = []
+    for i in range(sessions):
+        source = StampedTrack(_source_track(args))
+        track = VideoTransformTrack(
+            source,
+            session_id=f"bench-{i}",
+            output_mode=args.output_mode,
+            on_result=make_on_result(source, stats[i]),
+        )
+        pairs.append((source, track))
+
+    async def pump(source, track, s, deadline):
+        while time.monotonic() < deadline:
+            frame = await track.recv()
+            sent = source.sent_at.get(frame.pts)
+            if measuring and sent is not None:
+                s.frames += 1
+                s.output_latency.append(time.monotonic() - sent)
+
+    started = time.monotonic()
+    deadline = started + args.warmup + args.duration
+    pumps = [
+        asyncio.create_task(pump(source, track, s, deadline))
+        for (source, track), s in zip(pairs, stats)
+    ]
+
+    await asyncio.sleep(args.warmup)
+    metrics.reset()
+    resources = ResourceSampler()
+    resources.start()
+    measuring = True
+    measure_start = time.monotonic()
+
+    await asyncio.gather(*pumps)
+    elapsed = time.monotonic() - measure_start
+    report = _report("direct", sessions, stats, elapsed, await resources.stop())
+
+    for _, track in pairs:
+        await track._stopVideoTransformTrack()
+    return report
+
+
+def _sdp_candidates(sdp):
+    """aiortc puts its candidates into the SDP, send them as trickle ICE like a browser would"""
+    mid, index = None, -1
+    for line in sdp.splitlines():
+        if line.startswith("m="):
+            index += 1
+        elif line.startswith("a=mid:"):
+            mid = line[len("a=mid:"):]
+        elif line.startswith("a=candidate:"):
+            yield {"candidate": line[2:], "sdpMid": mid, "sdpMLineIndex": index}
+
+
+async def _e2e_client(uri, args, s, state, deadline):
+    from websockets.asyncio.client import connect
+
+    async with connect(uri) as ws:
+        pc = RTCPeerConnection()
+        pc.addTrack(_source_track(args))
+        channel = pc.createDataChannel("landmarks", ordered=False)
+
+        @channel.on("message")
+        def on_message(message):
+            if state["measuring"] and json.loads(message).get("type") == "landmarks":
+                s.results += 1
+
+        async def pull(track):
+            while True:
+                try:
+                    await track.recv()
+                except Exception:
+                    return
+                if state["measuring"]:
+                    s.frames += 1
+
+        @pc.on("track")
+        def on_track(track):
+            state["tasks"].append(asyncio.create_task(pull(track)))
+
+        await pc.setLocalDescription(await pc.createOffer())
+        sent = time.monotonic()
+        await ws.send(json.dumps({"type": "offer", "sdp": {"type": "offer", "sdp": pc.localDescription.sdp}}))
+        for candidate in _sdp_candidates(pc.localDescription.sdp):
+            await ws.send(json.dumps({"type": "ice", "candidate": candidate}))
+        await ws.send(json.dumps({"type": "ice", "candidate": None}))
+
+        async def read():
+            async for message in ws:
+                msg = json.loads(message)
+                if msg["type"] == "answer":
+                    s.answer_latency = time.monotonic() - sent
+                    await pc.setRemoteDescription(RTCSessionDescription(**msg["sdp"]))
+                elif msg["type"] == "reject":
+                    s.rejected = msg.get("reason")
+
+        reader = asyncio.create_task(read())
+        await asyncio.sleep(max(deadline - time.monotonic(), 0))
+        await ws.send(json.dumps({"type": "close"}))
+        reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
+        await pc.close()
+
+
+async def run_e2e(args, sessions):
+    from websockets.asyncio.server import serve
+
+    import main as server
+    from dev_signaling import SignalingRouter
+
+    stats = [SessionStats() for _ in range(sessions)]
+    state = {"measuring": False, "tasks": []}
+    router = SignalingRouter()
+
+    async with serve(router.handle, "127.0.0.1", 0) as signaling:
+        port = signaling.sockets[0].getsockname()[1]
+        server.SIGNALING_URI = f"ws://127.0.0.1:{port}/stream?client=python"
+        worker = asyncio.create_task(server.signaling_client_loop())
+        while not router.workers:
+            await asyncio.sleep(0.05)
+        # Start admission's CPU window after the setup burst (imports, warm-up), a worker
+        # that just became ready isn't that busy and would otherwise degrade the first sessions
+        get_resource_monitor().cpu_percent()
+        await asyncio.sleep(CPU_SAMPLE_SECONDS)
+
+        uri = f"ws://127.0.0.1:{port}/stream?client=js"
+        deadline = time.monotonic() + args.warmup + args.duration
+        clients = [
+            asyncio.create_task(_e2e_client(uri, args, s, state, deadline)) for s in stats
+        ]
+
+        await asyncio.sleep(args.warmup)
+        metrics.reset()
+        resources = ResourceSampler()
+        resources.start()
+        state["measuring"] = True
+        measure_start = time.monotonic()
+
+        await asyncio.gather(*clients)
+        elapsed = time.monotonic() - measure_start
+        report = _report("e2e", sessions, stats, elapsed, await resources.stop())
+
+        # Let the worker handle the close messages before its loop goes away
+        while len(server.sessions):
+            await asyncio.sleep(0.05)
+        for task in state["tasks"]:
+            task.cancel()
+        worker.cancel()
+        await asyncio.gather(worker, *state["tasks"], return_exceptions=True)
+    return report
+
+
+async def run_offline(args):
+    """Transcribe --video twice through the batch job queue, job state goes to a temporary directory"""
+    jobs = TranscriptionJobs(root=tempfile.mkdtemp(prefix="signaro-benchmark-"))
+    runs = []
+    for attempt in ("first", "repeat"):
+        print(f"⏱️ run_offline, {attempt} run...", file=sys.stderr)
+        job = jobs.submit_file(args.video)
+        while job["status"] not in (DONE, FAILED):
+            await asyncio.sleep(0.5)
+            job = jobs.get(job["id"])
+        if job["status"] == FAILED:
+            runs.append({"mode": "offline", "run": attempt, "error": job["error"]})
+            continue
+        with open(jobs.result_path(job["id"])) as f:
+            result = json.load(f)
+        runs.append(
+            {
+                "mode": "offline",
+                "run": attempt,
+                "workers": jobs.workers,
+                "duration": result["duration"],
+                "frames": result["frames"],
+                "cached_segments": result["cached_segments"],
+                "elapsed_seconds": result["elapsed_seconds"],
+                "realtime_factor": result["realtime_factor"],
+                "signs": len(result["signs"]),
+            }
+        )
+    return runs
+
+
+async def run(args):
+    # Same as the server's startup: warm pool, classification is part of the measured pipeline
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, startup.load_pipeline)
+    await loop.run_in_executor(None, startup.load_classifier)
+    results = {
+        "config": {
+            "inference_backend": INFERENCE_BACKEND,
+            "output_mode": OUTPUT_MODE if args.e2e else args.output_mode,
+            "landmark_tier": LANDMARK_TIER,
+            "source": args.video or f"synthetic {args.width}x{args.height}",
+            "fps": None if args.video else args.fps,
+            "warmup_seconds": args.warmup,
+            "duration_seconds": args.duration,
+            "python": platform.python_version(),
+            "cpu_count": psutil.cpu_count(),
+        },
+        "runs": [],
+    }
+    if args.offline:
+        results["runs"] = await run_offline(args)
+        return results
+    for sessions in args.sessions:
+        runner = run_e2e if args.e2e else run_direct
+        print(f"⏱️ {runner.__name__} with {sessions} session(s)...", file=sys.stderr)
+        results["runs"].append(await runner(args, sessions))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", nargs="+", type=int, default=[1, 2, 4], help="session counts to run")
+    parser.add_argument("--duration", type=float, default=10, help="measured seconds per run")
+    parser.add_argument("--warmup", type=float, default=3, help="unmeasured seconds before each run")
+    parser.add_argument("--video", help="loop this file instead of synthetic video")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--frames", type=int, default=60, help="distinct synthetic frames, looped")
+    parser.add_argument("--output-mode", default=OUTPUT_MODE, choices=["annotated", "landmarks", "data"])
+    parser.add_argument("--e2e", action="store_true", help="go through signaling and aiortc client peers")
+    parser.add_argument("--offline", action="store_true", help="batch-transcribe --video instead of live sessions")
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    args = parser.parse_args()
+    # Worker logs go to stderr with the progress lines, stdout stays the JSON report
+    logs.setup_logging(sys.stderr)
+    if args.offline and not args.video:
+        parser.error("--offline needs --video")
+    args.synthetic_frames = [] if args.video else _synthetic_frames(args.width, args.height, args.frames)
+
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        cleanup_global_resources()
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+        print(f"✅ Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,54 @@
-SIGNALING_URI = "ws://backend:8080/stream?client=python"  # <-- change if different
-WAIT_FOR_TRACK_SECONDS = 5  # wait for incoming track before creating answer (seconds)
+import os
+import socket
+
+from constant.main import MAX_SESSIONS
+
+SIGNALING_URI = os.getenv("SIGNALING_URI", "ws://backend:8080/stream?client=python")
+# Every AI worker (uvicorn worker process, container, node) registers with signaling under its
+# own id; offers are routed to one worker and the client's ice/close messages stick to it.
+# The pid is always part of it, processes of one `uvicorn --workers N` share WORKER_ID from the env
+WORKER_ID = f"{os.getenv('WORKER_ID') or socket.gethostname()}-{os.getpid()}"
+WORKER_CAPACITY = int(os.getenv("WORKER_CAPACITY", MAX_SESSIONS))  # sessions this worker takes
 RECONNECT_DELAY_SECONDS = 3
 
-MAX_INFERENCE_WORKERS = 2 # for now make sure it works for 2 users * 2 
+# Root log level, per-logger overrides as "aiortc=INFO,video_transform_track=DEBUG",
+# LOG_FORMAT "text" (human readable) or "json" (one object per line for log collectors)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+
+MAX_INFERENCE_WORKERS = 2 # for now make sure it works for 2 users * 2
+
+# "thread" runs MediaPipe in-process, "process" gives every worker its own process (no GIL contention)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "thread")
+
+# Landmark pipeline: "full" Holistic, "lite" Holistic (model_complexity=0), "hands_pose" separate
+# Pose + Hands without face mesh, "hands" only Hands, or "auto" to pick per session by load
+LANDMARK_TIER = os.getenv("LANDMARK_TIER", "full")
+
+# "annotated" draws landmarks into the returned video, "landmarks" echoes the raw video and
+# sends landmarks over the data channel, "data" sends only the data channel (no video back)
+OUTPUT_MODE = os.getenv("OUTPUT_MODE", "annotated")
+
+# Offline transcription: job state, results and uploads are kept under TRANSCRIPTION_DIR,
+# local (mounted) videos can only be transcribed from inside TRANSCRIPTION_INPUT_DIR (unset = uploads only)
+TRANSCRIPTION_DIR = os.getenv(
+    "TRANSCRIPTION_DIR", os.path.join(os.path.dirname(__file__), "transcriptions")
+)
+TRANSCRIPTION_INPUT_DIR = os.getenv("TRANSCRIPTION_INPUT_DIR")
+TRANSCRIPTION_WORKERS = int(os.getenv("TRANSCRIPTION_WORKERS", os.cpu_count() or 1))  # processes per job
+
+# Extracted landmarks of transcribed videos, reused when the same video is transcribed again;
+# least recently used entries go once the cache exceeds LANDMARK_CACHE_MB (0 = no cache)
+LANDMARK_CACHE_DIR = os.getenv(
+    "LANDMARK_CACHE_DIR", os.path.join(os.path.dirname(__file__), "landmark_cache")
+)
+LANDMARK_CACHE_MB = int(os.getenv("LANDMARK_CACHE_MB", 2048))
+
+# Sign classifier (28x28 grayscale hand crop -> letter)
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "keras_model", "model.keras")
+# Exported copies of MODEL_PATH, regenerate with `python export_model.py --verify`
+TFLITE_MODEL_PATH = os.path.join(os.path.dirname(__file__), "keras_model", "model.tflite")
+ONNX_MODEL_PATH = os.path.join(os.path.dirname(__file__), "keras_model", "model.onnx")
+# "keras", "tflite", "onnx" or "auto" (fastest lightweight backend available on this host)
+CLASSIFIER_BACKEND = os.getenv("CLASSIFIER_BACKEND", "auto")
@@ -1,3 +1,111 @@
 MAX_INFERENCE_WORKERS = 2
-PROCESS_EVERY_N_FRAMES = 10
-MAX_PARALLEL_TASKS = 3
\ No newline at end of file
+MAX_PARALLEL_TASKS = 3
+
+# Elastic MediaPipe instance pool (mediapipe_pool.py), thread backend
+MIN_MEDIAPIPE_INSTANCES = 1  # never reclaimed below this
+MAX_MEDIAPIPE_INSTANCES = 8  # one per session keeps tracking state sticky, about 150 MB each
+WARM_SPARE_INSTANCES = 1  # idle instances of a tier in use created ahead of demand
+IDLE_INSTANCE_TIMEOUT_SECONDS = 60  # idle instances above the minimum are closed after this
+POOL_MAINTENANCE_INTERVAL_SECONDS = 5
+POOL_ACQUIRE_TIMEOUT_SECONDS = 5.0  # the frame is skipped if no instance frees up in time
+POOL_GROWTH_MEMORY_PERCENT = 85  # host memory above which no new instance is created
+POOL_GROWTH_RETRY_SECONDS = 1.0  # how long a refused growth is not retried
+
+# Cross-session batching (inference_scheduler.py)
+MAX_BATCH_SIZE = 8  # max frames (one per session) in a single batch
+MAX_BATCH_WAIT_MS = 15  # how long to wait for more sessions before running a partial batch
+
+# Process backend (inference_process_pool.py)
+MAX_SHARED_FRAME_BYTES = 1920 * 1080 * 3  # shared memory slot per worker process, fits 1080p bgr24
+PROCESS_WORKER_TIMEOUT_SECONDS = 10
+PROCESS_WORKER_STARTUP_SECONDS = 60  # spawn, imports and the first landmark model, until the worker reports ready
+MAX_ATTACHED_RINGS = 32  # session frame rings a worker process keeps mapped, closed rings are detached right away
+
+# Per-session shared memory frame ring (frame_ring.py), used by the process backend
+FRAME_RING_SLOTS = MAX_INFERENCE_WORKERS + 2  # decode + in-flight frames + spare
+
+# Sign recognition (sign_classifier.py)
+HAND_CROP_SIZE = 28  # model.keras input is a 28x28 grayscale hand image
+HAND_CROP_PADDING = 0.2  # extra margin around the hand landmarks bounding box
+PREDICTION_WINDOW = 5  # per-session sliding window of class probabilities used for smoothing
+SIGN_CONFIDENCE_THRESHOLD = 0.8  # smoothed confidence needed to emit a sign
+
+# Adaptive sampling (frame_sampler.py), replaces a fixed "every N frames"
+MAX_INFERENCE_FPS = 10  # per session, when the box has spare capacity
+MIN_INFERENCE_FPS = 1  # per session, floor under heavy load
+TARGET_INFERENCE_LATENCY_MS = 250  # submit-to-result budget, sampling backs off above it
+HIGH_INFERENCE_LOAD = 0.9  # pool/queue busy fraction that makes sessions back off
+LOW_INFERENCE_LOAD = 0.5  # below this sessions may sample faster again
+MOTION_THRESHOLD = 2.0  # mean abs luma difference (0-255) that counts as movement
+MOTION_THUMBNAIL_WIDTH = 64  # width of the downscaled frame used for motion detection
+MAX_STATIC_SECONDS = 1.0  # re-run inference at least this often even without motion
+
+# Result alignment (landmark_tracker.py): outgoing frames are the current frame + recent landmarks
+MAX_RESULT_AGE_MS = 500  # landmarks further than this from the outgoing frame are not drawn
+LANDMARK_EXTRAPOLATION = True  # move the landmarks along their last motion between results
+MAX_EXTRAPOLATION_MS = 150  # how far past the newest result they are extrapolated
+
+# Region of interest (roi_tracker.py): Holistic sees a downscaled crop around the signer
+ROI_TRACKING = True
+ROI_MARGIN = 0.25  # added on each side, relative to the landmarks' bounding box
+ROI_MAX_AREA = 0.8  # boxes covering more of the frame than this run on the full frame
+ROI_INPUT_SIDES = (640, 480, 320)  # longer side of the model input at low / normal / high load
+DECODE_INTERPOLATION = "BILINEAR"  # swscale filter scaling decoded frames down to the model input
+
+# Landmark tiers (video_transform_track.py), used when config.LANDMARK_TIER is "auto":
+# a new session gets the first tier whose load ceiling is above the current inference load
+AUTO_LANDMARK_TIERS = (("full", LOW_INFERENCE_LOAD), ("lite", HIGH_INFERENCE_LOAD), ("hands_pose", 1.0))
+OVERLOADED_LANDMARK_TIER = "hands"  # load at or above every ceiling
+DEGRADED_LANDMARK_TIER = "hands_pose"  # cap for sessions admitted degraded
+
+# Overlay detail (overlay_renderer.py): annotated frames are drawn at the first level whose
+# load ceiling is above the current inference load, so drawing stays a small part of the frame budget
+OVERLAY_DETAIL_LEVELS = (("full", LOW_INFERENCE_LOAD), ("contours", HIGH_INFERENCE_LOAD))
+OVERLOADED_OVERLAY_DETAIL = "minimal"  # load at or above every ceiling
+DEGRADED_OVERLAY_DETAIL = "contours"  # cap for sessions admitted degraded
+
+# Offline transcription (transcription.py)
+TRANSCRIPTION_FPS = MAX_INFERENCE_FPS  # frames analysed per second of video, the rate SignRecognizer is tuned for
+TRANSCRIPTION_SEGMENT_SECONDS = 10  # the video is split into segments decoded in parallel
+TRANSCRIPTION_CHUNK_FRAMES = MAX_BATCH_SIZE  # hand crops classified together
+TRANSCRIPTION_MAX_SIDE = ROI_INPUT_SIDES[0]  # longer side of the landmark model input
+TRANSCRIPTION_MAX_UPLOAD_MB = 2048
+TRANSCRIPTION_UPLOAD_WRITE_BYTES = 1024**2  # upload chunks are collected up to this size and written off the event loop
+LANDMARK_CACHE_FORMAT = 2  # bump when the cached arrays change, older entries are never matched again
+
+# Signaling (signaling_dispatcher.py): per-client queues, handled concurrently across clients
+MAX_CONCURRENT_OFFERS = 4  # peer connections set up at once, each offer creates a DTLS certificate and waits for the track
+MAX_QUEUED_SIGNALING_MESSAGES = 256  # per client, further messages are dropped
+CLIENT_QUEUE_IDLE_SECONDS = 30  # a client's queue task ends after this long without messages
+MAX_OUTGOING_SIGNALING_MESSAGES = 1024  # handlers wait while this many messages are waiting for the socket
+
+# Sessions (session_manager.py): sessions also end without a close message from signaling
+SESSION_IDLE_SECONDS = 30  # no frame from the browser for this long, it is gone
+DISCONNECTED_GRACE_SECONDS = 10  # a "disconnected" peer connection may still recover
+SESSION_REAP_INTERVAL_SECONDS = 5
+MAX_PENDING_ICE_CANDIDATES = 64  # per client, buffered until its offer is set up
+MAX_PENDING_ICE_CLIENTS = 256
+PENDING_ICE_TTL_SECONDS = 30  # candidates of a client that never sends an offer
+
+# Latency histograms (metrics.py), upper bounds in seconds
+LATENCY_BUCKETS_SECONDS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Admission control (admission.py)
+MAX_SESSIONS = 20  # default hard cap of peer connections per worker (config.WORKER_CAPACITY)
+DEGRADE_CPU_PERCENT = 80  # host CPU above which new sessions are admitted degraded
+REJECT_CPU_PERCENT = 95
+CPU_SAMPLE_SECONDS = 1.0  # host CPU is averaged over at least this long, readings in between reuse the last one
+DEGRADE_MEMORY_PERCENT = 80  # host memory
+REJECT_MEMORY_PERCENT = 90
+MAX_RSS_MB = 4096  # this worker's RSS, degraded from 80% of it
+DEGRADE_SESSION_FPS = 4  # average per-session inference rate below which new sessions are degraded
+REJECT_SESSION_FPS = 2  # ... and rejected, existing sessions are already starved
+DEGRADED_MAX_INFERENCE_FPS = 3  # sampling cap for degraded sessions
+DEGRADED_MAX_WIDTH = 320  # resolution/frame rate the browser is asked to send when degraded
+DEGRADED_MAX_FPS = 15
+REJECT_RETRY_AFTER_SECONDS = 10
+
+# Logging (logs.py)
+LOG_QUEUE_SIZE = 10000  # records waiting for the writer thread, more are dropped (and counted)
+LOG_RATE_LIMIT_SECONDS = 5.0  # per-frame / per-candidate messages: at most one per key in this window
+MAX_RATE_LIMITED_KEYS = 4096  # rate limit keys remembered before quiet ones are forgotten
@@ -0,0 +1,169 @@
+"""
+Stand-in for the Spring signaling endpoint (backend SignalingHandler) to run several AI
+workers locally, without the backend:
+
+    python dev_signaling.py --port 8080
+    SIGNALING_URI="ws://localhost:8080/stream?client=python" WORKER_ID=w1 uvicorn main:app --port 8001
+    SIGNALING_URI="ws://localhost:8080/stream?client=python" WORKER_ID=w2 uvicorn main:app --port 8002
+
+Browsers connect to ws://localhost:8080/stream?client=js. Routing is the same as the backend:
+workers announce themselves with {"type": "register", "worker", "capacity", "sessions"} and
+report {"type": "load", "worker", "sessions"} after every offer/close; the first message of a
+client binds it to the least loaded worker with free capacity, everything else it sends goes
+to that same worker. A reject from the worker unbinds the client so its next offer can land
+elsewhere.
+"""
+import argparse
+import asyncio
+import json
+import uuid
+from urllib.parse import parse_qs, urlsplit
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+from constant.main import REJECT_RETRY_AFTER_SECONDS
+
+
+class _Worker:
+    __slots__ = ("id", "connection", "capacity", "sessions")
+
+    def __init__(self, worker_id, connection, capacity):
+        self.id = worker_id
+        self.connection = connection
+        self.capacity = capacity
+        self.sessions = 0
+
+
+class SignalingRouter:
+    def __init__(self):
+        self.workers = {}  # worker id -> _Worker
+        self.clients = {}  # client id -> browser connection
+        self.routes = {}  # client id -> worker id
+
+    def pick_worker(self):
+        """Least loaded registered worker that still has capacity"""
+        candidates = [w for w in self.workers.values() if w.sessions < w.capacity]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda w: w.sessions / max(w.capacity, 1))
+
+    async def from_client(self, client_id, msg):
+        msg["from"] = client_id
+        worker = self.workers.get(self.routes.get(client_id))
+        if worker is None:
+            worker = self.pick_worker()
+            if worker is None:
+                print(f"[{client_id}] 🚫 No AI worker available")
+                await self._send(
+                    self.clients.get(client_id),
+                    {
+                        "type": "reject",
+                        "mode": "reject",
+                        "reason": "no_worker",
+                        "retryAfter": REJECT_RETRY_AFTER_SECONDS,
+                    },
+                )
+                return
+            self.routes[client_id] = worker.id
+            worker.sessions += 1  # optimistic until the worker reports its load
+            print(f"[{client_id}] ➡️ Routed to worker {worker.id}")
+
+        await self._send(worker.connection, msg)
+        if msg.get("type") == "close":
+            self.routes.pop(client_id, None)
+
+    async def from_worker(self, connection, worker, msg):
+        mtype = msg.get("type")
+        if mtype == "register":
+            worker = _Worker(msg["worker"], connection, int(msg.get("capacity", 1)))
+            worker.sessions = len(msg.get("sessions", []))
+            self.workers[worker.id] = worker
+            for client_id in msg.get("sessions", []):
+                self.routes[client_id] = worker.id
+            print(f"🆔 Worker {worker.id} registered (capacity {worker.capacity})")
+            return worker
+
+        if worker is None:
+            print("⚠️ Message from unregistered worker, ignoring:", mtype)
+            return worker
+
+        if mtype == "load":
+            worker.sessions = int(msg.get("sessions", 0))
+            return worker
+
+        client_id = msg.get("to")
+        if mtype == "reject":
+            self.routes.pop(client_id, None)
+        await self._send(self.clients.get(client_id), msg)
+        return worker
+
+    async def client_closed(self, client_id):
+        self.clients.pop(client_id, None)
+        worker = self.workers.get(self.routes.pop(client_id, None))
+        if worker is not None:
+            await self._send(worker.connection, {"type": "close", "from": client_id})
+
+    def worker_closed(self, worker):
+        # Routes stay: a worker that reconnects lists its sessions again when it registers
+        if worker is not None and self.workers.get(worker.id) is worker:
+            del self.workers[worker.id]
+            print(f"❌ Worker {worker.id} disconnected")
+
+    @staticmethod
+    async def _send(connection, msg):
+        if connection is None:
+            return
+        try:
+            await connection.send(json.dumps(msg))
+        except ConnectionClosed:
+            pass
+
+    async def handle(self, connection):
+        query = parse_qs(urlsplit(connection.request.path).query)
+        if query.get("client") == ["python"]:
+            await self._serve_worker(connection)
+        else:
+            await self._serve_client(connection)
+
+    async def _serve_worker(self, connection):
+        worker = None
+        try:
+            async for message in connection:
+                worker = await self.from_worker(connection, worker, json.loads(message))
+        except ConnectionClosed:
+            pass
+        finally:
+            self.worker_closed(worker)
+
+    async def _serve_client(self, connection):
+        client_id = uuid.uuid4().hex[:12]
+        self.clients[client_id] = connection
+        print(f"[{client_id}] JS client connected")
+        try:
+            async for message in connection:
+                await self.from_client(client_id, json.loads(message))
+        except ConnectionClosed:
+            pass
+        finally:
+            await self.client_closed(client_id)
+            print(f"[{client_id}] JS client disconnected")
+
+
+async def run(host, port):
+    router = SignalingRouter()
+    async with serve(router.handle, host, port) as server:
+        print(f"📡 Stand-in signaling on ws://{host}:{port}/stream")
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    asyncio.run(run(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
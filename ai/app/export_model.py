@@ -0,0 +1,113 @@
+"""
+Export model.keras for the lightweight classifier backends and check they agree.
+
+    python export_model.py                  # write model.tflite and model.onnx
+    python export_model.py --verify         # export, then compare against Keras
+    python export_model.py --verify-only    # compare already exported files
+
+Needs TensorFlow (and `pip install tf2onnx` for ONNX); serving the exported files does not.
+"""
+import argparse
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from config import MODEL_PATH, ONNX_MODEL_PATH, TFLITE_MODEL_PATH
+from constant.main import HAND_CROP_SIZE, MAX_BATCH_SIZE
+from sign_classifier import CLASSIFIER_BACKENDS, KerasClassifier
+
+INPUT_SHAPE = (None, HAND_CROP_SIZE, HAND_CROP_SIZE, 1)
+
+
+def _serving_function(model):
+    import tensorflow as tf
+
+    @tf.function(input_signature=[tf.TensorSpec(INPUT_SHAPE, tf.float32, name="input")])
+    def serve(x):
+        return model(x, training=False)
+
+    return serve
+
+
+def export_tflite(model, path=TFLITE_MODEL_PATH):
+    import tensorflow as tf
+
+    # Keras 3 models convert reliably only through an exported SavedModel
+    with tempfile.TemporaryDirectory() as saved_model_dir:
+        model.export(saved_model_dir, verbose=False)
+        converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+        flatbuffer = converter.convert()
+    with open(path, "wb") as f:
+        f.write(flatbuffer)
+    print(f"✅ TFLite model written to {path}")
+
+
+def export_onnx(model, path=ONNX_MODEL_PATH):
+    import tensorflow as tf
+    import tf2onnx
+
+    tf2onnx.convert.from_function(
+        _serving_function(model),
+        input_signature=[tf.TensorSpec(INPUT_SHAPE, tf.float32, name="input")],
+        opset=13,
+        output_path=path,
+    )
+    print(f"✅ ONNX model written to {path}")
+
+
+def verify(formats, atol):
+    """Every exported backend must match Keras within atol on the same random batches"""
+    reference = KerasClassifier()
+    rng = np.random.default_rng(0)
+    batches = [
+        rng.random((size, HAND_CROP_SIZE, HAND_CROP_SIZE), dtype=np.float32)
+        for size in (1, 3, MAX_BATCH_SIZE)
+    ]
+    expected = [reference.predict_batch(b) for b in batches]
+
+    ok = True
+    for name in ["keras", *formats]:
+        backend = reference if name == "keras" else CLASSIFIER_BACKENDS[name]()
+        worst = 0.0
+        for batch, want in zip(batches, expected):
+            got = backend.predict_batch(batch)
+            worst = max(worst, float(np.abs(got - want).max()))
+            if got.shape != want.shape or got.argmax(axis=1).tolist() != want.argmax(axis=1).tolist():
+                worst = float("inf")
+
+        started = time.monotonic()
+        for _ in range(50):
+            backend.predict_batch(batches[-1])
+        per_batch = (time.monotonic() - started) / 50 * 1000
+
+        status = "✅" if worst <= atol else "❌"
+        ok = ok and worst <= atol
+        print(f"{status} {name}: max abs diff {worst:.2e}, {per_batch:.2f} ms per batch of {MAX_BATCH_SIZE}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--formats", nargs="+", choices=["tflite", "onnx"], default=["tflite", "onnx"])
+    parser.add_argument("--verify", action="store_true", help="compare exported models against Keras")
+    parser.add_argument("--verify-only", action="store_true", help="skip exporting, only compare")
+    parser.add_argument("--atol", type=float, default=1e-4, help="allowed absolute difference per probability")
+    args = parser.parse_args()
+
+    if not args.verify_only:
+        import tensorflow as tf
+
+        model = tf.keras.models.load_model(MODEL_PATH, compile=False)
+        if "tflite" in args.formats:
+            export_tflite(model)
+        if "onnx" in args.formats:
+            export_onnx(model)
+
+    if args.verify or args.verify_only:
+        sys.exit(0 if verify(args.formats, args.atol) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class FrameSlot:
+    """
+    Model input handed to inference, either in a ring slot or a standalone array: the whole
+    frame as rgb24 (frame_to_rgb), already downscaled so that roi fits max_side.
+    """
+
+    __slots__ = ("ring", "index", "array", "shm_name", "offset", "roi", "max_side", "tier", "session_id")
+
+    def __init__(self, ring, index, array, shm_name=None, offset=0):
+        self.ring = ring
+        self.index = index
+        self.array = array
+        self.shm_name = shm_name
+        self.offset = offset
+        self.roi = None  # normalized crop the model should look at, None = whole frame
+        self.max_side = None  # downscale the model input to this longer side
+        self.tier = "full"  # landmark pipeline to run (see create_landmark_model)
+        self.session_id = None  # frames of a session go to the instance it is tracking on
+
+    @classmethod
+    def standalone(cls, img):
+        return cls(None, None, img)
+
+    def retain(self):
+        if self.ring is not None:
+            self.ring.retain(self.index)
+
+    def release(self):
+        if self.ring is not None:
+            self.ring.release(self.index)
+
+
+class FrameRing:
+    """
+    Per-session set of preallocated frame buffers in shared memory.
+
+    The decoded frame is written into a free slot once; worker processes
+    attach to the ring by name and read the slot in place.
+    Slots are reference counted and only handed out again once every holder
+    released them.
+    """
+
+    def __init__(self, slots, slot_bytes):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self.shm_name = self._shm.name
+        self._buffer = np.ndarray((slots * slot_bytes,), dtype=np.uint8, buffer=self._shm.buf)
+        self._refs = [0] * slots
+        self._next = 0
+
+    def acquire(self, height, width):
+        """Claim a free slot for a height x width rgb24 frame, None if none is free or it does not fit"""
+        if self._buffer is None or height * width * 3 > self.slot_bytes:
+            return None
+
+        for step in range(self.slots):
+            index = (self._next + step) % self.slots
+            if self._refs[index] == 0:
+                self._refs[index] = 1
+                self._next = (index + 1) % self.slots
+                offset = index * self.slot_bytes
+                array = self._buffer[offset : offset + height * width * 3].reshape(
+                    height, width, 3
+                )
+                return FrameSlot(self, index, array, self.shm_name, offset)
+        return None
+
+    def retain(self, index):
+        self._refs[index] += 1
+
+    def release(self, index):
+        self._refs[index] = max(0, self._refs[index] - 1)
+
+    def in_use(self):
+        return sum(1 for r in self._refs if r > 0)
+
+    def close(self):
+        if self._shm is None:
+            return
+        self._buffer = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # A slot view is still referenced somewhere, the mapping goes away with it
+            pass
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+        self._shm = None
@@ -0,0 +1,101 @@
+import numpy as np
+
+from constant.main import (
+    HIGH_INFERENCE_LOAD,
+    LOW_INFERENCE_LOAD,
+    MAX_INFERENCE_FPS,
+    MAX_STATIC_SECONDS,
+    MIN_INFERENCE_FPS,
+    MOTION_THRESHOLD,
+    MOTION_THUMBNAIL_WIDTH,
+    TARGET_INFERENCE_LATENCY_MS,
+)
+
+
+class AdaptiveSampler:
+    """
+    Decides per session which frames go to inference.
+
+    The sampling interval moves between 1/max_fps (MAX_INFERENCE_FPS unless
+    the session was admitted degraded) and
+    1/MIN_INFERENCE_FPS: it grows when the measured submit-to-result latency
+    exceeds the budget or the shared pool/queue is busy, and shrinks again
+    while there is spare capacity. Frames that barely differ from the last
+    sampled one (mean abs difference of a downscaled luma plane) are skipped,
+    but never for longer than MAX_STATIC_SECONDS.
+    """
+
+    def __init__(self, load_fn=None, max_fps=MAX_INFERENCE_FPS):
+        self._load_fn = load_fn  # () -> 0..1 busy estimate of the shared inference resources
+        self._min_interval = 1.0 / max_fps  # lower cap for sessions admitted degraded
+        self.interval = self._min_interval
+        self.latency = None  # EWMA of submit-to-result time, seconds
+        self._last_sample = None
+        self._thumbnail = None
+        self.sampled = 0
+        self.skipped_static = 0
+
+    def should_sample(self, frame, now, has_result):
+        if not has_result or self._last_sample is None:
+            return self._take(frame, now)
+
+        elapsed = now - self._last_sample
+        if elapsed < self.interval:
+            return False
+
+        self._adapt()
+        if elapsed < self.interval:
+            return False
+
+        thumbnail = None
+        if elapsed < MAX_STATIC_SECONDS:
+            # Built once, compared here and kept by _take for the next comparison
+            thumbnail = self._luma_thumbnail(frame)
+            if not self._moved(thumbnail):
+                self.skipped_static += 1
+                return False
+
+        return self._take(frame, now, thumbnail)
+
+    def on_result(self, latency):
+        self.latency = latency if self.latency is None else 0.7 * self.latency + 0.3 * latency
+
+    def get_stats(self):
+        return {
+            "target_fps": round(1.0 / self.interval, 2),
+            "latency_ms": None if self.latency is None else round(self.latency * 1000, 1),
+            "sampled": self.sampled,
+            "skipped_static": self.skipped_static,
+        }
+
+    def _take(self, frame, now, thumbnail=None):
+        self._last_sample = now
+        self._thumbnail = thumbnail if thumbnail is not None else self._luma_thumbnail(frame)
+        self.sampled += 1
+        return True
+
+    def _adapt(self):
+        load = self._load_fn() if self._load_fn is not None else 0.0
+        over_budget = self.latency is not None and self.latency * 1000 > TARGET_INFERENCE_LATENCY_MS
+
+        if over_budget or load >= HIGH_INFERENCE_LOAD:
+            self.interval = min(self.interval * 1.5, 1.0 / MIN_INFERENCE_FPS)
+        elif load < LOW_INFERENCE_LOAD:
+            self.interval = max(self.interval * 0.8, self._min_interval)
+
+    def _moved(self, current):
+        previous = self._thumbnail
+        if previous is None or current.shape != previous.shape:
+            return True
+        diff = np.abs(current.astype(np.int16) - previous).mean()
+        return diff >= MOTION_THRESHOLD
+
+    @staticmethod
+    def _luma_thumbnail(frame):
+        """Downscaled grey frame, straight from the Y plane when the frame is yuv420p"""
+        step = max(1, frame.width // MOTION_THUMBNAIL_WIDTH)
+        if frame.format.name == "yuv420p":
+            plane = frame.planes[0]
+            luma = np.frombuffer(plane, np.uint8).reshape(-1, plane.line_size)
+            return luma[: frame.height : step, : frame.width : step].copy()
+        return frame.to_ndarray(format="gray")[::step, ::step].copy()
@@ -1,10 +1,14 @@
 import psutil
-import cv2
-import mediapipe as mp
 import asyncio
 
+# cv2 and MediaPipe (which imports TensorFlow) are only loaded by the checks using them,
+# importing monitoring_task stays cheap
+
 def check_gpu_availability():
     """Check GPU using only existing libraries"""
+    import cv2
+    import mediapipe as mp
+
     print("\n🔍 GPU CHECK:")
     
     # ✅ TensorFlow GPU Check
@@ -68,6 +72,8 @@ def check_gpu_availability():
 
 def simple_gpu_test():
     """Test if MediaPipe can initialize properly"""
+    import mediapipe as mp
+
     print("🧪 MEDIAPIPE GPU TEST:")
     try:
         # Try to create MediaPipe model
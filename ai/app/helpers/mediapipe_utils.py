@@ -0,0 +1,190 @@
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from constant.main import DECODE_INTERPOLATION
+
+mp_holistic = mp.solutions.holistic
+mp_hands = mp.solutions.hands
+mp_pose = mp.solutions.pose
+mp_drawing = mp.solutions.drawing_utils
+mp_face_mesh = mp.solutions.face_mesh
+
+# Landmark pipelines, most accurate first (see create_landmark_model)
+LANDMARK_TIERS = ("full", "lite", "hands_pose", "hands")
+
+
+def create_holistic():
+    return mp_holistic.Holistic(
+        min_detection_confidence=0.5, min_tracking_confidence=0.5
+    )
+
+
+class _SplitResults:
+    """Holistic-shaped result assembled from the separate Pose / Hands solutions"""
+
+    __slots__ = ("pose_landmarks", "face_landmarks", "left_hand_landmarks", "right_hand_landmarks")
+
+    def __init__(self):
+        self.pose_landmarks = None
+        self.face_landmarks = None
+        self.left_hand_landmarks = None
+        self.right_hand_landmarks = None
+
+
+class SplitLandmarkModel:
+    """
+    Hands (and optionally Pose) as separate lite solutions behind Holistic's process() interface.
+
+    No face mesh is run; the pose still carries the nose, eyes, ears and mouth corners.
+    """
+
+    def __init__(self, with_pose=True):
+        self._pose = (
+            mp_pose.Pose(model_complexity=0, min_detection_confidence=0.5, min_tracking_confidence=0.5)
+            if with_pose
+            else None
+        )
+        self._hands = mp_hands.Hands(
+            max_num_hands=2, model_complexity=0, min_detection_confidence=0.5, min_tracking_confidence=0.5
+        )
+
+    def process(self, image):
+        results = _SplitResults()
+        if self._pose is not None:
+            results.pose_landmarks = self._pose.process(image).pose_landmarks
+        hands = self._hands.process(image)
+        for hand, handedness in zip(hands.multi_hand_landmarks or (), hands.multi_handedness or ()):
+            # Hands labels assume a mirrored (selfie) image, our frames are not mirrored, so its
+            # "Left" is the signer's right hand; Holistic names hands after the signer
+            if handedness.classification[0].label == "Left":
+                results.right_hand_landmarks = hand
+            else:
+                results.left_hand_landmarks = hand
+        return results
+
+    def reset(self):
+        if self._pose is not None:
+            self._pose.reset()
+        self._hands.reset()
+
+    def close(self):
+        if self._pose is not None:
+            self._pose.close()
+        self._hands.close()
+
+
+def create_landmark_model(tier="full"):
+    """
+    Landmark model for a pipeline tier, every tier returns the same results_to_arrays layout.
+
+    "full" is the default Holistic, "lite" Holistic with model_complexity=0 (no refined face),
+    "hands_pose" runs Pose and Hands lite models without the face mesh, "hands" only Hands
+    (pose and face stay None).
+    """
+    if tier == "full":
+        return create_holistic()
+    if tier == "lite":
+        return mp_holistic.Holistic(
+            model_complexity=0,
+            refine_face_landmarks=False,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5,
+        )
+    if tier == "hands_pose":
+        return SplitLandmarkModel(with_pose=True)
+    if tier == "hands":
+        return SplitLandmarkModel(with_pose=False)
+    raise ValueError(f"unknown landmark tier {tier!r}, expected one of {LANDMARK_TIERS}")
+
+
+def frame_to_rgb(frame, roi=None, max_side=None):
+    """
+    Model input straight from a decoded av.VideoFrame: rgb24, converted and downscaled in one
+    swscale pass so that the roi (normalized box, the whole frame if None) fits max_side.
+    """
+    width, height = frame.width, frame.height
+    box_width, box_height = width, height
+    if roi is not None:
+        box_width, box_height = (roi[2] - roi[0]) * width, (roi[3] - roi[1]) * height
+    if max_side is None or max(box_width, box_height) <= max_side:
+        return frame.to_ndarray(format="rgb24")
+    scale = max_side / max(box_width, box_height)
+    return frame.to_ndarray(
+        width=max(int(width * scale), 2),
+        height=max(int(height * scale), 2),
+        format="rgb24",
+        interpolation=DECODE_INTERPOLATION,
+    )
+
+
+def detect_landmarks(image, model, roi=None, max_side=None):
+    """
+    Landmark arrays (see results_to_arrays) for an rgb24 frame (see frame_to_rgb), in frame coordinates.
+
+    roi is a normalized (x0, y0, x1, y1) box the model only sees, max_side caps the
+    longer side of what it sees (the crop or the full frame is downscaled to fit).
+    """
+    height, width = image.shape[:2]
+    x0, y0, x1, y1 = 0, 0, width, height
+    if roi is not None:
+        x0, y0 = int(roi[0] * width), int(roi[1] * height)
+        x1, y1 = int(np.ceil(roi[2] * width)), int(np.ceil(roi[3] * height))
+    view = image[y0:y1, x0:x1]
+
+    crop_height, crop_width = view.shape[:2]
+    if max_side is not None and max(crop_height, crop_width) > max_side:
+        scale = max_side / max(crop_height, crop_width)
+        size = (max(int(crop_width * scale), 1), max(int(crop_height * scale), 1))
+        view = cv2.resize(view, size, interpolation=cv2.INTER_AREA)
+    elif roi is not None:
+        view = np.ascontiguousarray(view)
+
+    writeable = view.flags.writeable
+    view.flags.writeable = False  # passed to MediaPipe by reference
+    try:
+        results = model.process(view)
+    finally:
+        view.flags.writeable = writeable
+    landmarks = results_to_arrays(results)
+    if roi is None:
+        return landmarks
+
+    # Crop-relative -> frame-relative (z is scaled like x, MediaPipe measures it in image widths)
+    for points in landmarks.values():
+        if points is not None:
+            points[:, 0] = (points[:, 0] * crop_width + x0) / width
+            points[:, 1] = (points[:, 1] * crop_height + y0) / height
+            points[:, 2] *= crop_width / width
+    return landmarks
+
+
+def _landmarks_to_array(landmark_list, with_visibility=False):
+    if not landmark_list:
+        return None
+    if with_visibility:
+        return np.array(
+            [[lm.x, lm.y, lm.z, lm.visibility] for lm in landmark_list.landmark],
+            dtype=np.float32,
+        )
+    return np.array(
+        [[lm.x, lm.y, lm.z] for lm in landmark_list.landmark], dtype=np.float32
+    )
+
+
+def results_to_arrays(results):
+    """Compact, picklable form of a Holistic result (None for missing parts, whatever the tier)"""
+    return {
+        "pose": _landmarks_to_array(results.pose_landmarks, with_visibility=True),
+        "face": _landmarks_to_array(results.face_landmarks),
+        "left_hand": _landmarks_to_array(results.left_hand_landmarks),
+        "right_hand": _landmarks_to_array(results.right_hand_landmarks),
+    }
+
+
+def landmarks_to_message(landmarks, pts):
+    """JSON-ready data channel message, coordinates rounded to keep it small"""
+    message = {"type": "landmarks", "pts": pts}
+    for part, points in landmarks.items():
+        message[part] = None if points is None else np.round(points, 4).tolist()
+    return message
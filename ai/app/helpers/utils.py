@@ -1,8 +1,14 @@
+import logging
+
 from aiortc import (
     RTCPeerConnection,
     RTCIceCandidate,
 )
 
+import logs
+
+logger = logging.getLogger(__name__)
+
 def parse_ice_candidate_string(candidate_string: str) -> dict:
     """
     Parse ICE candidate string to extract components.
@@ -32,7 +38,7 @@ def parse_ice_candidate_string(candidate_string: str) -> dict:
             "type": candidate_type,
         }
     except Exception as e:
-        print(f"❌ Error parsing candidate string: {e}")
+        logs.log_limited(logger, logging.WARNING, "ice_parse", "❌ Error parsing candidate string: %s", e)
         return {
             "foundation": "0",
             "component": 1,
@@ -54,7 +60,7 @@ async def add_ice_candidate_safe(
         sdp_mline_index = cand_dict.get("sdpMLineIndex")
 
         if not candidate_string:
-            print(f"[{client_id}] ⚠️ Empty candidate string, skipping")
+            logger.debug("⚠️ Empty candidate string, skipping", extra={"session": client_id})
             return
 
         # Parse candidate string
@@ -78,4 +84,7 @@ async def add_ice_candidate_safe(
         # )
 
     except Exception as e:
-        print(f"[{client_id}] ❌ addIceCandidate failed: {e}")
+        logs.log_limited(
+            logger, logging.WARNING, ("add_ice", client_id), "❌ addIceCandidate failed: %s", e,
+            extra={"session": client_id},
+        )
@@ -0,0 +1,349 @@
+import asyncio
+import logging
+import multiprocessing as mp_proc
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import logs
+from constant.main import (
+    MAX_ATTACHED_RINGS,
+    MAX_SHARED_FRAME_BYTES,
+    PROCESS_WORKER_STARTUP_SECONDS,
+    PROCESS_WORKER_TIMEOUT_SECONDS,
+)
+from helpers.mediapipe_utils import create_landmark_model, detect_landmarks
+from session_affinity import SessionAffinity
+from sign_classifier import extract_hand_crop
+
+logger = logging.getLogger(__name__)
+
+
+def _attach_shared_memory(name):
+    """Attach to a block owned by the parent, the parent stays responsible for unlinking it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: spawned children share the parent's resource tracker, so
+        # the extra registration is harmless and cleared by the parent's unlink
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(shm_name, conn, tier):
+    """Worker process: owns one landmark model per tier it was asked for and reads frames straight from shared memory"""
+    shm = _attach_shared_memory(shm_name)
+    rings = OrderedDict()  # session frame rings attached so far (name -> SharedMemory)
+    models = {}  # tier -> landmark model, created on first use
+    try:
+        # The default tier's model is loaded before the worker reports ready
+        try:
+            models[tier] = create_landmark_model(tier)
+            conn.send(("ready", None))
+        except Exception as e:
+            conn.send(("ready", str(e)))
+        while True:
+            request = conn.recv()
+            if request is None:
+                break
+
+            kind, payload = request
+            if kind == "detach":
+                # Rings of ended sessions, the parent unlinked them and only this mapping keeps them alive
+                for ring_name in payload:
+                    ring = rings.pop(ring_name, None)
+                    if ring is not None:
+                        ring.close()
+                continue
+
+            ring_name, offset, height, width, roi, max_side, tier, reset = payload
+            if ring_name is None:
+                buf = shm.buf
+            else:
+                if ring_name not in rings:
+                    rings[ring_name] = _attach_shared_memory(ring_name)
+                    if len(rings) > MAX_ATTACHED_RINGS:
+                        _, oldest = rings.popitem(last=False)
+                        oldest.close()
+                rings.move_to_end(ring_name)
+                buf = rings[ring_name].buf
+
+            img = np.ndarray((height, width, 3), dtype=np.uint8, buffer=buf, offset=offset)
+            try:
+                if tier not in models:
+                    models[tier] = create_landmark_model(tier)
+                    reset = False
+                started = time.perf_counter()
+                if reset:
+                    models[tier].reset()  # last ran another session's frame, drop its tracking state
+                landmarks = detect_landmarks(img, models[tier], roi, max_side)
+                timings = {"mediapipe": time.perf_counter() - started}
+                hand_crop = extract_hand_crop(img, landmarks)
+                conn.send(
+                    ("ok", {"landmarks": landmarks, "hand_crop": hand_crop, "timings": timings})
+                )
+            except Exception as e:
+                conn.send(("error", str(e)))
+            finally:
+                del img, buf
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        for model in models.values():
+            model.close()
+        for ring in rings.values():
+            ring.close()
+        shm.close()
+
+
+class _ProcessWorker:
+    def __init__(self, ctx, index, tier):
+        self.index = index
+        self.ready = False
+        self.detached = []  # rings closed while the worker was busy, sent with its release
+        self.shm = shared_memory.SharedMemory(create=True, size=MAX_SHARED_FRAME_BYTES)
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(self.shm.name, child_conn, tier),
+            name=f"MediaPipe-{index}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def wait_ready(self, timeout=PROCESS_WORKER_STARTUP_SECONDS):
+        """Block until the worker loaded its model, False if it did not report in time"""
+        if not self.ready and self.conn.poll(timeout):
+            _, error = self.conn.recv()
+            self.ready = True
+            if error is not None:
+                logger.warning("⚠️ MediaPipe worker %s started without its model: %s", self.index, error)
+        return self.ready
+
+    def run(self, slot, reset=False):
+        """Run the slot's frame, returns landmarks and hand crop"""
+        if slot.shm_name is not None:
+            height, width = slot.array.shape[:2]
+            return self._request(
+                ("frame", (slot.shm_name, slot.offset, height, width, slot.roi, slot.max_side, slot.tier, reset))
+            )
+
+        # Not in shared memory: go through this worker's own slot
+        img = slot.array
+        height, width = img.shape[:2]
+        view = np.ndarray((height, width, 3), dtype=np.uint8, buffer=self.shm.buf)
+        try:
+            view[...] = img
+            return self._request(("frame", (None, 0, height, width, slot.roi, slot.max_side, slot.tier, reset)))
+        finally:
+            del view
+
+    def detach(self, ring_names):
+        """Let the worker unmap closed rings, no answer is sent back"""
+        try:
+            self.conn.send(("detach", ring_names))
+        except (BrokenPipeError, OSError):
+            pass  # the worker is gone and its mappings with it
+
+    def _request(self, request):
+        self.conn.send(request)
+        while True:
+            if not self.conn.poll(PROCESS_WORKER_TIMEOUT_SECONDS):
+                raise TimeoutError(f"worker {self.index} did not answer in time")
+            status, payload = self.conn.recv()
+            if status != "ready":
+                break
+            self.ready = True  # reported after wait_ready gave up
+
+        if status != "ok":
+            raise RuntimeError(payload)
+        return payload
+
+    def close(self, timeout=2.0):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self.conn.close()
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ProcessInferencePool:
+    """
+    MediaPipe inference in separate processes, one landmark model per tier each.
+
+    Frames already in a session FrameRing are read straight from it, anything
+    else goes through a per-worker shared memory slot; only the frame location,
+    the compact landmark arrays and the small hand crop travel over the pipe.
+    Workers stick to sessions like pooled instances do (see SessionAffinity).
+    A closed ring is detached from every worker (detach_ring), otherwise each
+    worker would keep the ended session's frames mapped.
+
+    Frames wait for their worker on the event loop, a thread only blocks on the
+    pipe of a worker that runs its frame; the pool is used from the loop only.
+    """
+
+    def __init__(self, size, tier):
+        self.size = size
+        self.tier = tier
+        self._ctx = mp_proc.get_context("spawn")
+        self._idle = []  # longest idle first
+        self._workers = []
+        self._waiters = deque()  # (session_id, future) in arrival order
+        self._lock = threading.Lock()
+        self._affinity = SessionAffinity()
+        # One thread per worker waits for its answer
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="MediaPipeWorker")
+        # All workers start at once, then wait until each has its model loaded
+        for i in range(size):
+            worker = _ProcessWorker(self._ctx, i, tier)
+            self._workers.append(worker)
+            self._idle.append(worker)
+        for worker in self._workers:
+            if worker.wait_ready():
+                logger.info("✅ Started MediaPipe worker process %s/%s (pid %s)", worker.index + 1, size, worker.process.pid)
+            else:
+                logger.warning(
+                    "⚠️ MediaPipe worker process %s/%s not ready yet (pid %s)", worker.index + 1, size, worker.process.pid
+                )
+
+    async def predict(self, slot):
+        """Landmarks and hand crop of the slot's frame (None on failure)"""
+        img = slot.array
+        if slot.shm_name is None and img.nbytes > MAX_SHARED_FRAME_BYTES:
+            logs.log_limited(
+                logger, logging.WARNING, ("frame_too_large", slot.session_id),
+                "⚠️ Frame %s exceeds shared memory slot, skipping inference", img.shape,
+                extra={"session": slot.session_id},
+            )
+            return None
+
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        worker, reset = await self._acquire(slot.session_id)
+        waited = time.perf_counter() - started
+        running = loop.run_in_executor(self._executor, worker.run, slot, reset)
+        try:
+            result = await asyncio.shield(running)
+        except asyncio.CancelledError:
+            # The worker still answers on its pipe, it is only handed out again after that
+            running.add_done_callback(lambda f: self._release_after(worker, f))
+            raise
+        except (EOFError, BrokenPipeError, OSError, TimeoutError) as e:
+            logger.error("❌ MediaPipe worker %s failed (%s), restarting", worker.index, e)
+            self._affinity.forget(worker)
+            try:
+                worker = await loop.run_in_executor(self._executor, self._restart, worker)
+            finally:
+                self._release(worker)
+            return None
+        except Exception as e:
+            logs.log_limited(
+                logger, logging.ERROR, ("prediction_error", slot.session_id), "MediaPipe prediction error: %s", e,
+                extra={"session": slot.session_id},
+            )
+            self._release(worker)
+            return None
+        self._release(worker)
+        result["timings"]["pool_wait"] = waited
+        return result
+
+    def drop_session(self, session_id):
+        self._affinity.drop_session(session_id)
+
+    def detach_ring(self, ring_name):
+        """The session's FrameRing was closed, workers unmap it now (idle) or once their frame is done"""
+        for worker in self._workers:
+            if worker in self._idle:
+                worker.detach([ring_name])
+            else:
+                worker.detached.append(ring_name)
+
+    async def _acquire(self, session_id):
+        """
+        Worker for the session's frame and whether it has to reset first. A session whose
+        own worker is busy waits for that one, without holding a thread meanwhile.
+        """
+        index = self._affinity.pick(self._idle, session_id)
+        if index is not None:
+            worker = self._idle.pop(index)
+            return worker, self._affinity.use(worker, session_id)
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (session_id, future)
+        self._waiters.append(waiter)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(future.result()[0])  # handed over just as the caller gave up
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+    def _release(self, worker):
+        if worker.detached:
+            worker.detach(worker.detached)
+            worker.detached = []
+        for i, (session_id, future) in enumerate(self._waiters):
+            if not future.done() and self._affinity.accepts(worker, session_id):
+                del self._waiters[i]
+                future.set_result((worker, self._affinity.use(worker, session_id)))
+                return
+        self._idle.append(worker)
+
+    def _release_after(self, worker, future):
+        if not future.cancelled():
+            future.exception()  # a failed frame of a caller that gave up, nobody else reads it
+        self._release(worker)
+
+    def _restart(self, worker):
+        """Replace a failed worker (blocking, runs on the pool's executor)"""
+        with self._lock:
+            try:
+                worker.close(timeout=0.5)
+            except Exception as e:
+                logger.warning("⚠️ Error closing MediaPipe worker %s: %s", worker.index, e)
+            replacement = _ProcessWorker(self._ctx, worker.index, self.tier)
+            replacement.wait_ready()
+            self._workers[self._workers.index(worker)] = replacement
+            return replacement
+
+    def get_status(self):
+        available = len(self._idle)
+        return {
+            "available": available,
+            "total": self.size,
+            "initialized": True,
+            "in_use": self.size - available,
+            "waiting": len(self._waiters),
+            "alive": sum(1 for w in self._workers if w.process.is_alive()),
+            "ready": sum(1 for w in self._workers if w.ready),
+            **self._affinity.get_status(),
+        }
+
+    def close(self):
+        with self._lock:
+            for worker in self._workers:
+                try:
+                    worker.close()
+                except Exception as e:
+                    logger.warning("⚠️ Error closing MediaPipe worker %s: %s", worker.index, e)
+            self._workers = []
+        for _, future in self._waiters:
+            if not future.done():
+                future.cancel()
+        self._waiters.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
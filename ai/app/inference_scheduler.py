@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import logs
+import metrics
+
+from constant.main import MAX_BATCH_SIZE, MAX_BATCH_WAIT_MS, MAX_PARALLEL_TASKS
+
+logger = logging.getLogger(__name__)
+
+
+class PendingFrame:
+    __slots__ = ("session_id", "img", "future", "submitted_at")
+
+    def __init__(self, session_id, img, future):
+        self.session_id = session_id
+        self.img = img
+        self.future = future
+        self.submitted_at = time.monotonic()
+
+
+class InferenceScheduler:
+    """
+    Central scheduler shared by all live tracks.
+
+    Every session holds at most one pending frame (a newer frame replaces the
+    older one), pending sessions are served oldest-first, and frames collected
+    within MAX_BATCH_WAIT_MS are dispatched together as one batch: landmark
+    extraction per frame, then a single classifier pass over the whole batch.
+    """
+
+    def __init__(
+        self,
+        predict_fn,
+        executor_getter,
+        classify_fn=None,
+        max_batch_size=MAX_BATCH_SIZE,
+        max_wait_ms=MAX_BATCH_WAIT_MS,
+        max_batches_in_flight=MAX_PARALLEL_TASKS,
+    ):
+        self._predict_fn = predict_fn
+        self._classify_fn = classify_fn
+        self._executor_getter = executor_getter
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending: "OrderedDict[str, PendingFrame]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._batch_slots = asyncio.Semaphore(max_batches_in_flight)
+        self._runner = None
+        self._batch_tasks = set()
+
+    def submit(self, session_id, img) -> asyncio.Future:
+        """Queue a frame for a session, returns a future with the prediction (None if superseded)."""
+        self._ensure_runner()
+        future = asyncio.get_running_loop().create_future()
+
+        previous = self._pending.get(session_id)
+        if previous is not None:
+            # Keep the session's place in line, only swap in the fresher frame
+            previous.img = img
+            if not previous.future.done():
+                previous.future.set_result(None)
+            previous.future = future
+        else:
+            self._pending[session_id] = PendingFrame(session_id, img, future)
+
+        self._wakeup.set()
+        return future
+
+    def drop_session(self, session_id):
+        """Forget a session's pending frame (e.g. when its track stops)."""
+        pending = self._pending.pop(session_id, None)
+        if pending is not None and not pending.future.done():
+            pending.future.set_result(None)
+
+    def get_status(self):
+        return {
+            "pending_sessions": len(self._pending),
+            "batches_in_flight": len(self._batch_tasks),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
+
+    def _ensure_runner(self):
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+
+            # Give other sessions a short window to join the batch
+            if len(self._pending) < self.max_batch_size:
+                oldest = next(iter(self._pending.values()), None)
+                if oldest is not None:
+                    remaining = self.max_wait - (time.monotonic() - oldest.submitted_at)
+                    if remaining > 0:
+                        await asyncio.sleep(remaining)
+
+            await self._batch_slots.acquire()
+
+            batch = []
+            while self._pending and len(batch) < self.max_batch_size:
+                _, pending = self._pending.popitem(last=False)
+                batch.append(pending)
+
+            if not self._pending:
+                self._wakeup.clear()
+
+            if not batch:
+                self._batch_slots.release()
+                continue
+
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch):
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self._executor_getter()
+            dispatched = time.monotonic()
+            for item in batch:
+                metrics.observe("scheduler_wait", dispatched - item.submitted_at, item.session_id)
+
+            # Landmark extraction is per frame, spread over the executor threads
+            # (a coroutine predict_fn hands its frames to threads itself)
+            if asyncio.iscoroutinefunction(self._predict_fn):
+                predictions = (self._predict_fn(item.img) for item in batch)
+            else:
+                predictions = (
+                    loop.run_in_executor(executor, self._predict_fn, item.img) for item in batch
+                )
+            results = await asyncio.gather(*predictions, return_exceptions=True)
+            for item, result in zip(batch, results):
+                if isinstance(result, BaseException):
+                    logs.log_limited(
+                        logger, logging.ERROR, ("batched_prediction", item.session_id),
+                        "❌ Batched prediction error: %s", result, extra={"session": item.session_id},
+                    )
+                elif isinstance(result, dict):
+                    # Stage timings measured where the frame ran (executor thread or worker process)
+                    for stage, seconds in result.pop("timings", {}).items():
+                        metrics.observe(stage, seconds, item.session_id)
+
+            if self._classify_fn is not None:
+                await self._classify(loop, executor, results)
+
+            for item, result in zip(batch, results):
+                if item.future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    item.future.set_result(None)
+                else:
+                    item.future.set_result(result)
+        finally:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_result(None)
+            self._batch_slots.release()
+
+    async def _classify(self, loop, executor, results):
+        """One classifier forward pass for every hand crop in the batch"""
+        with_crop = []
+        for r in results:
+            if isinstance(r, dict):
+                if r.get("hand_crop") is None:
+                    r["probabilities"] = None  # no hand in this frame
+                else:
+                    with_crop.append(r)
+        if not with_crop:
+            return
+
+        try:
+            crops = np.stack([r["hand_crop"] for r in with_crop])
+            started = time.monotonic()
+            probabilities = await loop.run_in_executor(executor, self._classify_fn, crops)
+            metrics.observe("classify", time.monotonic() - started)
+        except Exception as e:
+            logs.log_limited(logger, logging.ERROR, "batched_classification", "❌ Batched classification error: %s", e)
+            return
+        if probabilities is None:
+            return  # classifier not loaded yet
+
+        for r, p in zip(with_crop, probabilities):
+            r["probabilities"] = p
+
+    async def stop(self):
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._runner = None
+        tasks = list(self._batch_tasks)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for session_id in list(self._pending):
+            self.drop_session(session_id)
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+
+import mediapipe as mp
+import numpy as np
+
+from config import LANDMARK_CACHE_DIR, LANDMARK_CACHE_MB
+from constant.main import HAND_CROP_PADDING, HAND_CROP_SIZE, LANDMARK_CACHE_FORMAT
+
+logger = logging.getLogger(__name__)
+
+# Landmark parts and their point shapes, missing parts are stored as NaN rows
+PARTS = {"pose": (33, 4), "face": (468, 3), "left_hand": (21, 3), "right_hand": (21, 3)}
+
+
+def file_hash(path, chunk_size=1024**2):
+    """sha256 of the file's content, renamed or re-uploaded copies share their cache entries"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def extraction_config(tier, fps, max_side):
+    """Everything besides the video that changes what extraction produces"""
+    return {
+        "format": LANDMARK_CACHE_FORMAT,
+        "mediapipe": mp.__version__,
+        "tier": tier,
+        "fps": fps,
+        "max_side": max_side,
+        "crop_size": HAND_CROP_SIZE,
+        "crop_padding": HAND_CROP_PADDING,
+    }
+
+
+class SegmentArrays:
+    """
+    Columnar landmarks of one video segment, one row per sampled frame.
+
+    times (N,) seconds, one (N, points, dims) array per part in PARTS (NaN = not
+    detected), crops (N, HAND_CROP_SIZE, HAND_CROP_SIZE) uint8 hand crops and
+    has_crop (N,) telling which rows have one.
+    """
+
+    def __init__(self):
+        self.times = []
+        self.parts = {part: [] for part in PARTS}
+        self.crops = []
+        self.has_crop = []
+
+    def append(self, t, landmarks, hand_crop):
+        self.times.append(t)
+        for part, shape in PARTS.items():
+            points = landmarks.get(part)
+            self.parts[part].append(np.full(shape, np.nan, np.float32) if points is None else points)
+        self.has_crop.append(hand_crop is not None)
+        self.crops.append(
+            np.zeros((HAND_CROP_SIZE, HAND_CROP_SIZE), np.uint8)
+            if hand_crop is None
+            else np.round(hand_crop * 255).astype(np.uint8)
+        )
+
+    def to_arrays(self):
+        arrays = {
+            "times": np.asarray(self.times, dtype=np.float64),
+            "crops": np.asarray(self.crops, dtype=np.uint8).reshape(-1, HAND_CROP_SIZE, HAND_CROP_SIZE),
+            "has_crop": np.asarray(self.has_crop, dtype=bool),
+        }
+        for part, shape in PARTS.items():
+            arrays[part] = np.asarray(self.parts[part], dtype=np.float32).reshape(-1, *shape)
+        return arrays
+
+
+class LandmarkCache:
+    """
+    On-disk cache of extracted landmarks, one directory of .npy files per video segment.
+
+    Keys combine the video's content hash, the extraction config and the segment,
+    so re-running a corpus with another classifier or threshold never runs MediaPipe
+    again. Entries are read memory-mapped; the least recently used ones are deleted
+    once the cache grows past budget_mb. Several processes may share the directory:
+    entries are written to a temporary directory and renamed into place.
+    """
+
+    def __init__(self, root=LANDMARK_CACHE_DIR, budget_mb=LANDMARK_CACHE_MB):
+        self.root = root
+        self.budget = budget_mb * 1024**2
+        self.enabled = budget_mb > 0
+
+    @staticmethod
+    def key(video_hash, config, start, end):
+        config_hash = hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+        return f"{video_hash[:32]}-{config_hash}-{start:g}-{end:g}"
+
+    def get(self, key):
+        """Memory-mapped arrays of the entry, None on a miss"""
+        if not self.enabled:
+            return None
+        entry = os.path.join(self.root, key)
+        try:
+            arrays = {
+                name: np.load(os.path.join(entry, f"{name}.npy"), mmap_mode="r")
+                for name in ("times", "crops", "has_crop", *PARTS)
+            }
+            os.utime(entry)  # recently used, evicted last
+        except (OSError, ValueError):
+            return None
+        return arrays
+
+    def put(self, key, arrays):
+        if not self.enabled:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        tmp_entry = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp_entry)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_entry, f"{name}.npy"), array)
+            os.rename(tmp_entry, os.path.join(self.root, key))
+        except OSError:
+            # Another process stored the same entry first (or the disk is full)
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits its budget"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith(".tmp-"):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(path))
+                entries.append((os.stat(path).st_mtime, size, path))
+            except OSError:
+                continue  # deleted by another process meanwhile
+            total += size
+
+        entries.sort()
+        evicted = 0
+        while total > self.budget and entries:
+            _, size, path = entries.pop(0)
+            shutil.rmtree(path, ignore_errors=True)  # open memory maps stay valid
+            total -= size
+            evicted += 1
+        if evicted:
+            logger.info("🧹 Landmark cache: evicted %s entries (%.0f MB left)", evicted, total / 1024**2)
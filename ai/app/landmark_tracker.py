@@ -0,0 +1,71 @@
+from constant.main import (
+    LANDMARK_EXTRAPOLATION,
+    MAX_EXTRAPOLATION_MS,
+    MAX_RESULT_AGE_MS,
+)
+
+
+class LandmarkTracker:
+    """
+    Latest inference results of one session, tagged with the time of the frame
+    they were computed from.
+
+    at(t) gives the landmarks to draw on a frame with timestamp t: the newest
+    result, linearly extrapolated from the previous one for at most
+    MAX_EXTRAPOLATION_MS, or None once the newest result is older than
+    MAX_RESULT_AGE_MS (nothing is drawn rather than a stale skeleton).
+    """
+
+    def __init__(self, max_age_ms=MAX_RESULT_AGE_MS, extrapolate=LANDMARK_EXTRAPOLATION):
+        self._max_age = max_age_ms / 1000.0
+        self._extrapolate = extrapolate
+        self._latest = None  # (time, landmarks)
+        self._previous = None
+
+    def update(self, landmarks, t):
+        if self._latest is not None and t <= self._latest[0]:
+            return  # a result for an older frame arrived late
+        self._previous = self._latest
+        self._latest = (t, landmarks)
+
+    def at(self, t):
+        if self._latest is None:
+            return None
+        latest_t, latest = self._latest
+        if abs(t - latest_t) > self._max_age or all(p is None for p in latest.values()):
+            return None  # too old, or nobody detected: the frame goes out untouched
+        if not self._extrapolate or self._previous is None:
+            return latest
+
+        previous_t, previous = self._previous
+        span = latest_t - previous_t
+        if span <= 0 or span > self._max_age:
+            return latest
+        # Negative ratios interpolate back towards the previous result, positive ones extrapolate
+        ahead = min(t - latest_t, MAX_EXTRAPOLATION_MS / 1000.0)
+        ratio = max(ahead / span, -1.0)
+
+        moved = {}
+        for part, points in latest.items():
+            before = previous.get(part)
+            if points is None or before is None or before.shape != points.shape:
+                moved[part] = points
+            else:
+                # Only x, y, z move, the pose visibility column stays as it was
+                moved[part] = points.copy()
+                moved[part][:, :3] += (points[:, :3] - before[:, :3]) * ratio
+        return moved
+
+    def clear(self):
+        self._latest = None
+        self._previous = None
+
+    def nbytes(self):
+        """Memory held by the kept results"""
+        return sum(
+            points.nbytes
+            for result in (self._latest, self._previous)
+            if result is not None
+            for points in result[1].values()
+            if points is not None
+        )
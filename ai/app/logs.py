@@ -0,0 +1,171 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+from config import LOG_FORMAT, LOG_LEVEL, LOG_LEVELS
+from constant.main import LOG_QUEUE_SIZE, LOG_RATE_LIMIT_SECONDS, MAX_RATE_LIMITED_KEYS
+
+# Client the current task works for, tasks started from it inherit it (see set_session);
+# executor threads don't, log from them with extra={"session": ...}
+_session = contextvars.ContextVar("log_session", default=None)
+
+_handler = None
+_listener = None
+
+_limits = {}  # key -> [last emitted at, suppressed since]
+_limits_lock = threading.Lock()
+_suppressed_total = 0
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the writer thread, the caller (often the event loop) never touches
+    stdout. When the writer falls behind and the queue is full, records are dropped and
+    counted instead of blocking.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Only the message and traceback are rendered here, the rest in the writer thread
+        record = copy.copy(record)
+        if not hasattr(record, "session"):
+            record.session = _session.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    def formatMessage(self, record):
+        session = getattr(record, "session", None)
+        if session is not None:
+            record.message = f"[{session}] {record.message}"
+        return super().formatMessage(record)
+
+
+class _JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log collectors"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "session": getattr(record, "session", None),
+            "message": record.getMessage(),
+        }
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _parse_levels(spec):
+    """'aiortc=INFO,video_transform_track=DEBUG' -> {logger: level}"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(stream=None):
+    """
+    Route every record through a bounded queue to one writer thread (idempotent).
+    stream defaults to stdout, where the prints used to go.
+    """
+    global _handler, _listener
+    if _handler is not None:
+        return
+
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(_JsonFormatter() if LOG_FORMAT == "json" else _TextFormatter())
+    _handler = _QueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    _handler.setFormatter(logging.Formatter())
+    _listener = logging.handlers.QueueListener(_handler.queue, writer)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(LOG_LEVEL.upper())
+    # ICE and RTP libraries log every connectivity check, websockets every connection at INFO
+    levels = {"aioice": "WARNING", "aiortc": "WARNING", "websockets": "WARNING", **_parse_levels(LOG_LEVELS)}
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Write out what is still queued and stop the writer thread"""
+    global _handler, _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger().removeHandler(_handler)
+    _handler = None
+    _listener = None
+
+
+def set_session(session_id):
+    """Tag records of the current task (and tasks it starts) with session_id"""
+    _session.set(session_id)
+
+
+def session_logger(logger, session_id):
+    """logger with every record tagged with session_id, for callbacks that run outside the client's task"""
+    return logging.LoggerAdapter(logger, {"session": session_id})
+
+
+def log_limited(logger, level, key, msg, *args, interval=LOG_RATE_LIMIT_SECONDS, **kwargs):
+    """
+    Log at most once per interval for key (per-frame / per-candidate events), the next
+    record that gets through says how many were skipped. Cheap when the level is off.
+    """
+    global _suppressed_total
+    if not logger.isEnabledFor(level):
+        return
+    now = time.monotonic()
+    with _limits_lock:
+        state = _limits.get(key)
+        if state is not None and now - state[0] < interval:
+            state[1] += 1
+            _suppressed_total += 1
+            return
+        suppressed = state[1] if state is not None else 0
+        if state is None and len(_limits) >= MAX_RATE_LIMITED_KEYS:
+            # Keys carry session ids, forget the ones that went quiet
+            for stale in [k for k, (at, _) in _limits.items() if now - at >= interval]:
+                del _limits[stale]
+        _limits[key] = [now, 0]
+    if suppressed:
+        msg = f"{msg} (+{suppressed} similar in the last {interval:.0f}s)"
+    logger.log(level, msg, *args, **kwargs)
+
+
+def get_status():
+    return {
+        "queued": _handler.queue.qsize() if _handler is not None else 0,
+        "dropped": _handler.dropped if _handler is not None else 0,
+        "rate_limited": _suppressed_total,
+    }
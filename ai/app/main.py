@@ -1,74 +1,133 @@
 import asyncio
 import json
-from typing import Dict, List
-
+import logging
+import time
 from helpers.app_analysis import monitoring_task
 import websockets
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from aiortc import (
     RTCPeerConnection,
     RTCSessionDescription,
+    RTCDataChannel,
     MediaStreamTrack,
 )
-from aiortc.contrib.media import MediaRelay
+from aiortc.contrib.media import MediaBlackhole, MediaRelay
 from helpers.utils import add_ice_candidate_safe
-from video_transform_track import VideoTransformTrack,cleanup_global_resources
-from config import SIGNALING_URI, WAIT_FOR_TRACK_SECONDS, RECONNECT_DELAY_SECONDS
+from resource_monitor import get_resource_monitor
+from session_manager import SessionManager
+from signaling_dispatcher import SignalingDispatcher, SignalingSender
+import logs
+import metrics
+import startup
+
+# MediaPipe pulls in all of TensorFlow: modules depending on it (video_transform_track,
+# admission, transcription, helpers.mediapipe_utils) are imported where they are used,
+# startup.load_pipeline() loads them off the event loop before signaling hears of this worker
+from config import (
+    SIGNALING_URI,
+    RECONNECT_DELAY_SECONDS,
+    OUTPUT_MODE,
+    WORKER_ID,
+    WORKER_CAPACITY,
+)
+
+logs.setup_logging()
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
-# Global state
-pcs: Dict[str, RTCPeerConnection] = {}  # clientId -> PeerConnection
-pending_ice: Dict[str, List[dict]] = {}  # clientId -> list of pending ICE candidates
-# Maps clientId -> asyncio.Future used to wait for first remote track
-track_waiters: Dict[str, asyncio.Future] = {}
+# Signaling connection currently up, None while reconnecting
+current_signaling = None
+
+
+def _session_reaped(client_id, reason):
+    """A session ended without a close message (failed connection, browser gone)"""
+    if current_signaling is not None:
+        current_signaling.send_nowait(_load_message())
+
+
+# Global state: every client's peer connection, track, data channel and buffered ICE
+sessions = SessionManager(on_closed=_session_reaped)
+
+def send_ice_candidate(signaling: SignalingSender, client_id: str, candidate_dict):
+    """Queue an ICE candidate for Spring WebSocket."""
+    out = {"type": "ice", "to": client_id, "candidate": candidate_dict}
+    signaling.send_nowait(out)
+    logs.log_limited(
+        logger, logging.DEBUG, ("ice_queued", client_id), "📤 ICE candidate queued: %s", candidate_dict,
+        extra={"session": client_id},
+    )
 
-async def send_ice_candidate(ws, client_id: str, candidate_dict):
-    """Send ICE candidate to Spring WebSocket."""
-    try:
-        out = {"type": "ice", "to": client_id, "candidate": candidate_dict}
-        await ws.send(json.dumps(out))
-        print(f"[{client_id}] 📤 ICE candidate sent: {candidate_dict}")
-    except Exception as e:
-        print(f"[{client_id}] ❌ Failed to send ICE candidate: {e}")
 
+def publish_result(client_id: str, result: dict, pts):
+    """Send an inference result to the browser over its data channel (if open)."""
+    from helpers.mediapipe_utils import landmarks_to_message
 
-async def handle_offer(ws, msg):
+    session = sessions.get(client_id)
+    channel = session.data_channel if session is not None else None
+    if channel is None or channel.readyState != "open":
+        return
+    channel.send(json.dumps(landmarks_to_message(result["landmarks"], pts)))
+
+    sign = result.get("sign")
+    if sign:
+        channel.send(json.dumps({"type": "sign", "pts": pts, **sign}))
+        logger.info(
+            "🤟 Sign recognized: %s (%s)", sign["label"], sign["confidence"], extra={"session": client_id}
+        )
+
+
+async def handle_offer(signaling: SignalingSender, msg):
     """
     Handle incoming 'offer' message forwarded by Spring.
     Expect msg to include 'from' (clientId) and 'sdp' (object or string).
     """
+    from admission import DEGRADED, REJECT, get_admission_controller
+    from video_transform_track import VideoTransformTrack
+
     client_id = msg.get("from")
     if not client_id:
-        print("offer without 'from' -> ignoring")
+        logger.warning("offer without 'from' -> ignoring")
+        return
+    # aiortc runs the callbacks below from its own tasks, their records are tagged explicitly
+    log = logs.session_logger(logger, client_id)
+
+    # Load shedding: a renegotiating client gives its old session up, so it is not counted
+    active_sessions = len(sessions) - (1 if client_id in sessions else 0)
+    decision = get_admission_controller().decide(active_sessions)
+    if decision.mode == REJECT:
+        out = {"type": "reject", "to": client_id, **decision.to_message()}
+        await signaling.send(out)
+        sessions.drop_pending_ice(client_id)
+        log.warning("🚫 Offer rejected (%s): %s", decision.reason, decision.stats)
         return
+    if decision.mode == DEGRADED:
+        log.warning("⚠️ Admitting degraded (%s): %s", decision.reason, decision.stats)
 
+    # Candidates that arrived before the offer belong to it, closing the old session would drop them
+    pending_ice = sessions.take_pending_ice(client_id)
     # Clean up existing pc for client if present
-    if client_id in pcs:
-        old_pc = pcs[client_id]
-        await closeTracks(old_pc, client_id)
-
-        pcs.pop(client_id, None)
-        track_waiters.pop(client_id, None)
-        pending_ice.pop(client_id, None)
+    await sessions.close(client_id, "renegotiation")
 
     pc = RTCPeerConnection()
-    pcs[client_id] = pc
-
-    # Future to wait for first remote track (so we can add relay-subscription as local track)
-    loop = asyncio.get_running_loop()
-    waiter: asyncio.Future = loop.create_future()
-    track_waiters[client_id] = waiter
+    # Output track exists before the remote one, its source is bound in on_track
+    processed_track = VideoTransformTrack(
+        session_id=client_id,
+        on_result=publish_result,
+        degraded=decision.mode == DEGRADED,
+    )
+    session = sessions.add(client_id, pc, processed_track)
 
     @pc.on("icecandidate")
     def on_icecandidate(candidate):  # ✅ sync function
         """Handle local ICE candidates generated by aiortc."""
-        print(f"[{client_id}] 🧊 Local ICE candidate generated: {candidate}")
+        logs.log_limited(log, logging.DEBUG, ("ice_local", client_id), "🧊 Local ICE candidate generated: %s", candidate)
 
         if candidate is None:
             # End of candidates
-            print(f"[{client_id}] 🏁 ICE gathering complete")
-            asyncio.create_task(send_ice_candidate(ws, client_id, None))
+            log.debug("🏁 ICE gathering complete")
+            send_ice_candidate(signaling, client_id, None)
         else:
             # Send candidate to Spring
             candidate_dict = {
@@ -76,17 +135,23 @@ async def handle_offer(ws, msg):
                 "sdpMid": candidate.sdpMid,
                 "sdpMLineIndex": candidate.sdpMLineIndex,
             }
-            asyncio.create_task(send_ice_candidate(ws, client_id, candidate_dict))
+            send_ice_candidate(signaling, client_id, candidate_dict)
+
+    @pc.on("datachannel")
+    def on_datachannel(channel: RTCDataChannel):
+        log.info("data channel opened: %s", channel.label)
+        session.data_channel = channel
 
     @pc.on("track")
     def on_track(track: MediaStreamTrack):
-        # fulfill waiter with the first remote track
-        print(f"[{client_id}] remote track received: kind={track.kind}")
-        w = track_waiters.get(client_id)
-        if w and not w.done():
-            w.set_result(track)
-        # optional: spawn background task to read frames
-        # asyncio.create_task(read_frames(client_id, track))
+        # Fires during setRemoteDescription, once per remote track of the offer
+        log.info("remote track received: kind=%s", track.kind)
+        if track.kind == "video":
+            processed_track.bind(track)
+        # used when no modification is needed
+        # relay = MediaRelay()
+        # relayed = relay.subscribe(track)
+        # pc.addTrack(relayed)
 
     # parse sdp
     sdp_obj = msg.get("sdp")
@@ -98,39 +163,39 @@ async def handle_offer(ws, msg):
         sdp_text = sdp_obj
 
     offer = RTCSessionDescription(sdp=sdp_text, type=sdp_type)
-    await pc.setRemoteDescription(offer)
-
-    # Wait for incoming track a short time so we can echo it back
-    track = None
     try:
-        track = await asyncio.wait_for(waiter, timeout=WAIT_FOR_TRACK_SECONDS)
-    except asyncio.TimeoutError:
-        # no remote track arrived in time -> proceed without echo
-        print(
-            f"[{client_id}] timeout waiting for remote track, will answer without echo"
-        )
+        await pc.setRemoteDescription(offer)
+    except BaseException:
+        # Bad offer, or cancelled by a close: nothing else holds the session
+        await sessions.close(client_id, "offer failed")
+        raise
 
-    if track:
-        try:
-            # here can make manipulation on the track
-            processed_track = VideoTransformTrack(track)
+    try:
+        if not any(t.kind == "video" for t in pc.getTransceivers()):
+            log.info("offer has no video, answering without echo")
+            await processed_track._stopVideoTransformTrack()
+            session.track = None
+        elif OUTPUT_MODE == "data":
+            # Nothing is sent back, still pull frames so inference keeps running
+            sink = MediaBlackhole()
+            sink.addTrack(processed_track)
+            await sink.start()
+            session.sink = sink
+        else:
+            # Attaches to the offer's video transceiver, frames flow once the source is bound
             pc.addTrack(processed_track)
-            # used when no modification is needed
-            # relay = MediaRelay()
-            # relayed = relay.subscribe(track)
-            # pc.addTrack(relayed)
-            print(f"[{client_id}] added relayed local track (echo)")
-        except Exception as e:
-            print(f"[{client_id}] error adding relayed track: {e}")
-            # traceback.print_exc()
+        log.info("added processed local track (echo)")
+    except Exception as e:
+        log.error("error adding processed track: %s", e)
+        # traceback.print_exc()
 
-    # Flush any pending ICE candidates
-    pending = pending_ice.pop(client_id, [])
-    for cand_dict in pending:
+    # Candidates that arrived before the offer or while it was set up, later ones are added
+    # right away (handle_ice)
+    for cand_dict in pending_ice + sessions.take_pending_ice(client_id):
         try:
             await add_ice_candidate_safe(pc, client_id, cand_dict)
         except Exception as e:
-            print(f"[{client_id}] addIceCandidate (pending) failed: {e}")
+            log.warning("addIceCandidate (pending) failed: %s", e)
 
     # create and send answer
     answer = await pc.createAnswer()
@@ -140,9 +205,10 @@ async def handle_offer(ws, msg):
         "type": "answer",
         "to": client_id,
         "sdp": {"type": pc.localDescription.type, "sdp": pc.localDescription.sdp},
+        "admission": decision.to_message(),
     }
-    await ws.send(json.dumps(out))
-    print(f"[{client_id}] answer sent")
+    await signaling.send(out)
+    log.info("answer sent")
 
 
 async def handle_ice(msg):
@@ -151,26 +217,33 @@ async def handle_ice(msg):
     cand_dict = msg.get("candidate")
 
     if not client_id:
-        print("❌ ICE message without 'from', ignoring")
+        logs.log_limited(logger, logging.WARNING, "ice_without_from", "❌ ICE message without 'from', ignoring")
         return
 
     if not cand_dict:
-        print(f"[{client_id}] 🏁 Received end-of-candidates signal")
+        logger.debug("🏁 Received end-of-candidates signal", extra={"session": client_id})
         return
 
     # print(f"[{client_id}] 🧊 Received ICE candidate: {cand_dict}")
 
-    pc = pcs.get(client_id)
-    if not pc:
-        print(f"[{client_id}] ❌ No peer connection found, buffering candidate")
-        pending_ice.setdefault(client_id, []).append(cand_dict)
+    session = sessions.get(client_id)
+    if session is None:
+        logs.log_limited(
+            logger, logging.DEBUG, ("ice_buffered", client_id), "❌ No peer connection found, buffering candidate",
+            extra={"session": client_id},
+        )
+        sessions.buffer_ice(client_id, cand_dict)
         return
 
+    pc = session.pc
     if pc.remoteDescription and pc.remoteDescription.type:
         await add_ice_candidate_safe(pc, client_id, cand_dict)
     else:
-        print(f"[{client_id}] 📦 Buffering ICE candidate (no remote description)")
-        pending_ice.setdefault(client_id, []).append(cand_dict)
+        logs.log_limited(
+            logger, logging.DEBUG, ("ice_buffered", client_id), "📦 Buffering ICE candidate (no remote description)",
+            extra={"session": client_id},
+        )
+        sessions.buffer_ice(client_id, cand_dict)
 
 
 async def handle_close(msg):
@@ -182,39 +255,48 @@ async def handle_close(msg):
     if not client_id:
         return
 
-    pc = pcs.pop(client_id, None)
-    await closeTracks(pc, client_id)
-
-    pending_ice.pop(client_id, None)
-    track_waiters.pop(client_id, None)
-    print(f"[{client_id}] cleaned up")
-
-
-async def closeTracks(pc, client_id):
-    if pc:
-        # stop all tracks
-        for sender in pc.getSenders():
-            track = sender.track
-            # print(f"[{client_id}] 🔍 Track debug:")
-            # print(f"  - track: {track}")
-            # print(f"  - type: {type(track)}")
-            # print(f"  - class name: {track.__class__.__name__}")
-            # print(f"  - module: {track.__class__.__module__}")
-            # print(
-            #     f"  - isinstance VideoTransformTrack: {isinstance(track, VideoTransformTrack)}"
-            # )
-            # print(f"  - VideoTransformTrack class: {VideoTransformTrack}")
-            if isinstance(track, VideoTransformTrack):
-                try:
-                    # print("before closing track")
-                    await track._stopVideoTransformTrack()  # <- stops executor and tasks
-                    # print("after closing track")
-                except Exception as e:
-                    print(f"[{client_id}] error stopping track: {e}")
-        try:
-            await pc.close()
-        except Exception as e:
-            print(f"[{client_id}] error closing pc: {e}")
+    await sessions.close(client_id)
+
+
+async def register_worker(signaling: SignalingSender):
+    """
+    Announce this worker to signaling. Sessions it still holds are listed so that
+    after a reconnect their ice/close messages are routed back here.
+    """
+    out = {
+        "type": "register",
+        "worker": WORKER_ID,
+        "capacity": WORKER_CAPACITY,
+        "sessions": sessions.client_ids(),
+    }
+    await signaling.send(out)
+    logger.info("🆔 Registered as worker %s (capacity %s, %s sessions)", WORKER_ID, WORKER_CAPACITY, len(sessions))
+
+
+def _load_message():
+    return {"type": "load", "worker": WORKER_ID, "sessions": len(sessions)}
+
+
+async def report_load(signaling: SignalingSender):
+    """Session count for signaling, new offers go to the least loaded worker"""
+    await signaling.send(_load_message())
+
+
+async def handle_signaling_message(signaling: SignalingSender, msg):
+    """Run one message of a client, called from the client's queue in SignalingDispatcher"""
+    mtype = msg.get("type")
+    started = time.perf_counter()
+
+    if mtype == "offer":
+        await handle_offer(signaling, msg)
+        metrics.observe("signaling_offer", time.perf_counter() - started)
+        await report_load(signaling)
+    elif mtype == "ice":
+        await handle_ice(msg)
+        metrics.observe("signaling_ice", time.perf_counter() - started)
+    elif mtype == "close":
+        await handle_close(msg)
+        await report_load(signaling)
 
 
 # add to spring boot on websocket send event to close !!!
@@ -223,49 +305,182 @@ async def signaling_client_loop():
     Connect to Spring WebSocket and respond to messages forwarded from JS clients.
     Reconnects on error with a delay.
     """
+    global current_signaling
     while True:
         try:
             async with websockets.connect(SIGNALING_URI) as ws:
-                print("Connected to signaling:", SIGNALING_URI)
-                async for message in ws:
-                    try:
-                        msg = json.loads(message)
-                    except Exception:
-                        print("Received non-JSON message:", message)
-                        continue
-
-                    mtype = msg.get("type")
-
-                    if mtype == "offer":
-                        await handle_offer(ws, msg)
-                    elif mtype == "ice":
-                        await handle_ice(msg)
-                    elif mtype == "close":
-                        await handle_close(msg)
-                    else:
-                        print("Unknown message type:", mtype, "payload:", msg)
+                logger.info("Connected to signaling: %s", SIGNALING_URI)
+                signaling = SignalingSender(ws)
+                dispatcher = SignalingDispatcher(lambda msg: handle_signaling_message(signaling, msg))
+                try:
+                    await register_worker(signaling)
+                    current_signaling = signaling
+                    startup.mark_ready("signaling")
+                    async for message in ws:
+                        try:
+                            msg = json.loads(message)
+                        except Exception:
+                            logs.log_limited(
+                                logger, logging.WARNING, "signaling_non_json", "Received non-JSON message: %s", message
+                            )
+                            continue
+
+                        if msg.get("type") in ("offer", "ice", "close"):
+                            dispatcher.dispatch(msg)
+                        else:
+                            logs.log_limited(
+                                logger, logging.WARNING, ("signaling_unknown", msg.get("type")),
+                                "Unknown message type: %s payload: %s", msg.get("type"), msg,
+                            )
+                finally:
+                    current_signaling = None
+                    startup.mark_not_ready("signaling")
+                    await dispatcher.stop()
+                    await signaling.close()
         except Exception as e:
-            print("Signaling connection error:", e)
-            print("Reconnecting in", RECONNECT_DELAY_SECONDS, "s...")
+            logger.error("Signaling connection error: %s", e)
+            logger.info("Reconnecting in %s s...", RECONNECT_DELAY_SECONDS)
             await asyncio.sleep(RECONNECT_DELAY_SECONDS)
 
 
+async def warm_up():
+    """
+    Staged startup: the app answers "/" right away, models load in the background and
+    signaling only learns about this worker (register) once they are warm.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(None, startup.load_pipeline)
+    except Exception:
+        return  # logged by load_pipeline, "/ready" keeps failing
+    # Picks up transcription jobs that were cut short by a restart
+    from transcription import get_transcription_jobs
+
+    get_transcription_jobs().start()
+    # Frames are only classified once the classifier is ready
+    await loop.run_in_executor(None, startup.load_classifier)
+    asyncio.create_task(signaling_client_loop())
+
+
 @app.on_event("startup")
 async def startup_event():
-    asyncio.create_task(signaling_client_loop())
+    asyncio.create_task(warm_up())
     # asyncio.create_task(monitoring_task())  # Add monitoring task
 
 
-# @app.on_event("shutdown")
-# async def shutdown_event():
+@app.on_event("shutdown")
+async def shutdown_event():
+    await sessions.close_all()
     # CLEANUP GLOBAL RESOURCES
     # cleanup_global_resources()
 
 @app.get("/")
 async def check_status():
+    """Liveness: the process is up, models may still be loading"""
     return "Working"
 
 
+@app.get("/ready")
+async def check_ready():
+    """Readiness: models warm and registered with signaling, 503 until then"""
+    status = startup.get_status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/metrics")
+async def get_metrics():
+    gauges = {
+        "ready": int(startup.is_ready()),
+        "sessions": len(sessions),
+        **get_resource_monitor().snapshot(),
+        **{f"log_{name}": value for name, value in logs.get_status().items()},
+    }
+    session_status = sessions.get_status()
+    gauges.update(
+        {
+            "session_bytes": session_status["bytes"],
+            "sessions_reaped": session_status["reaped"],
+            "pending_ice_clients": session_status["pending_ice_clients"],
+            "pending_ice_candidates": session_status["pending_ice_candidates"],
+        }
+    )
+    if startup.is_ready("pipeline"):
+        from video_transform_track import get_inference_scheduler, get_pool_status
+
+        pool = get_pool_status()
+        scheduler = get_inference_scheduler().get_status()
+        gauges.update(
+            {
+                "pool_in_use": pool.get("in_use", 0),
+                "pool_total": pool["total"],
+                "pool_waiting": pool.get("waiting", 0),
+                "scheduler_pending_sessions": scheduler["pending_sessions"],
+                "scheduler_batches_in_flight": scheduler["batches_in_flight"],
+            }
+        )
+    return PlainTextResponse(metrics.render(gauges), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/sessions")
+async def get_sessions():
+    """Live sessions with their connection state, idle time and bytes held"""
+    return sessions.get_status()
+
+
+def _transcription_jobs():
+    """Transcription needs the MediaPipe modules, 503 while they are still loading"""
+    if not startup.is_ready("pipeline"):
+        raise HTTPException(status_code=503, detail="worker is starting")
+    from transcription import get_transcription_jobs
+
+    return get_transcription_jobs()
+
+
+@app.post("/transcriptions", status_code=202)
+async def create_transcription(request: Request, filename: str = None):
+    """
+    Queue an offline transcription: either the video itself as the request body
+    (?filename=clip.mp4 keeps its extension), or {"path": ...} naming a file
+    inside TRANSCRIPTION_INPUT_DIR.
+    """
+    jobs = _transcription_jobs()
+    if request.headers.get("content-type", "").startswith("application/json"):
+        payload = await request.json()
+        if not isinstance(payload, dict) or not payload.get("path"):
+            raise HTTPException(status_code=400, detail="expected {\"path\": ...}")
+        try:
+            return jobs.submit_path(payload["path"])
+        except PermissionError as e:
+            raise HTTPException(status_code=403, detail=str(e))
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="file not found")
+    try:
+        return await jobs.submit_upload(request.stream(), filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/transcriptions/{job_id}")
+async def get_transcription(job_id: str):
+    job = _transcription_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown job")
+    return job
+
+
+@app.get("/transcriptions/{job_id}/result")
+async def get_transcription_result(job_id: str):
+    from transcription import DONE
+
+    jobs = _transcription_jobs()
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown job")
+    if job["status"] != DONE:
+        raise HTTPException(status_code=409, detail=f"job is {job['status']}")
+    return FileResponse(jobs.result_path(job_id), media_type="application/json")
+
+
 @app.post("/generateFromText")
 async def generate_from_text(payload: dict):
     return "To do"
@@ -0,0 +1,295 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from constant.main import (
+    IDLE_INSTANCE_TIMEOUT_SECONDS,
+    MAX_MEDIAPIPE_INSTANCES,
+    MIN_MEDIAPIPE_INSTANCES,
+    POOL_GROWTH_RETRY_SECONDS,
+    POOL_MAINTENANCE_INTERVAL_SECONDS,
+    WARM_SPARE_INSTANCES,
+)
+from helpers.mediapipe_utils import create_landmark_model
+from resource_monitor import get_resource_monitor
+from session_affinity import SessionAffinity
+
+logger = logging.getLogger(__name__)
+
+
+def _close_instance(instance):
+    try:
+        instance.close()
+    except Exception as e:
+        logger.warning("⚠️ Error closing MediaPipe instance: %s", e)
+
+
+class MediaPipePool:
+    """
+    Elastic pool of MediaPipe landmark models, kept per landmark tier.
+
+    acquire() never blocks a thread: without an idle instance of the tier the
+    caller awaits either a released one or a new one created in the background,
+    as long as the pool is below max_size and the ResourceMonitor has memory to
+    spare (at max_size an idle instance of another tier is replaced).
+    warm_spares idle instances of a tier in use are created ahead of demand,
+    idle instances above min_size are closed after idle_timeout.
+    Instances stick to sessions (see SessionAffinity), spares are instances
+    nobody owns.
+
+    The bookkeeping runs on the event loop, only creating and closing models
+    happens on threads.
+    """
+
+    def __init__(
+        self,
+        factory=create_landmark_model,
+        min_size=MIN_MEDIAPIPE_INSTANCES,
+        max_size=MAX_MEDIAPIPE_INSTANCES,
+        warm_spares=WARM_SPARE_INSTANCES,
+        idle_timeout=IDLE_INSTANCE_TIMEOUT_SECONDS,
+        monitor=None,
+    ):
+        self._factory = factory
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size)
+        self.warm_spares = warm_spares
+        self.idle_timeout = idle_timeout
+        self._monitor = monitor or get_resource_monitor()
+        self._monitor.max_instances = self.max_size
+        self._idle = {}  # tier -> deque of (instance, released_at), most recently released last
+        self._busy = {}  # tier -> instances handed out
+        self._creating = {}  # tier -> instances being created
+        self._waiters = deque()  # (tier, session_id, future) in arrival order
+        self._affinity = SessionAffinity()
+        self._growth_blocked_until = 0.0
+        self._maintenance = None
+        self._closed = False
+        self.created = 0
+        self.reclaimed = 0
+
+    def prewarm(self, tier, count):
+        """Create up to count idle instances of the tier right away (blocking, for startup)"""
+        for i in range(count):
+            if self.size() + self._total_creating() >= self.max_size:
+                break
+            if not self._monitor.can_create_instance():
+                break
+            try:
+                instance = self._factory(tier)
+            except Exception as e:
+                logger.error("❌ Failed to create MediaPipe %s instance %s: %s", tier, i + 1, e)
+                break
+            self._monitor.instance_created()
+            self.created += 1
+            self._idle.setdefault(tier, deque()).append((instance, time.monotonic()))
+            logger.info("✅ Created MediaPipe %s instance %s/%s", tier, i + 1, count)
+
+    async def acquire(self, tier, session_id=None):
+        """
+        Wait for an instance of the tier for the session's frame, release() it when done.
+
+        Returns (instance, reset): reset means the instance last ran another session's
+        frame and its graph has to be reset before use.
+        """
+        self._ensure_maintenance()
+        idle = self._idle.get(tier)
+        index = self._affinity.pick([instance for instance, _ in idle], session_id) if idle else None
+        if index is not None:
+            instance, _ = idle[index]
+            del idle[index]
+            acquired = self._hand_out(instance, tier, session_id)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            waiter = (tier, session_id, future)
+            self._waiters.append(waiter)
+            self._grow(tier)
+            try:
+                acquired = await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self.release(future.result()[0], tier)  # handed over just as the caller gave up
+                else:
+                    try:
+                        self._waiters.remove(waiter)
+                    except ValueError:
+                        pass
+                raise
+        self._add_spares(tier)
+        return acquired
+
+    def drop_session(self, session_id):
+        """The session ended, its instance becomes a spare for the next session"""
+        self._affinity.drop_session(session_id)
+
+    def release(self, instance, tier):
+        self._busy[tier] = max(self._busy.get(tier, 0) - 1, 0)
+        if self._closed:
+            self._discard(instance)
+            return
+        self._put_back(instance, tier)
+        if self._waiters:
+            # Someone waits for another tier, this instance may have to make room for it
+            self._grow(self._waiters[0][0])
+
+    def size(self):
+        return sum(len(idle) for idle in self._idle.values()) + sum(self._busy.values())
+
+    def get_status(self):
+        tiers = set(self._idle) | set(self._busy) | set(self._creating)
+        available = sum(len(idle) for idle in self._idle.values())
+        return {
+            "available": available,
+            "total": self.size(),
+            "initialized": True,
+            "in_use": sum(self._busy.values()),
+            "min": self.min_size,
+            "max": self.max_size,
+            "creating": self._total_creating(),
+            "waiting": len(self._waiters),
+            "created": self.created,
+            "reclaimed": self.reclaimed,
+            **self._affinity.get_status(),
+            "tiers": {
+                tier: {
+                    "available": len(self._idle.get(tier, ())),
+                    "in_use": self._busy.get(tier, 0),
+                }
+                for tier in sorted(tiers)
+            },
+        }
+
+    def close(self):
+        """Close idle instances now, busy ones when they are released"""
+        self._closed = True
+        if self._maintenance is not None:
+            self._maintenance.cancel()
+            self._maintenance = None
+        count = 0
+        for idle in self._idle.values():
+            while idle:
+                instance, _ = idle.popleft()
+                self._affinity.forget(instance)
+                self._monitor.instance_destroyed()
+                _close_instance(instance)
+                count += 1
+        for _, _, future in self._waiters:
+            if not future.done():
+                future.cancel()
+        self._waiters.clear()
+        return count
+
+    def _hand_out(self, instance, tier, session_id):
+        self._busy[tier] = self._busy.get(tier, 0) + 1
+        return instance, self._affinity.use(instance, session_id)
+
+    def _put_back(self, instance, tier):
+        for i, (waiting_tier, session_id, future) in enumerate(self._waiters):
+            if (
+                waiting_tier == tier
+                and not future.done()
+                and self._affinity.accepts(instance, session_id)
+            ):
+                del self._waiters[i]
+                future.set_result(self._hand_out(instance, tier, session_id))
+                return
+        self._idle.setdefault(tier, deque()).append((instance, time.monotonic()))
+
+    def _waiting(self, tier):
+        """Waiters of the tier that any instance would do for (not waiting on their own busy one)"""
+        return sum(
+            1
+            for waiting_tier, session_id, _ in self._waiters
+            if waiting_tier == tier and self._affinity.owned_by(session_id) is None
+        )
+
+    def _total_creating(self):
+        return sum(self._creating.values())
+
+    def _grow(self, tier):
+        """Create an instance for the tier's waiters unless enough are on the way"""
+        if self._creating.get(tier, 0) >= self._waiting(tier):
+            return
+        if self.size() + self._total_creating() >= self.max_size and not self._evict_idle(tier):
+            return  # everything is busy, the waiter gets the next released instance
+        if self._can_grow():
+            self._create(tier)
+
+    def _add_spares(self, tier):
+        spares_on_the_way = max(self._creating.get(tier, 0) - self._waiting(tier), 0)
+        spares = sum(
+            1 for instance, _ in self._idle.get(tier, ()) if not self._affinity.is_owned(instance)
+        )
+        missing = self.warm_spares - spares - spares_on_the_way
+        for _ in range(missing):
+            if self.size() + self._total_creating() >= self.max_size or not self._can_grow():
+                break
+            self._create(tier)
+
+    def _can_grow(self):
+        now = time.monotonic()
+        if now < self._growth_blocked_until:
+            return False
+        if not self._monitor.can_create_instance():
+            # Re-checked (and logged) at most every POOL_GROWTH_RETRY_SECONDS
+            self._growth_blocked_until = now + POOL_GROWTH_RETRY_SECONDS
+            return False
+        return True
+
+    def _create(self, tier):
+        self._creating[tier] = self._creating.get(tier, 0) + 1
+        future = asyncio.get_running_loop().run_in_executor(None, self._factory, tier)
+        future.add_done_callback(lambda f: self._created(tier, f))
+
+    def _created(self, tier, future):
+        self._creating[tier] -= 1
+        if future.cancelled() or future.exception() is not None:
+            logger.error(
+                "❌ Failed to create MediaPipe %s instance: %s", tier, None if future.cancelled() else future.exception()
+            )
+            return
+        instance = future.result()
+        self._monitor.instance_created()
+        self.created += 1
+        if self._closed:
+            self._discard(instance)
+            return
+        self._put_back(instance, tier)
+
+    def _evict_idle(self, tier):
+        """Close the longest idle instance of another tier, False if there is none"""
+        oldest = None
+        for other, idle in self._idle.items():
+            if other != tier and idle and (oldest is None or idle[0][1] < self._idle[oldest][0][1]):
+                oldest = other
+        if oldest is None:
+            return False
+        instance, _ = self._idle[oldest].popleft()
+        self._discard(instance)
+        return True
+
+    def _discard(self, instance):
+        self._affinity.forget(instance)
+        self._monitor.instance_destroyed()
+        try:
+            asyncio.get_running_loop().run_in_executor(None, _close_instance, instance)
+        except RuntimeError:
+            _close_instance(instance)  # no event loop (shutdown)
+
+    def _ensure_maintenance(self):
+        if self._maintenance is None or self._maintenance.done():
+            self._maintenance = asyncio.create_task(self._maintain())
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(POOL_MAINTENANCE_INTERVAL_SECONDS)
+            self._reclaim(time.monotonic())
+
+    def _reclaim(self, now):
+        for tier, idle in self._idle.items():
+            while idle and self.size() > self.min_size and now - idle[0][1] > self.idle_timeout:
+                instance, _ = idle.popleft()
+                self._discard(instance)
+                self.reclaimed += 1
+                logger.info("♻️ Reclaimed idle MediaPipe %s instance (%s left)", tier, self.size())
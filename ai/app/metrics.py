@@ -0,0 +1,132 @@
+import threading
+from bisect import bisect_left
+
+from constant.main import LATENCY_BUCKETS_SECONDS
+
+# Stages of the per-frame path, in pipeline order
+STAGES = (
+    "decode",  # decoded frame -> scaled rgb24 model input / nv12 overlay array
+    "scheduler_wait",  # submit until the frame's batch is dispatched
+    "pool_wait",  # waiting for a free MediaPipe instance / worker process
+    "mediapipe",  # model.process
+    "draw",  # landmarks drawn into the outgoing frame
+    "classify",  # one classifier pass for the whole batch (global only)
+    "inference",  # submit until the result is back, end to end
+    "encode",  # output VideoFrame built from the annotated array
+    # Signaling stages are only kept globally: rejected offers, ICE-only clients and late
+    # messages have no session that would drop their per-session series again
+    "signaling_wait",  # message received until its client's queue gets to it
+    "signaling_offer",  # handle_offer
+    "signaling_ice",  # handle_ice
+)
+
+_lock = threading.Lock()
+_global = {}  # stage -> Histogram
+_sessions = {}  # session id -> {stage -> Histogram}
+
+
+class Histogram:
+    """Fixed-bucket latency histogram, counts per bucket are kept non-cumulative"""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_SECONDS) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(LATENCY_BUCKETS_SECONDS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile (None when empty or past the last bucket)"""
+        if self.count == 0:
+            return None
+        rank = q / 100 * self.count
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS_SECONDS, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return None
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip((*LATENCY_BUCKETS_SECONDS, "+Inf"), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+def observe(stage, seconds, session_id=None):
+    """Record one stage duration globally and, when given, for the session (safe from any thread)"""
+    with _lock:
+        histogram = _global.get(stage)
+        if histogram is None:
+            histogram = _global[stage] = Histogram()
+        histogram.observe(seconds)
+
+        if session_id is not None:
+            per_session = _sessions.setdefault(session_id, {})
+            histogram = per_session.get(stage)
+            if histogram is None:
+                histogram = per_session[stage] = Histogram()
+            histogram.observe(seconds)
+
+
+def drop_session(session_id):
+    """Session histograms go away with the session, the global ones keep its samples"""
+    with _lock:
+        _sessions.pop(session_id, None)
+
+
+def snapshot():
+    """Global histograms summarised as {stage: {count, mean_ms, p50_ms, p90_ms, p99_ms}}"""
+    def ms(seconds):
+        return None if seconds is None else round(seconds * 1000, 3)
+
+    with _lock:
+        return {
+            stage: {
+                "count": h.count,
+                "mean_ms": ms(h.sum / h.count) if h.count else None,
+                "p50_ms": ms(h.percentile(50)),
+                "p90_ms": ms(h.percentile(90)),
+                "p99_ms": ms(h.percentile(99)),
+            }
+            for stage, h in _global.items()
+        }
+
+
+def reset():
+    with _lock:
+        _global.clear()
+        _sessions.clear()
+
+
+def render(gauges=None):
+    """Prometheus text exposition of all histograms plus the given {name: value} gauges"""
+    lines = []
+    for name, value in (gauges or {}).items():
+        lines.append(f"# TYPE signaro_{name} gauge")
+        lines.append(f"signaro_{name} {value}")
+
+    with _lock:
+        lines.append("# HELP signaro_stage_seconds Per-frame pipeline stage latency, all sessions")
+        lines.append("# TYPE signaro_stage_seconds histogram")
+        for stage, histogram in _global.items():
+            lines.extend(histogram.lines("signaro_stage_seconds", f'stage="{stage}"'))
+
+        lines.append("# HELP signaro_session_stage_seconds Per-frame pipeline stage latency per live session")
+        lines.append("# TYPE signaro_session_stage_seconds histogram")
+        for session_id, stages in _sessions.items():
+            for stage, histogram in stages.items():
+                lines.extend(
+                    histogram.lines(
+                        "signaro_session_stage_seconds", f'session="{session_id}",stage="{stage}"'
+                    )
+                )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,206 @@
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from constant.main import DEGRADED_OVERLAY_DETAIL, OVERLAY_DETAIL_LEVELS, OVERLOADED_OVERLAY_DETAIL
+from helpers.mediapipe_utils import mp_face_mesh, mp_holistic
+
+# Look of each part, as the mp_drawing specs used to draw it:
+# (landmark color, landmark thickness, circle radius, connection color, connection thickness)
+_PART_STYLES = {
+    "face": ((80, 110, 10), 1, 1, (80, 256, 121), 1),
+    "pose": ((80, 22, 10), 2, 4, (80, 44, 121), 2),
+    "left_hand": ((121, 22, 76), 2, 4, (121, 44, 250), 2),
+    "right_hand": ((245, 117, 66), 2, 4, (245, 66, 230), 2),
+}
+_BORDER_COLOR = (224, 224, 224)  # outline mp_drawing puts around every landmark
+_VISIBILITY_THRESHOLD = 0.5  # same cut-off mp_drawing applies to pose landmarks
+
+# Level of detail: per part the connections drawn and whether its landmarks get circles,
+# parts missing from a level are not drawn. Hands carry the signs and stay complete.
+_LEVELS = {
+    "full": {
+        "face": (mp_face_mesh.FACEMESH_TESSELATION, True),
+        "pose": (mp_holistic.POSE_CONNECTIONS, True),
+        "left_hand": (mp_holistic.HAND_CONNECTIONS, True),
+        "right_hand": (mp_holistic.HAND_CONNECTIONS, True),
+    },
+    "contours": {
+        "face": (mp_face_mesh.FACEMESH_CONTOURS, False),
+        "pose": (mp_holistic.POSE_CONNECTIONS, True),
+        "left_hand": (mp_holistic.HAND_CONNECTIONS, True),
+        "right_hand": (mp_holistic.HAND_CONNECTIONS, True),
+    },
+    "minimal": {
+        "pose": (mp_holistic.POSE_CONNECTIONS, False),
+        "left_hand": (mp_holistic.HAND_CONNECTIONS, True),
+        "right_hand": (mp_holistic.HAND_CONNECTIONS, True),
+    },
+}
+OVERLAY_LEVELS = tuple(_LEVELS)
+
+
+def choose_overlay_detail(load, degraded=False):
+    """Overlay level for the current inference load, degraded sessions get at most the capped one"""
+    level = OVERLOADED_OVERLAY_DETAIL
+    for candidate, ceiling in OVERLAY_DETAIL_LEVELS:
+        if load < ceiling:
+            level = candidate
+            break
+    if degraded:
+        # Levels are ordered most detailed first
+        level = OVERLAY_LEVELS[max(OVERLAY_LEVELS.index(level), OVERLAY_LEVELS.index(DEGRADED_OVERLAY_DETAIL))]
+    return level
+
+
+def _yuv_color(bgr):
+    """BT.601 limited range (Y, U, V) of a bgr color, what swscale uses for yuv420p / nv12"""
+    b, g, r = (min(max(c, 0), 255) for c in bgr)
+    y = 16 + (65.481 * r + 128.553 * g + 24.966 * b) / 255
+    u = 128 + (-37.797 * r - 74.203 * g + 112.0 * b) / 255
+    v = 128 + (112.0 * r - 93.786 * g - 18.214 * b) / 255
+    return tuple(int(round(c)) for c in (y, u, v))
+
+
+def _plane_color(bgr, plane):
+    if plane == "bgr":
+        return tuple(min(c, 255) for c in bgr)
+    y, u, v = _yuv_color(bgr)
+    return (y,) if plane == "luma" else (u, v)
+
+
+def _chains(connections):
+    """
+    Split the connection graph into paths that use every edge once, so a mesh is drawn as
+    a few hundred polylines instead of one segment per edge.
+    """
+    neighbours = {}
+    for a, b in connections:
+        neighbours.setdefault(a, set()).add(b)
+        neighbours.setdefault(b, set()).add(a)
+    # Starting at odd-degree vertices keeps the number of paths close to the minimum
+    starts = sorted(neighbours, key=lambda v: (len(neighbours[v]) % 2 == 0, v))
+    chains = []
+    for start in starts:
+        while neighbours[start]:
+            chain = [start]
+            vertex = start
+            while neighbours[vertex]:
+                following = min(neighbours[vertex])
+                neighbours[vertex].discard(following)
+                neighbours[following].discard(vertex)
+                chain.append(following)
+                vertex = following
+            chains.append(chain)
+    return chains
+
+
+class _PartStyle:
+    """Everything needed to draw one part at one level on one kind of plane, built once"""
+
+    __slots__ = (
+        "pairs",
+        "chain_index",
+        "chain_splits",
+        "connection_color",
+        "connection_thickness",
+        "dots",
+        "landmark_color",
+        "border_color",
+        "landmark_thickness",
+        "circle",
+        "border_circle",
+        "scale",
+    )
+
+    def __init__(self, part, level, plane):
+        connections, dots = _LEVELS[level][part]
+        landmark_color, landmark_thickness, radius, connection_color, connection_thickness = _PART_STYLES[part]
+        # The chroma plane of nv12 is half the size of the frame, so are lines and circles on it
+        self.scale = 0.5 if plane == "chroma" else 1.0
+
+        self.pairs = np.array(sorted(connections), dtype=np.intp)
+        chains = _chains(connections)
+        self.chain_index = np.concatenate([np.array(chain, dtype=np.intp) for chain in chains])
+        self.chain_splits = np.cumsum([len(chain) for chain in chains])[:-1]
+
+        self.connection_color = _plane_color(connection_color, plane)
+        self.connection_thickness = max(int(round(connection_thickness * self.scale)), 1)
+        self.dots = dots
+        self.landmark_color = _plane_color(landmark_color, plane)
+        self.border_color = _plane_color(_BORDER_COLOR, plane)
+        self.landmark_thickness = max(int(round(landmark_thickness * self.scale)), 1)
+        radius = max(int(round(radius * self.scale)), 1)
+        self.circle = _circle_offsets(radius)
+        self.border_circle = _circle_offsets(max(radius + 1, int(radius * 1.2)))
+
+    def draw(self, image, pixels, visible, all_visible):
+        pixels = (pixels * self.scale).astype(np.int32) if self.scale != 1.0 else pixels.astype(np.int32)
+        if all_visible:
+            # The usual case: whole precomputed chains, one fancy index for all of them
+            lines = np.split(pixels[self.chain_index], self.chain_splits)
+        else:
+            pairs = self.pairs[visible[self.pairs[:, 0]] & visible[self.pairs[:, 1]]]
+            lines = list(pixels[pairs])
+        if lines:
+            cv2.polylines(image, lines, False, self.connection_color, self.connection_thickness)
+
+        if self.dots:
+            # Landmark circles as closed polygons, all of a part in one call each
+            centers = (pixels if all_visible else pixels[visible])[:, None, :]
+            if len(centers):
+                cv2.polylines(image, centers + self.border_circle, True, self.border_color, self.landmark_thickness)
+                cv2.polylines(image, centers + self.circle, True, self.landmark_color, self.landmark_thickness)
+
+
+@lru_cache(maxsize=None)
+def _circle_offsets(radius):
+    """Outline of a circle around (0, 0), the polygon cv2.circle rasterizes itself"""
+    return cv2.ellipse2Poly((0, 0), (radius, radius), 0, 0, 360, 15 if radius < 10 else 5)[None]
+
+
+@lru_cache(maxsize=None)
+def _styles(level, plane):
+    return tuple((part, _PartStyle(part, level, plane)) for part in _LEVELS[level])
+
+
+def _frame_points(landmarks, level, width, height):
+    """Pixel coordinates and visibility of every part the level draws, computed once per frame"""
+    points = []
+    for part in _LEVELS[level]:
+        part_points = landmarks.get(part)
+        if part_points is None:
+            continue
+        visible = (
+            (part_points[:, 0] >= 0) & (part_points[:, 0] <= 1)
+            & (part_points[:, 1] >= 0) & (part_points[:, 1] <= 1)
+        )
+        if part_points.shape[1] > 3:
+            visible &= part_points[:, 3] >= _VISIBILITY_THRESHOLD
+        pixels = np.minimum(part_points[:, :2] * (width, height), (width - 1, height - 1))
+        points.append((part, pixels, visible, bool(visible.all())))
+    return points
+
+
+def _draw(image, points, level, plane):
+    styles = dict(_styles(level, plane))
+    for part, pixels, visible, all_visible in points:
+        styles[part].draw(image, pixels, visible, all_visible)
+
+
+def draw_overlay(image, landmarks, level="full"):
+    """Draw results_to_arrays() output onto a bgr24 frame, the landmarks may come from an earlier frame"""
+    height, width = image.shape[:2]
+    _draw(image, _frame_points(landmarks, level, width, height), level, "bgr")
+
+
+def draw_overlay_nv12(array, width, height, landmarks, level="full"):
+    """
+    Same overlay drawn straight into an nv12 frame array (frame.to_ndarray(format="nv12"),
+    even width and height): the luma plane at full size, both chroma channels in one
+    half-size pass, no conversion to bgr24 and back.
+    """
+    points = _frame_points(landmarks, level, width, height)
+    _draw(array[:height], points, level, "luma")
+    _draw(array[height:].reshape(height // 2, width // 2, 2), points, level, "chroma")
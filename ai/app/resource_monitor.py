@@ -1,25 +1,64 @@
+import logging
 import threading
+import time
 import psutil
-from constant.main import MAX_INFERENCE_WORKERS
+from constant.main import (
+    CPU_SAMPLE_SECONDS,
+    MAX_MEDIAPIPE_INSTANCES,
+    MAX_RSS_MB,
+    POOL_GROWTH_MEMORY_PERCENT,
+)
+
+logger = logging.getLogger(__name__)
+
+_resource_monitor = None
 
 class ResourceMonitor:
     def __init__(self):
         self.instance_count = 0
-        self.max_instances = MAX_INFERENCE_WORKERS  # Allow 1 extra
+        self.max_instances = MAX_MEDIAPIPE_INSTANCES
         self.lock = threading.Lock()
+        self._process = psutil.Process()
+        # cpu_percent(None) measures since the previous call, prime it so the first reading is real
+        psutil.cpu_percent(interval=None)
+        self._cpu_percent = 0.0
+        self._cpu_sampled_at = time.monotonic()
+
+    def cpu_percent(self):
+        """
+        Host CPU over the last CPU_SAMPLE_SECONDS at least: back-to-back calls (concurrent
+        offers) would otherwise measure a few milliseconds and read 0 or 100%.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if now - self._cpu_sampled_at >= CPU_SAMPLE_SECONDS:
+                self._cpu_percent = psutil.cpu_percent(interval=None)
+                self._cpu_sampled_at = now
+            return self._cpu_percent
+
+    def snapshot(self):
+        """Cheap, non-blocking reading of host and process resources"""
+        return {
+            "cpu_percent": self.cpu_percent(),
+            "memory_percent": psutil.virtual_memory().percent,
+            "rss_mb": self._process.memory_info().rss / 1024**2,
+        }
 
     def can_create_instance(self):
         with self.lock:
             memory_usage = psutil.virtual_memory().percent
-            if memory_usage > 85:  # Don't create if memory > 85%
-                print(
-                    f"⚠️ High memory usage ({memory_usage:.1f}%), skipping MediaPipe creation"
-                )
+            if memory_usage > POOL_GROWTH_MEMORY_PERCENT:
+                logger.warning("⚠️ High memory usage (%.1f%%), skipping MediaPipe creation", memory_usage)
+                return False
+
+            rss_mb = self._process.memory_info().rss / 1024**2
+            if rss_mb > MAX_RSS_MB * 0.8:  # admission control starts degrading here too
+                logger.warning("⚠️ High worker RSS (%.0f MB), skipping MediaPipe creation", rss_mb)
                 return False
 
             if self.instance_count >= self.max_instances:
-                print(
-                    f"⚠️ Max MediaPipe instances reached ({self.instance_count}/{self.max_instances})"
+                logger.warning(
+                    "⚠️ Max MediaPipe instances reached (%s/%s)", self.instance_count, self.max_instances
                 )
                 return False
 
@@ -28,8 +67,15 @@ class ResourceMonitor:
     def instance_created(self):
         with self.lock:
             self.instance_count += 1
-            print(f"📊 MediaPipe instances: {self.instance_count}/{self.max_instances}")
+            logger.info("📊 MediaPipe instances: %s/%s", self.instance_count, self.max_instances)
 
     def instance_destroyed(self):
         with self.lock:
             self.instance_count = max(0, self.instance_count - 1)
+
+
+def get_resource_monitor():
+    global _resource_monitor
+    if _resource_monitor is None:
+        _resource_monitor = ResourceMonitor()
+    return _resource_monitor
@@ -0,0 +1,61 @@
+import numpy as np
+
+from constant.main import (
+    HIGH_INFERENCE_LOAD,
+    LOW_INFERENCE_LOAD,
+    ROI_INPUT_SIDES,
+    ROI_MARGIN,
+    ROI_MAX_AREA,
+    ROI_TRACKING,
+)
+
+_VISIBILITY_THRESHOLD = 0.5
+
+
+class RoiTracker:
+    """
+    Per-session region of interest for Holistic.
+
+    After every result the box around the signer (visible pose points and both
+    hands, plus ROI_MARGIN of its size on each side) becomes the crop for the
+    next sampled frame. Nobody detected means the track is lost and the next
+    frame goes in whole; a box covering most of the frame is not worth cropping.
+    """
+
+    def __init__(self, enabled=ROI_TRACKING):
+        self._enabled = enabled
+        self.box = None  # normalized (x0, y0, x1, y1), None = full frame
+
+    def update(self, landmarks):
+        if not self._enabled:
+            return
+        points = []
+        pose = landmarks.get("pose")
+        if pose is not None:
+            points.append(pose[pose[:, 3] >= _VISIBILITY_THRESHOLD, :2])
+        for part in ("left_hand", "right_hand"):
+            if landmarks.get(part) is not None:
+                points.append(landmarks[part][:, :2])
+        points = [p for p in points if len(p)]
+        if not points:
+            self.box = None  # lost, look at the full frame again
+            return
+
+        points = np.concatenate(points)
+        low, high = points.min(axis=0), points.max(axis=0)
+        margin = (high - low) * ROI_MARGIN
+        x0, y0 = np.clip(low - margin, 0.0, 1.0)
+        x1, y1 = np.clip(high + margin, 0.0, 1.0)
+        if (x1 - x0) * (y1 - y0) > ROI_MAX_AREA:
+            self.box = None
+        else:
+            self.box = (float(x0), float(y0), float(x1), float(y1))
+
+    @staticmethod
+    def input_side(load):
+        """Longer side of the model input for the current 0..1 inference load"""
+        if load < LOW_INFERENCE_LOAD:
+            return ROI_INPUT_SIDES[0]
+        if load < HIGH_INFERENCE_LOAD:
+            return ROI_INPUT_SIDES[1]
+        return ROI_INPUT_SIDES[2]
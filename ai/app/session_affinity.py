@@ -0,0 +1,86 @@
+class SessionAffinity:
+    """
+    Sticky session -> MediaPipe instance assignment, shared by both inference backends.
+
+    A session claims a free instance once and keeps it, so its consecutive
+    frames run on the same graph and stay in MediaPipe's cheap tracking mode.
+    An instance that last ran someone else's frames is reset when it is
+    claimed, no tracking state leaks from one signer to the next.
+    Sessions that find no free instance run as guests on the longest idle
+    owned one without taking it over, and claim the next instance that is
+    freed by an ending session or added by the pool.
+
+    The graph is also reset whenever a shared instance switches between a
+    guest and its owner. Without it the guest's frame is tracked from the
+    owner's hands and pose (and the owner's next frame from the guest's),
+    so landmarks of one signer end up in the other's results and signs.
+    The price is a full detection pass instead of tracking on each side of
+    a switch; it is only paid while guests exist, which lasts until the
+    pool frees or adds an instance, and a guest running several frames in
+    a row pays it once.
+    """
+
+    def __init__(self):
+        self._owner = {}  # id(instance) -> session_id
+        self._owned = {}  # session_id -> instance
+        self._last_session = {}  # id(instance) -> session whose frame it ran last
+        self.claims = 0
+
+    def owned_by(self, session_id):
+        return self._owned.get(session_id)
+
+    def is_owned(self, instance):
+        return id(instance) in self._owner
+
+    def pick(self, idle, session_id):
+        """
+        Index into idle (longest idle first) of the instance the session should use:
+        its own, else a free one, else the longest idle one as a guest.
+        None means wait, either for the session's own busy instance or for any instance.
+        """
+        own = self._owned.get(session_id)
+        if own is not None:
+            for index, instance in enumerate(idle):
+                if instance is own:
+                    return index
+            return None
+        for index, instance in enumerate(idle):
+            if id(instance) not in self._owner:
+                return index
+        return 0 if idle else None
+
+    def accepts(self, instance, session_id):
+        """Whether a waiting session can take a just released instance"""
+        own = self._owned.get(session_id)
+        return own is None or own is instance
+
+    def use(self, instance, session_id):
+        """
+        Record that the session's next frame runs on the instance, True if its graph must
+        be reset first because the instance last ran another session's frame (a claim,
+        a guest frame, or the owner's first frame after a guest).
+        """
+        key = id(instance)
+        if session_id is not None and session_id not in self._owned and key not in self._owner:
+            self._owner[key] = session_id
+            self._owned[session_id] = instance
+            self.claims += 1
+        reset = key in self._last_session and self._last_session[key] != session_id
+        self._last_session[key] = session_id
+        return reset
+
+    def drop_session(self, session_id):
+        """The session ended, its instance is free to be claimed"""
+        instance = self._owned.pop(session_id, None)
+        if instance is not None:
+            self._owner.pop(id(instance), None)
+
+    def forget(self, instance):
+        """The instance is closed, its owner has to claim another one"""
+        session_id = self._owner.pop(id(instance), None)
+        if session_id is not None:
+            self._owned.pop(session_id, None)
+        self._last_session.pop(id(instance), None)
+
+    def get_status(self):
+        return {"owned": len(self._owned), "claims": self.claims}
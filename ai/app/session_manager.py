@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import time
+
+import logs
+import metrics
+from constant.main import (
+    DISCONNECTED_GRACE_SECONDS,
+    MAX_PENDING_ICE_CANDIDATES,
+    MAX_PENDING_ICE_CLIENTS,
+    PENDING_ICE_TTL_SECONDS,
+    SESSION_IDLE_SECONDS,
+    SESSION_REAP_INTERVAL_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Session:
+    """Everything the worker holds for one browser"""
+
+    __slots__ = ("client_id", "pc", "track", "data_channel", "sink", "created_at", "disconnected_at")
+
+    def __init__(self, client_id, pc, track=None):
+        self.client_id = client_id
+        self.pc = pc
+        self.track = track  # VideoTransformTrack, None once an offer turned out to have no video
+        self.data_channel = None  # opened by the browser, carries landmarks back
+        self.sink = None  # MediaBlackhole consuming the track when no video is sent back
+        self.created_at = time.monotonic()
+        self.disconnected_at = None
+
+    def idle_seconds(self, now):
+        """Seconds since the browser last sent a frame (or since the session started)"""
+        last = self.created_at
+        if self.track is not None and self.track.last_frame_at is not None:
+            last = max(last, self.track.last_frame_at)
+        return now - last
+
+    def memory_bytes(self):
+        return self.track.memory_bytes() if self.track is not None else 0
+
+
+class SessionManager:
+    """
+    Owns the per-client state of this worker: peer connection, processed track, data
+    channel, sink, and ICE candidates that arrived before the offer.
+
+    Sessions end on a close message from signaling, and also without one: when the
+    peer connection fails or closes, stays disconnected for DISCONNECTED_GRACE_SECONDS,
+    or no frame arrived for SESSION_IDLE_SECONDS (a browser that went away). Buffered
+    candidates are capped per client and expire after PENDING_ICE_TTL_SECONDS when no
+    offer follows. on_closed(client_id, reason) is called for sessions ended that way,
+    so signaling can be told about the freed capacity.
+    """
+
+    def __init__(self, on_closed=None):
+        self._sessions = {}  # client_id -> Session
+        self._pending_ice = {}  # client_id -> (first buffered at, [candidate dicts])
+        self._on_closed = on_closed
+        self._reaper = None
+        self.reaped = 0  # sessions closed without a close message
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, client_id):
+        return client_id in self._sessions
+
+    def get(self, client_id):
+        return self._sessions.get(client_id)
+
+    def client_ids(self):
+        return list(self._sessions)
+
+    def add(self, client_id, pc, track=None):
+        """Start tracking a new peer connection, an earlier session of the client must be closed first"""
+        session = Session(client_id, pc, track)
+        self._sessions[client_id] = session
+
+        @pc.on("connectionstatechange")
+        def on_connectionstatechange():
+            self._on_connection_state(session)
+
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap())
+        return session
+
+    def buffer_ice(self, client_id, candidate):
+        """Keep a candidate until the client's offer is set up, False if it was dropped"""
+        entry = self._pending_ice.get(client_id)
+        if entry is None:
+            if len(self._pending_ice) >= MAX_PENDING_ICE_CLIENTS:
+                logs.log_limited(
+                    logger, logging.WARNING, "pending_ice_clients",
+                    "⚠️ ICE buffered for %s clients already, dropping candidate", len(self._pending_ice),
+                    extra={"session": client_id},
+                )
+                return False
+            entry = self._pending_ice[client_id] = (time.monotonic(), [])
+        if len(entry[1]) >= MAX_PENDING_ICE_CANDIDATES:
+            logs.log_limited(
+                logger, logging.WARNING, ("pending_ice_full", client_id),
+                "⚠️ %s ICE candidates buffered, dropping candidate", len(entry[1]),
+                extra={"session": client_id},
+            )
+            return False
+        entry[1].append(candidate)
+        return True
+
+    def take_pending_ice(self, client_id):
+        entry = self._pending_ice.pop(client_id, None)
+        return entry[1] if entry is not None else []
+
+    def drop_pending_ice(self, client_id):
+        self._pending_ice.pop(client_id, None)
+
+    async def close(self, client_id, reason="close"):
+        """End the client's session and forget its buffered candidates, False if there was none"""
+        self._pending_ice.pop(client_id, None)
+        session = self._sessions.get(client_id)
+        if session is None:
+            return False
+        await self._close_session(session, reason)
+        return True
+
+    async def close_all(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+            await asyncio.gather(self._reaper, return_exceptions=True)
+            self._reaper = None
+        for client_id in self.client_ids():
+            await self.close(client_id, "shutdown")
+        self._pending_ice.clear()
+
+    async def _close_session(self, session, reason):
+        # Only the session itself is removed, a newer one of the same client stays
+        if self._sessions.get(session.client_id) is session:
+            del self._sessions[session.client_id]
+        log = logs.session_logger(logger, session.client_id)
+
+        if session.sink is not None:
+            try:
+                await session.sink.stop()
+            except Exception as e:
+                log.error("error stopping sink: %s", e)
+            session.sink = None
+        if session.track is not None:
+            try:
+                await session.track._stopVideoTransformTrack()  # <- stops executor and tasks
+            except Exception as e:
+                log.error("error stopping track: %s", e)
+            session.track = None
+        session.data_channel = None
+        metrics.drop_session(session.client_id)
+        try:
+            await session.pc.close()
+        except Exception as e:
+            log.error("error closing pc: %s", e)
+        log.info("session closed (%s) after %.0fs", reason, time.monotonic() - session.created_at)
+
+    def _on_connection_state(self, session):
+        state = session.pc.connectionState
+        if self._sessions.get(session.client_id) is not session:
+            return  # closed or replaced already
+        if state in ("failed", "closed"):
+            asyncio.create_task(self._reap_session(session, f"connection {state}"))
+        elif state == "disconnected":
+            # ICE may still recover, the reaper closes it after the grace period
+            session.disconnected_at = time.monotonic()
+        else:
+            session.disconnected_at = None
+
+    async def _reap_session(self, session, reason):
+        if self._sessions.get(session.client_id) is not session:
+            return
+        self.reaped += 1
+        await self._close_session(session, reason)
+        if self._on_closed is not None:
+            try:
+                self._on_closed(session.client_id, reason)
+            except Exception as e:
+                logger.error("session close callback error: %s", e, extra={"session": session.client_id})
+
+    async def _reap(self):
+        # Started from whichever client's offer came first, its records are not that client's
+        logs.set_session(None)
+        while True:
+            await asyncio.sleep(SESSION_REAP_INTERVAL_SECONDS)
+            now = time.monotonic()
+            for session in list(self._sessions.values()):
+                if session.disconnected_at is not None and now - session.disconnected_at >= DISCONNECTED_GRACE_SECONDS:
+                    await self._reap_session(session, "disconnected")
+                elif session.track is not None and session.idle_seconds(now) >= SESSION_IDLE_SECONDS:
+                    # Sessions without video only end on their connection state
+                    await self._reap_session(session, "idle")
+
+            expired = [
+                client_id
+                for client_id, (buffered_at, _) in self._pending_ice.items()
+                if now - buffered_at >= PENDING_ICE_TTL_SECONDS and client_id not in self._sessions
+            ]
+            for client_id in expired:
+                del self._pending_ice[client_id]
+            if expired:
+                logger.info("🧹 Dropped ICE candidates of %s clients that never sent an offer", len(expired))
+
+    def get_status(self):
+        now = time.monotonic()
+        sessions = {
+            client_id: {
+                "state": session.pc.connectionState,
+                "age_seconds": round(now - session.created_at, 1),
+                "idle_seconds": round(session.idle_seconds(now), 1),
+                "bytes": session.memory_bytes(),
+            }
+            for client_id, session in self._sessions.items()
+        }
+        return {
+            "sessions": sessions,
+            "bytes": sum(s["bytes"] for s in sessions.values()),
+            "pending_ice_clients": len(self._pending_ice),
+            "pending_ice_candidates": sum(len(c) for _, c in self._pending_ice.values()),
+            "reaped": self.reaped,
+        }
@@ -0,0 +1,251 @@
+import logging
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from config import CLASSIFIER_BACKEND, MODEL_PATH, ONNX_MODEL_PATH, TFLITE_MODEL_PATH
+from constant.main import (
+    HAND_CROP_PADDING,
+    HAND_CROP_SIZE,
+    MAX_BATCH_SIZE,
+    PREDICTION_WINDOW,
+    SIGN_CONFIDENCE_THRESHOLD,
+)
+
+logger = logging.getLogger(__name__)
+
+# model.keras is a Sign Language MNIST classifier: class i is the letter chr(A + i),
+# J (9) and Z need motion and are never predicted
+LABELS = [chr(ord("A") + i) for i in range(25)]
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def extract_hand_crop(img, landmarks):
+    """
+    Model input for one rgb24 frame (the landmark model's input, see frame_to_rgb): square
+    grayscale crop around the hand, HAND_CROP_SIZE px, scaled to [0, 1]. Right hand preferred,
+    None when no hand was detected.
+    """
+    hand = landmarks.get("right_hand")
+    if hand is None:
+        hand = landmarks.get("left_hand")
+    if hand is None:
+        return None
+
+    height, width = img.shape[:2]
+    xs = hand[:, 0] * width
+    ys = hand[:, 1] * height
+    center_x = (xs.min() + xs.max()) / 2
+    center_y = (ys.min() + ys.max()) / 2
+    half = max(xs.max() - xs.min(), ys.max() - ys.min()) * (0.5 + HAND_CROP_PADDING)
+
+    x0, x1 = int(max(center_x - half, 0)), int(min(center_x + half, width))
+    y0, y1 = int(max(center_y - half, 0)), int(min(center_y + half, height))
+    if x1 - x0 < 2 or y1 - y0 < 2:
+        return None
+
+    gray = cv2.cvtColor(img[y0:y1, x0:x1], cv2.COLOR_RGB2GRAY)
+    crop = cv2.resize(gray, (HAND_CROP_SIZE, HAND_CROP_SIZE), interpolation=cv2.INTER_AREA)
+    return crop.astype(np.float32) / 255.0
+
+
+class SignClassifier:
+    """Common interface of the classifier backends, loaded once per process"""
+
+    name = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def warm_up(self):
+        """First call allocates buffers / builds graphs, do it before real frames arrive"""
+        started = time.monotonic()
+        self.predict_batch(np.zeros((1, HAND_CROP_SIZE, HAND_CROP_SIZE), dtype=np.float32))
+        logger.info("🔥 Sign classifier (%s) warmed up in %.2fs", self.name, time.monotonic() - started)
+
+    def predict_batch(self, crops):
+        """(N, 28, 28) crops -> (N, len(LABELS)) probabilities, one forward pass"""
+        batch = crops.reshape(-1, HAND_CROP_SIZE, HAND_CROP_SIZE, 1).astype(np.float32, copy=False)
+        with self._lock:
+            return self._predict(batch)
+
+    def _predict(self, batch):
+        raise NotImplementedError
+
+
+class KerasClassifier(SignClassifier):
+    """Full model.keras through TensorFlow, the reference implementation"""
+
+    name = "keras"
+
+    def __init__(self, model_path=MODEL_PATH):
+        super().__init__()
+        import tensorflow as tf  # heavy, only imported once the classifier is needed
+
+        self._model = tf.keras.models.load_model(model_path, compile=False)
+
+    def _predict(self, batch):
+        return np.asarray(self._model.predict_on_batch(batch))
+
+
+class TFLiteClassifier(SignClassifier):
+    """Exported model.tflite on the standalone LiteRT interpreter (TensorFlow only as fallback)"""
+
+    name = "tflite"
+
+    def __init__(self, model_path=TFLITE_MODEL_PATH):
+        super().__init__()
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            try:
+                from tflite_runtime.interpreter import Interpreter
+            except ImportError:
+                import tensorflow as tf
+
+                Interpreter = tf.lite.Interpreter
+
+        self._interpreter = Interpreter(model_path=model_path, num_threads=1)
+        self._input = self._interpreter.get_input_details()[0]["index"]
+        self._output = self._interpreter.get_output_details()[0]["index"]
+        self._batch_size = None
+
+    def _predict(self, batch):
+        if batch.shape[0] != self._batch_size:
+            # Reallocating is only needed when the batch size changes
+            self._interpreter.resize_tensor_input(self._input, batch.shape)
+            self._interpreter.allocate_tensors()
+            self._batch_size = batch.shape[0]
+        self._interpreter.set_tensor(self._input, batch)
+        self._interpreter.invoke()
+        return self._interpreter.get_tensor(self._output).copy()
+
+
+class OnnxClassifier(SignClassifier):
+    """Exported model.onnx on ONNX Runtime (CPU)"""
+
+    name = "onnx"
+
+    def __init__(self, model_path=ONNX_MODEL_PATH):
+        super().__init__()
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = 1
+        self._session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input = self._session.get_inputs()[0].name
+
+    def _predict(self, batch):
+        return self._session.run(None, {self._input: batch})[0]
+
+
+CLASSIFIER_BACKENDS = {
+    "keras": KerasClassifier,
+    "tflite": TFLiteClassifier,
+    "onnx": OnnxClassifier,
+}
+
+
+def _fastest_classifier():
+    """
+    Benchmark the lightweight backends that can be loaded on this host and keep the
+    fastest. Keras is only the fallback: loading it pulls in all of TensorFlow.
+    """
+    probe = np.random.rand(MAX_BATCH_SIZE, HAND_CROP_SIZE, HAND_CROP_SIZE).astype(np.float32)
+    best, best_time = None, None
+    for name in ("onnx", "tflite"):
+        try:
+            candidate = CLASSIFIER_BACKENDS[name]()
+            candidate.predict_batch(probe)
+            started = time.monotonic()
+            for _ in range(20):
+                candidate.predict_batch(probe)
+            elapsed = (time.monotonic() - started) / 20
+        except Exception as e:
+            logger.warning("⚠️ Classifier backend %s unavailable: %s", name, e)
+            continue
+        logger.info("📊 Classifier backend %s: %.2f ms per batch of %s", name, elapsed * 1000, MAX_BATCH_SIZE)
+        if best_time is None or elapsed < best_time:
+            best, best_time = candidate, elapsed
+    return best if best is not None else KerasClassifier()
+
+
+def create_classifier(backend=CLASSIFIER_BACKEND):
+    if backend == "auto":
+        return _fastest_classifier()
+    return CLASSIFIER_BACKENDS[backend]()
+
+
+def load_sign_classifier():
+    """Load and warm up the shared classifier (blocking, call from a thread)"""
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            try:
+                started = time.monotonic()
+                classifier = create_classifier()
+                logger.info(
+                    "✅ Sign classifier (%s) loaded in %.2fs", classifier.name, time.monotonic() - started
+                )
+                classifier.warm_up()
+                _classifier = classifier
+            except Exception as e:
+                logger.error("❌ Failed to load sign classifier: %s", e)
+    return _classifier
+
+
+def classify_crops(crops):
+    """Batch classification hook for the scheduler, None until the model is loaded"""
+    if _classifier is None:
+        return None
+    return _classifier.predict_batch(crops)
+
+
+class SignRecognizer:
+    """
+    Per-session smoothing of per-frame predictions.
+
+    Probabilities go into a preallocated ring of the last PREDICTION_WINDOW
+    frames; a sign is emitted when the window mean crosses the confidence
+    threshold for a letter other than the last one emitted.
+    """
+
+    def __init__(self, window=PREDICTION_WINDOW, threshold=SIGN_CONFIDENCE_THRESHOLD):
+        self._window = np.zeros((window, len(LABELS)), dtype=np.float32)
+        self._mean = np.zeros(len(LABELS), dtype=np.float32)
+        self._index = 0
+        self._filled = 0
+        self._threshold = threshold
+        self._last_label = None
+
+    def update(self, probabilities):
+        """Add one frame (None = no hand), returns {"label", "confidence"} when a new sign is recognized"""
+        row = self._window[self._index]
+        if probabilities is None:
+            row.fill(0.0)
+        else:
+            row[:] = probabilities
+        self._index = (self._index + 1) % len(self._window)
+        self._filled = min(self._filled + 1, len(self._window))
+
+        np.mean(self._window[: self._filled], axis=0, out=self._mean)
+        best = int(self._mean.argmax())
+        confidence = float(self._mean[best])
+
+        if confidence < self._threshold:
+            # Hysteresis, the same letter can be signed again once it clearly faded out
+            if confidence < self._threshold / 2:
+                self._last_label = None
+            return None
+
+        label = LABELS[best]
+        if label == self._last_label:
+            return None
+        self._last_label = label
+        return {"label": label, "confidence": round(confidence, 3)}
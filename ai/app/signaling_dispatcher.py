@@ -0,0 +1,152 @@
+import asyncio
+import json
+import logging
+import time
+
+import logs
+import metrics
+from constant.main import (
+    CLIENT_QUEUE_IDLE_SECONDS,
+    MAX_CONCURRENT_OFFERS,
+    MAX_OUTGOING_SIGNALING_MESSAGES,
+    MAX_QUEUED_SIGNALING_MESSAGES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SignalingSender:
+    """
+    Single writer for the signaling websocket.
+
+    Messages from every handler go through one bounded queue, so they leave in
+    the order they were produced; send() waits while the queue is full (the
+    socket does not drain), send_nowait() is for sync callbacks and drops
+    instead.
+    """
+
+    def __init__(self, ws, max_queued=MAX_OUTGOING_SIGNALING_MESSAGES):
+        self._ws = ws
+        self._queue = asyncio.Queue(maxsize=max_queued)
+        self._writer = asyncio.create_task(self._write())
+
+    async def send(self, message):
+        await self._queue.put(json.dumps(message))
+
+    def send_nowait(self, message):
+        try:
+            self._queue.put_nowait(json.dumps(message))
+        except asyncio.QueueFull:
+            logs.log_limited(
+                logger, logging.WARNING, "send_queue_full",
+                "⚠️ Signaling send queue full, dropping %s to %s", message.get("type"), message.get("to"),
+            )
+
+    async def _write(self):
+        while True:
+            text = await self._queue.get()
+            try:
+                await self._ws.send(text)
+            except Exception as e:
+                logs.log_limited(logger, logging.ERROR, "send_failed", "❌ Signaling send failed: %s", e)
+
+    async def close(self):
+        self._writer.cancel()
+        await asyncio.gather(self._writer, return_exceptions=True)
+
+
+class SignalingDispatcher:
+    """
+    Runs incoming signaling messages per client.
+
+    Every client gets its own queue and task: its messages are handled in
+    arrival order, different clients are handled concurrently, so one slow
+    offer no longer holds up everybody else's ice and close. At most
+    max_concurrent_offers offers are set up at once. A close cancels an offer
+    of the same client that is still being set up, the close handler cleans up
+    what the offer left behind. Client tasks end after CLIENT_QUEUE_IDLE_SECONDS
+    without messages.
+    """
+
+    def __init__(self, handler, max_concurrent_offers=MAX_CONCURRENT_OFFERS):
+        self._handler = handler  # async handler(msg)
+        self._offer_slots = asyncio.Semaphore(max_concurrent_offers)
+        self._queues = {}  # client_id -> asyncio.Queue of (msg, received_at)
+        self._tasks = {}  # client_id -> task draining the queue
+        self._current = {}  # client_id -> (message type, task) being handled
+
+    def dispatch(self, msg):
+        client_id = msg.get("from")
+        if msg.get("type") == "close":
+            current = self._current.get(client_id)
+            if current is not None and current[0] == "offer":
+                current[1].cancel()
+
+        queue = self._queues.get(client_id)
+        if queue is None:
+            queue = self._queues[client_id] = asyncio.Queue(maxsize=MAX_QUEUED_SIGNALING_MESSAGES)
+        try:
+            queue.put_nowait((msg, time.perf_counter()))
+        except asyncio.QueueFull:
+            logs.log_limited(
+                logger, logging.WARNING, ("client_queue_full", client_id),
+                "⚠️ Signaling queue full, dropping %s", msg.get("type"), extra={"session": client_id},
+            )
+            return
+        task = self._tasks.get(client_id)
+        if task is None or task.done():
+            self._tasks[client_id] = asyncio.create_task(self._run_client(client_id, queue))
+
+    def get_status(self):
+        return {
+            "clients": len(self._tasks),
+            "queued": sum(queue.qsize() for queue in self._queues.values()),
+            "offers_in_progress": sum(1 for kind, _ in self._current.values() if kind == "offer"),
+        }
+
+    async def _run_client(self, client_id, queue):
+        # Everything logged while handling this client's messages is tagged with it
+        logs.set_session(client_id)
+        while True:
+            try:
+                msg, received_at = await asyncio.wait_for(queue.get(), CLIENT_QUEUE_IDLE_SECONDS)
+            except asyncio.TimeoutError:
+                if queue.empty():
+                    self._queues.pop(client_id, None)
+                    self._tasks.pop(client_id, None)
+                    return
+                continue
+
+            mtype = msg.get("type")
+            metrics.observe("signaling_wait", time.perf_counter() - received_at)
+            task = asyncio.create_task(self._handle(mtype, msg))
+            self._current[client_id] = (mtype, task)
+            try:
+                await task
+            except asyncio.CancelledError:
+                # stop() cancels this task and the handler together, only a close cancels just the handler
+                if asyncio.current_task().cancelling() or not task.cancelled():
+                    raise
+                logger.info("⏹️ %s cancelled", mtype)
+            except Exception as e:
+                logger.exception("❌ Error handling %s: %s", mtype, e)
+            finally:
+                self._current.pop(client_id, None)
+
+    async def _handle(self, mtype, msg):
+        if mtype == "offer":
+            async with self._offer_slots:
+                await self._handler(msg)
+        else:
+            await self._handler(msg)
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        for _, task in list(self._current.values()):
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._queues.clear()
+        self._current.clear()
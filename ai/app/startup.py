@@ -0,0 +1,80 @@
+import logging
+import time
+
+# Startup stages in the order they run, the worker is ready once all of them are
+#   pipeline: MediaPipe (which pulls in TensorFlow) imported, pool / worker processes warm
+#   classifier: sign classifier loaded and warmed up
+#   signaling: registered with signaling, peers can be routed here
+STAGES = ("pipeline", "classifier", "signaling")
+
+logger = logging.getLogger(__name__)
+
+_started = time.monotonic()
+_ready_at = {}  # stage -> seconds after start
+_failed = {}  # stage -> error, the worker goes on without it
+_ready_seconds = None  # first time every stage was done
+
+
+def mark_ready(stage):
+    global _ready_seconds
+    _ready_at[stage] = round(time.monotonic() - _started, 3)
+    _failed.pop(stage, None)
+    if _ready_seconds is None and is_ready():
+        _ready_seconds = round(time.monotonic() - _started, 3)
+        logger.info("🚀 Worker ready in %.1fs", _ready_seconds)
+
+
+def mark_failed(stage, error):
+    """Stage could not be completed, it does not hold readiness back (e.g. landmarks without signs)"""
+    _failed[stage] = str(error)
+    mark_ready(stage)
+
+
+def mark_not_ready(stage):
+    _ready_at.pop(stage, None)
+
+
+def is_ready(stage=None):
+    if stage is not None:
+        return stage in _ready_at
+    return all(stage in _ready_at for stage in STAGES)
+
+
+def get_status():
+    return {
+        "ready": is_ready(),
+        "uptime_seconds": round(time.monotonic() - _started, 3),
+        "ready_seconds": _ready_seconds,
+        "stages": {
+            stage: {
+                "ready": stage in _ready_at,
+                "seconds": _ready_at.get(stage),
+                **({"error": _failed[stage]} if stage in _failed else {}),
+            }
+            for stage in STAGES
+        },
+    }
+
+
+def load_pipeline():
+    """Import the inference modules and warm the configured backend (blocking, call from a thread)"""
+    started = time.monotonic()
+    try:
+        from video_transform_track import initialize_inference_backend
+
+        initialize_inference_backend()
+    except Exception as e:
+        logger.exception("❌ Failed to start the inference pipeline: %s", e)
+        raise
+    logger.info("✅ Inference pipeline loaded in %.2fs", time.monotonic() - started)
+    mark_ready("pipeline")
+
+
+def load_classifier():
+    """Load and warm up the sign classifier (blocking, call from a thread)"""
+    from sign_classifier import load_sign_classifier
+
+    if load_sign_classifier() is None:
+        mark_failed("classifier", "sign classifier could not be loaded")
+    else:
+        mark_ready("classifier")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules live flat in ai/app and import each other by name, as when the worker runs from there
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,21 @@
+import asyncio
+
+from admission import ACCEPT, AdmissionController
+from video_transform_track import VideoTransformTrack
+
+
+class _IdleMonitor:
+    def snapshot(self):
+        return {"cpu_percent": 5.0, "memory_percent": 20.0, "rss_mb": 300.0}
+
+
+def test_degraded_session_does_not_degrade_the_next_offer_on_an_idle_host():
+    async def run():
+        degraded = VideoTransformTrack(session_id="degraded", degraded=True)
+        try:
+            return AdmissionController(monitor=_IdleMonitor()).decide(active_sessions=1)
+        finally:
+            await degraded._stopVideoTransformTrack()
+
+    decision = asyncio.run(run())
+    assert decision.mode == ACCEPT, decision.reason
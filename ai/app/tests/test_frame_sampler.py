@@ -0,0 +1,27 @@
+import av
+import numpy as np
+
+from constant.main import MAX_INFERENCE_FPS
+from frame_sampler import AdaptiveSampler
+
+
+def _frame(value):
+    rgb = np.full((48, 64, 3), value, dtype=np.uint8)
+    return av.VideoFrame.from_ndarray(rgb, format="rgb24").reformat(format="yuv420p")
+
+
+def test_sampled_frame_is_thumbnailed_once(monkeypatch):
+    thumbnails = []
+    luma_thumbnail = AdaptiveSampler._luma_thumbnail
+    monkeypatch.setattr(
+        AdaptiveSampler, "_luma_thumbnail", staticmethod(lambda frame: thumbnails.append(frame) or luma_thumbnail(frame))
+    )
+    sampler = AdaptiveSampler()
+    interval = 2.0 / MAX_INFERENCE_FPS
+
+    assert sampler.should_sample(_frame(0), 0.0, has_result=False)
+    # Compared with the first frame and kept for the next comparison, from one thumbnail
+    assert sampler.should_sample(_frame(255), interval, has_result=True)
+    assert not sampler.should_sample(_frame(255), 2 * interval, has_result=True)
+    assert len(thumbnails) == 3
+    assert sampler.skipped_static == 1
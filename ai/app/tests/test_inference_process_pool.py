@@ -0,0 +1,52 @@
+import multiprocessing
+import threading
+from multiprocessing import shared_memory
+
+import inference_process_pool
+from frame_ring import FrameRing
+
+
+class _Model:
+    def reset(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_worker_unmaps_a_detached_ring(monkeypatch):
+    closed = []
+
+    class _RecordingMemory(shared_memory.SharedMemory):
+        def close(self):
+            closed.append(self.name)
+            super().close()
+
+    monkeypatch.setattr(inference_process_pool, "_attach_shared_memory", lambda name: _RecordingMemory(name=name))
+    monkeypatch.setattr(inference_process_pool, "create_landmark_model", lambda tier: _Model())
+    monkeypatch.setattr(inference_process_pool, "detect_landmarks", lambda *args: {})
+    monkeypatch.setattr(inference_process_pool, "extract_hand_crop", lambda img, landmarks: None)
+
+    own = shared_memory.SharedMemory(create=True, size=64)
+    ring = FrameRing(2, 4 * 4 * 3)
+    conn, child_conn = multiprocessing.Pipe()
+    worker = threading.Thread(target=inference_process_pool._worker_main, args=(own.name, child_conn, "full"))
+    worker.start()
+    try:
+        assert conn.recv() == ("ready", None)
+        slot = ring.acquire(4, 4)
+        conn.send(("frame", (slot.shm_name, slot.offset, 4, 4, None, None, "full", False)))
+        assert conn.recv()[0] == "ok"
+        assert ring.shm_name not in closed
+
+        conn.send(("detach", [ring.shm_name]))
+        conn.send(("frame", (None, 0, 4, 4, None, None, "full", False)))
+        assert conn.recv()[0] == "ok"
+        assert ring.shm_name in closed
+    finally:
+        conn.send(None)
+        worker.join(5)
+        del slot
+        ring.close()
+        own.close()
+        own.unlink()
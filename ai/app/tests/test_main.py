@@ -0,0 +1,55 @@
+import asyncio
+
+from aiortc import RTCPeerConnection, RTCSessionDescription
+
+import admission
+import main
+from admission import ACCEPT, AdmissionDecision
+
+
+class _Signaling:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    def send_nowait(self, message):
+        self.sent.append(message)
+
+
+class _AcceptAll:
+    def decide(self, active_sessions):
+        return AdmissionDecision(ACCEPT)
+
+
+def test_ice_buffered_before_the_offer_is_added_to_its_peer_connection(monkeypatch):
+    added = []
+
+    async def add_ice_candidate(pc, client_id, candidate):
+        added.append(candidate)
+
+    monkeypatch.setattr(main, "add_ice_candidate_safe", add_ice_candidate)
+    monkeypatch.setattr(admission, "get_admission_controller", lambda: _AcceptAll())
+
+    async def run():
+        browser = RTCPeerConnection()
+        browser.addTransceiver("video", direction="sendrecv")
+        await browser.setLocalDescription(await browser.createOffer())
+
+        candidate = {"candidate": "candidate:1 1 udp 1 10.0.0.1 9000 typ host", "sdpMid": "0", "sdpMLineIndex": 0}
+        await main.handle_ice({"type": "ice", "from": "a", "candidate": candidate})
+        signaling = _Signaling()
+        await main.handle_offer(
+            signaling,
+            {"type": "offer", "from": "a", "sdp": {"type": "offer", "sdp": browser.localDescription.sdp}},
+        )
+        answered = [m for m in signaling.sent if m["type"] == "answer"]
+        await browser.setRemoteDescription(RTCSessionDescription(**answered[0]["sdp"]))
+
+        await main.sessions.close_all()
+        await browser.close()
+        return candidate
+
+    candidate = asyncio.run(run())
+    assert added == [candidate]
@@ -0,0 +1,28 @@
+from session_affinity import SessionAffinity
+
+
+def test_guest_frames_reset_the_owners_instance_both_ways():
+    affinity = SessionAffinity()
+    instance = object()
+
+    assert affinity.use(instance, "owner") is False
+    assert affinity.use(instance, "owner") is False
+    # No free instance left, the guest runs on the owner's one
+    assert affinity.pick([instance], "guest") == 0
+    assert affinity.use(instance, "guest") is True
+    assert affinity.use(instance, "guest") is False
+    assert affinity.use(instance, "owner") is True
+    assert affinity.owned_by("owner") is instance
+    assert affinity.owned_by("guest") is None
+
+
+def test_owner_keeps_tracking_and_a_new_owner_starts_fresh():
+    affinity = SessionAffinity()
+    instance = object()
+
+    assert [affinity.use(instance, "first") for _ in range(3)] == [False, False, False]
+    affinity.drop_session("first")
+    assert affinity.pick([instance], "second") == 0
+    assert affinity.use(instance, "second") is True
+    assert affinity.use(instance, "second") is False
+    assert affinity.owned_by("second") is instance
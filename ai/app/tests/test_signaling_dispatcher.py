@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+from signaling_dispatcher import SignalingDispatcher
+
+
+def test_stop_returns_while_a_handler_is_running():
+    async def run():
+        started = asyncio.Event()
+
+        async def handler(msg):
+            started.set()
+            await asyncio.sleep(60)
+
+        dispatcher = SignalingDispatcher(handler)
+        dispatcher.dispatch({"type": "offer", "from": "a"})
+        await started.wait()
+
+        began = time.monotonic()
+        await asyncio.wait_for(dispatcher.stop(), 2)
+        return time.monotonic() - began
+
+    assert asyncio.run(run()) < 1
+
+
+def test_close_cancels_the_clients_offer_and_is_handled():
+    async def run():
+        handled = []
+        offer_started = asyncio.Event()
+
+        async def handler(msg):
+            if msg["type"] == "offer":
+                offer_started.set()
+                await asyncio.sleep(60)
+            handled.append(msg["type"])
+
+        dispatcher = SignalingDispatcher(handler)
+        dispatcher.dispatch({"type": "offer", "from": "a"})
+        await offer_started.wait()
+        dispatcher.dispatch({"type": "close", "from": "a"})
+        for _ in range(100):
+            if handled:
+                break
+            await asyncio.sleep(0.01)
+        await dispatcher.stop()
+        return handled
+
+    assert asyncio.run(run()) == ["close"]
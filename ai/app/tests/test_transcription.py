@@ -0,0 +1,82 @@
+import asyncio
+import builtins
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import transcription
+from transcription import TranscriptionJobs
+
+
+def test_upload_is_written_off_the_event_loop(tmp_path, monkeypatch):
+    writer_threads = []
+
+    class _RecordingFile:
+        def __init__(self, f):
+            self._f = f
+
+        def write(self, data):
+            writer_threads.append(threading.get_ident())
+            return self._f.write(data)
+
+        def close(self):
+            self._f.close()
+
+    monkeypatch.setattr(transcription, "open", lambda *args: _RecordingFile(builtins.open(*args)), raising=False)
+    jobs = TranscriptionJobs(root=str(tmp_path))
+    submitted = []
+    monkeypatch.setattr(jobs, "submit_file", lambda path, source, job_id: submitted.append(path))
+
+    async def chunks():
+        for _ in range(3):
+            yield b"x" * 65536
+
+    async def run():
+        await jobs.submit_upload(chunks(), "clip.mp4")
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+
+    with open(submitted[0], "rb") as f:
+        assert f.read() == b"x" * 3 * 65536
+    assert writer_threads and loop_thread not in writer_threads
+
+
+def _run_uncached_job(jobs, monkeypatch, job, cache_get=lambda key: None):
+    monkeypatch.setattr(transcription, "_probe_duration", lambda path: 3 * transcription.TRANSCRIPTION_SEGMENT_SECONDS)
+    monkeypatch.setattr(transcription, "file_hash", lambda path: "hash")
+    monkeypatch.setattr(transcription, "_transcribe_segment", lambda path, start, end, fps, key: ([], False))
+    monkeypatch.setattr(jobs._cache, "get", cache_get)
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(jobs, "_get_executor", lambda: executor)
+    try:
+        asyncio.run(jobs._run(job))
+    finally:
+        executor.shutdown()
+
+
+def test_resumed_job_counts_its_segments_from_zero(tmp_path, monkeypatch):
+    jobs = TranscriptionJobs(root=str(tmp_path))
+    (tmp_path / "job").mkdir()
+    # Saved by an earlier run that stopped halfway, start() queues it again as is
+    job = {"id": "job", "source": "clip.mp4", "path": "clip.mp4", "progress": {"segments_done": 2, "segments": 3}}
+
+    _run_uncached_job(jobs, monkeypatch, job)
+
+    assert job["progress"] == {"segments_done": 3, "segments": 3}
+
+
+def test_job_cache_lookups_and_saves_run_off_the_event_loop(tmp_path, monkeypatch):
+    jobs = TranscriptionJobs(root=str(tmp_path))
+    (tmp_path / "job").mkdir()
+    job = {"id": "job", "source": "clip.mp4", "path": "clip.mp4", "progress": {"segments_done": 0, "segments": None}}
+    io_threads = []
+    save = jobs._save
+    monkeypatch.setattr(jobs, "_save", lambda job: (io_threads.append(threading.get_ident()), save(job)))
+
+    def cache_get(key):
+        io_threads.append(threading.get_ident())
+
+    _run_uncached_job(jobs, monkeypatch, job, cache_get)
+
+    # 3 lookups, 2 saves before the segments and one after each
+    assert len(io_threads) == 8 and threading.get_ident() not in io_threads
@@ -0,0 +1,65 @@
+import asyncio
+
+import numpy as np
+
+import video_transform_track
+from frame_ring import FrameSlot
+
+
+class _Pool:
+    """Session "owner" waits for its own busy instance, everyone else gets one right away"""
+
+    def __init__(self):
+        self.released = []
+
+    async def acquire(self, tier, session_id=None):
+        if session_id == "owner":
+            await asyncio.Event().wait()
+        return object(), False
+
+    def release(self, instance, tier):
+        self.released.append(instance)
+
+
+def _slot(session_id):
+    slot = FrameSlot.standalone(np.zeros((4, 4, 3), dtype=np.uint8))
+    slot.session_id = session_id
+    return slot
+
+
+def test_frame_waiting_for_its_own_instance_does_not_hold_a_slot(monkeypatch):
+    monkeypatch.setattr(video_transform_track, "_mediapipe_pool", _Pool())
+    monkeypatch.setattr(video_transform_track, "_detect", lambda holistic, slot, reset: {"timings": {}})
+
+    async def run():
+        monkeypatch.setattr(video_transform_track, "_prediction_slots", asyncio.Semaphore(1))
+        waiting = asyncio.create_task(video_transform_track.predict_frame(_slot("owner")))
+        await asyncio.sleep(0)
+        try:
+            return await asyncio.wait_for(video_transform_track.predict_frame(_slot("other")), 1)
+        finally:
+            waiting.cancel()
+
+    assert asyncio.run(run()) is not None
+
+
+def test_track_keeps_the_first_source_it_is_bound_to():
+    class _Source:
+        def __init__(self, name):
+            self.name = name
+
+        async def recv(self):
+            return self.name
+
+    async def run():
+        track = video_transform_track.VideoTransformTrack(session_id="bound")
+        try:
+            waiting = asyncio.create_task(track._next_source_frame())
+            await asyncio.sleep(0)
+            track.bind(_Source("first"))
+            track.bind(_Source("second"))
+            return await waiting
+        finally:
+            await track._stopVideoTransformTrack()
+
+    assert asyncio.run(run()) == "first"
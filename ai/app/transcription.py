@@ -0,0 +1,397 @@
+"""
+Offline transcription of recorded videos into timestamped signs.
+
+A job's video is split into TRANSCRIPTION_SEGMENT_SECONDS segments that worker
+processes (one per core by default) decode with PyAV and run through the
+landmark model and the sign classifier; the per-frame probabilities are then
+smoothed in order by the same SignRecognizer the live sessions use.
+Extracted landmarks and hand crops go to the LandmarkCache, a video that was
+transcribed before only runs through the classifier again.
+
+Everything a job produces lives in TRANSCRIPTION_DIR/<job id>/: job.json
+(status, progress), result.json once it is done, and the uploaded video.
+"""
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import av
+import numpy as np
+
+from config import (
+    LANDMARK_TIER,
+    TRANSCRIPTION_DIR,
+    TRANSCRIPTION_INPUT_DIR,
+    TRANSCRIPTION_WORKERS,
+)
+from constant.main import (
+    AUTO_LANDMARK_TIERS,
+    TRANSCRIPTION_CHUNK_FRAMES,
+    TRANSCRIPTION_FPS,
+    TRANSCRIPTION_MAX_SIDE,
+    TRANSCRIPTION_MAX_UPLOAD_MB,
+    TRANSCRIPTION_SEGMENT_SECONDS,
+    TRANSCRIPTION_UPLOAD_WRITE_BYTES,
+)
+from helpers.mediapipe_utils import create_landmark_model, detect_landmarks, frame_to_rgb
+from landmark_cache import LandmarkCache, SegmentArrays, extraction_config, file_hash
+from sign_classifier import (
+    SignRecognizer,
+    create_classifier,
+    extract_hand_crop,
+    load_sign_classifier,
+)
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Per worker process, set up by _init_worker (the landmark model only once a segment misses the cache)
+_worker_tier = None
+_worker_model = None
+_worker_classifier = None
+_worker_cache = None
+
+
+def _init_worker(tier):
+    global _worker_tier, _worker_classifier, _worker_cache
+    _worker_tier = tier
+    _worker_classifier = create_classifier()
+    _worker_cache = LandmarkCache()
+
+
+def _extract_segment(path, start, end, fps):
+    """Columnar landmarks and hand crops of [start, end) seconds of the video, sampled every 1/fps seconds"""
+    global _worker_model
+    if _worker_model is None:
+        _worker_model = create_landmark_model(_worker_tier)
+
+    step = 1.0 / fps
+    segment = SegmentArrays()
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        if start > 0:
+            # Lands on the keyframe before start, frames up to start are decoded and skipped
+            container.seek(int(start / stream.time_base), stream=stream)
+
+        next_time = start
+        for frame in container.decode(stream):
+            t = frame.time
+            if t is None or t < next_time:
+                continue
+            if t >= end:
+                break
+            next_time += step * (math.floor((t - next_time) / step) + 1)
+
+            img = frame_to_rgb(frame, None, TRANSCRIPTION_MAX_SIDE)
+            landmarks = detect_landmarks(img, _worker_model, None, TRANSCRIPTION_MAX_SIDE)
+            segment.append(t, landmarks, extract_hand_crop(img, landmarks))
+    return segment.to_arrays()
+
+
+def _transcribe_segment(path, start, end, fps, cache_key):
+    """
+    Per-frame class probabilities (None = no hand) of [start, end) seconds of the video
+    and whether its landmarks came from the cache. Runs in a worker process.
+    """
+    arrays = _worker_cache.get(cache_key)
+    cached = arrays is not None
+    if not cached:
+        arrays = _extract_segment(path, start, end, fps)
+        _worker_cache.put(cache_key, arrays)
+    return _classify_segment(arrays, _worker_classifier), cached
+
+
+def _classify_segment(arrays, classifier):
+    """(time, probabilities or None) per row of a segment's arrays"""
+    # Classified from the stored uint8 crops either way, cached and fresh runs give the same result
+    probabilities = [None] * len(arrays["times"])
+    with_crop = np.flatnonzero(arrays["has_crop"])
+    for chunk in range(0, len(with_crop), TRANSCRIPTION_CHUNK_FRAMES):
+        rows = with_crop[chunk : chunk + TRANSCRIPTION_CHUNK_FRAMES]
+        crops = arrays["crops"][rows].astype(np.float32) / 255.0
+        for row, p in zip(rows, classifier.predict_batch(crops)):
+            probabilities[row] = p
+    return list(zip(arrays["times"].tolist(), probabilities))
+
+
+def _classify_cached(cached_segments):
+    """Fully cached job: no worker processes, only this process' classifier runs"""
+    classifier = load_sign_classifier()
+    if classifier is None:
+        raise RuntimeError("sign classifier failed to load")
+    return [(_classify_segment(arrays, classifier), True) for arrays in cached_segments]
+
+
+def _probe_duration(path):
+    """Video length in seconds, None if the container does not say"""
+    with av.open(path) as container:
+        if not container.streams.video:
+            raise ValueError("no video stream")
+        stream = container.streams.video[0]
+        if stream.duration is not None:
+            return float(stream.duration * stream.time_base)
+        if container.duration is not None:
+            return container.duration / av.time_base
+    return None
+
+
+def _write_json(path, data):
+    """Write-then-rename, a crash never leaves half a file behind"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class TranscriptionJobs:
+    """
+    Job queue for offline transcription, persisted on disk.
+
+    Jobs run one after another, each one spread over every worker process;
+    the worker processes are started for the first job and stopped once the
+    queue is empty. Jobs that were queued or running when the server stopped
+    are queued again on start().
+    """
+
+    def __init__(self, root=TRANSCRIPTION_DIR, workers=TRANSCRIPTION_WORKERS):
+        self.root = root
+        self.workers = max(workers, 1)
+        self._jobs = {}
+        self._queue = asyncio.Queue()
+        self._runner = None
+        self._executor = None
+        self._cache = LandmarkCache()
+
+    def start(self):
+        """Load jobs from disk and re-queue unfinished ones"""
+        os.makedirs(self.root, exist_ok=True)
+        for job_id in sorted(os.listdir(self.root)):
+            try:
+                with open(os.path.join(self.root, job_id, "job.json")) as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                continue
+            self._jobs[job_id] = job
+            if job["status"] in (QUEUED, RUNNING):
+                job["status"] = QUEUED
+                self._queue.put_nowait(job_id)
+        if not self._queue.empty():
+            logger.info("🔄 Resuming %s transcription jobs", self._queue.qsize())
+            self._ensure_runner()
+
+    def get(self, job_id):
+        """Job status as served by the API (the video's location on disk stays internal)"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        return {key: value for key, value in job.items() if key != "path"}
+
+    def result_path(self, job_id):
+        return os.path.join(self.root, job_id, "result.json")
+
+    def submit_path(self, path):
+        """Queue a video that is already on this host, it has to be inside TRANSCRIPTION_INPUT_DIR"""
+        if not TRANSCRIPTION_INPUT_DIR:
+            raise PermissionError("transcribing local files is disabled (TRANSCRIPTION_INPUT_DIR)")
+        allowed = os.path.realpath(TRANSCRIPTION_INPUT_DIR)
+        real_path = os.path.realpath(os.path.join(allowed, path))
+        if os.path.commonpath([allowed, real_path]) != allowed:
+            raise PermissionError(f"{path} is outside TRANSCRIPTION_INPUT_DIR")
+        if not os.path.isfile(real_path):
+            raise FileNotFoundError(path)
+        return self.submit_file(real_path)
+
+    async def submit_upload(self, chunks, filename):
+        """Store an uploaded video (async iterator of byte chunks) and queue it"""
+        loop = asyncio.get_running_loop()
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.root, job_id)
+        os.makedirs(job_dir)
+        extension = os.path.splitext(os.path.basename(filename or ""))[1][:16]
+        path = os.path.join(job_dir, f"input{extension}")
+        limit = TRANSCRIPTION_MAX_UPLOAD_MB * 1024**2
+        size = 0
+        try:
+            # Disk writes go to the default executor, a slow disk must not stall signaling and frames
+            f = await loop.run_in_executor(None, open, path, "wb")
+            try:
+                pending = bytearray()
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > limit:
+                        raise ValueError(f"upload exceeds {TRANSCRIPTION_MAX_UPLOAD_MB} MB")
+                    pending += chunk
+                    if len(pending) >= TRANSCRIPTION_UPLOAD_WRITE_BYTES:
+                        await loop.run_in_executor(None, f.write, pending)
+                        pending = bytearray()
+                if pending:
+                    await loop.run_in_executor(None, f.write, pending)
+            finally:
+                await loop.run_in_executor(None, f.close)
+            if size == 0:
+                raise ValueError("empty upload")
+        except BaseException:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        return self.submit_file(path, filename or os.path.basename(path), job_id)
+
+    def submit_file(self, path, source=None, job_id=None):
+        """Queue a video by path without any checks, for trusted callers (the API goes through submit_path)"""
+        source = source or os.path.basename(path)
+        job_id = job_id or uuid.uuid4().hex
+        os.makedirs(os.path.join(self.root, job_id), exist_ok=True)
+        job = {
+            "id": job_id,
+            "status": QUEUED,
+            "source": source,
+            "path": path,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "progress": {"segments_done": 0, "segments": None},
+            "error": None,
+        }
+        self._jobs[job_id] = job
+        self._save(job)
+        self._queue.put_nowait(job_id)
+        self._ensure_runner()
+        logger.info("📼 Transcription job %s queued (%s)", job_id, source)
+        return self.get(job_id)
+
+    def _save(self, job):
+        _write_json(os.path.join(self.root, job["id"], "job.json"), job)
+
+    async def _save_async(self, job):
+        """_save off the event loop, a running job is saved after every segment"""
+        await asyncio.get_running_loop().run_in_executor(None, self._save, job)
+
+    def _ensure_runner(self):
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run_queue())
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._tier(),),
+            )
+        return self._executor
+
+    @staticmethod
+    def _tier():
+        return AUTO_LANDMARK_TIERS[0][0] if LANDMARK_TIER == "auto" else LANDMARK_TIER
+
+    async def _run_queue(self):
+        try:
+            while not self._queue.empty():
+                job = self._jobs[self._queue.get_nowait()]
+                try:
+                    await self._run(job)
+                except Exception as e:
+                    logger.error("❌ Transcription job %s failed: %s", job["id"], e)
+                    job["status"] = FAILED
+                    job["error"] = str(e)
+                job["finished_at"] = time.time()
+                await self._save_async(job)
+        finally:
+            # Worker processes hold a model each, they are not kept around between batches of jobs
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    async def _run(self, job):
+        loop = asyncio.get_running_loop()
+        job["status"] = RUNNING
+        job["started_at"] = time.time()
+        # A job resumed by start() runs every segment again (cached ones are cheap), count them again too
+        job["progress"]["segments_done"] = 0
+        await self._save_async(job)
+        logger.info("▶️ Transcription job %s started", job["id"])
+
+        duration = await loop.run_in_executor(None, _probe_duration, job["path"])
+        if duration is None:
+            segments = [(0.0, math.inf)]
+        else:
+            count = max(math.ceil(duration / TRANSCRIPTION_SEGMENT_SECONDS), 1)
+            segments = [
+                (i * TRANSCRIPTION_SEGMENT_SECONDS, (i + 1) * TRANSCRIPTION_SEGMENT_SECONDS)
+                for i in range(count)
+            ]
+            segments[-1] = (segments[-1][0], math.inf)  # whatever is past the reported duration
+        job["progress"]["segments"] = len(segments)
+        await self._save_async(job)
+
+        video_hash = await loop.run_in_executor(None, file_hash, job["path"])
+        config = extraction_config(self._tier(), TRANSCRIPTION_FPS, TRANSCRIPTION_MAX_SIDE)
+        keys = [LandmarkCache.key(video_hash, config, start, end) for start, end in segments]
+        # Cache lookups map the arrays and touch the entries, file I/O kept off the loop too
+        cached_segments = await loop.run_in_executor(None, lambda: [self._cache.get(key) for key in keys])
+        if all(arrays is not None for arrays in cached_segments):
+            segment_results = await loop.run_in_executor(None, _classify_cached, cached_segments)
+            job["progress"]["segments_done"] = len(segments)
+        else:
+            executor = self._get_executor()
+            futures = [
+                asyncio.wrap_future(
+                    executor.submit(
+                        _transcribe_segment, job["path"], start, end, TRANSCRIPTION_FPS, key
+                    )
+                )
+                for (start, end), key in zip(segments, keys)
+            ]
+            for finished in asyncio.as_completed(futures):
+                await finished
+                job["progress"]["segments_done"] += 1
+                await self._save_async(job)
+            segment_results = [future.result() for future in futures]
+
+        rows = [row for segment_rows, _ in segment_results for row in segment_rows]
+        rows.sort(key=lambda row: row[0])
+        recognizer = SignRecognizer()
+        signs = []
+        for t, probabilities in rows:
+            sign = recognizer.update(probabilities)
+            if sign is not None:
+                signs.append({"time": round(t, 3), **sign})
+
+        elapsed = time.time() - job["started_at"]
+        result = {
+            "id": job["id"],
+            "source": job["source"],
+            "duration": duration,
+            "fps": TRANSCRIPTION_FPS,
+            "frames": len(rows),
+            "frames_with_hand": sum(1 for _, p in rows if p is not None),
+            "cached_segments": sum(1 for _, cached in segment_results if cached),
+            "signs": signs,
+            "text": "".join(sign["label"] for sign in signs),
+            "elapsed_seconds": round(elapsed, 2),
+            "realtime_factor": round(duration / elapsed, 2) if duration and elapsed else None,
+        }
+        await loop.run_in_executor(None, _write_json, self.result_path(job["id"]), result)
+        job["status"] = DONE
+        logger.info("✅ Transcription job %s done: %s signs in %.1fs", job["id"], len(signs), elapsed)
+
+
+_transcription_jobs = None
+
+
+def get_transcription_jobs():
+    global _transcription_jobs
+    if _transcription_jobs is None:
+        _transcription_jobs = TranscriptionJobs()
+    return _transcription_jobs
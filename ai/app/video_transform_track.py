@@ -1,32 +1,61 @@
-import cv2
-import mediapipe as mp
 from aiortc import MediaStreamTrack
+from aiortc.mediastreams import MediaStreamError
 from av import VideoFrame
 import asyncio
+import time
 from concurrent.futures import ThreadPoolExecutor
 import threading
-import queue
 from constant.main import (
     MAX_INFERENCE_WORKERS,
-    PROCESS_EVERY_N_FRAMES,
-    MAX_PARALLEL_TASKS,
+    MIN_MEDIAPIPE_INSTANCES,
+    WARM_SPARE_INSTANCES,
+    POOL_ACQUIRE_TIMEOUT_SECONDS,
+    FRAME_RING_SLOTS,
+    DEGRADED_MAX_INFERENCE_FPS,
+    MAX_INFERENCE_FPS,
+    AUTO_LANDMARK_TIERS,
+    OVERLOADED_LANDMARK_TIER,
+    DEGRADED_LANDMARK_TIER,
 )
+from config import INFERENCE_BACKEND, OUTPUT_MODE, LANDMARK_TIER
+from inference_scheduler import InferenceScheduler
+from inference_process_pool import ProcessInferencePool
+from mediapipe_pool import MediaPipePool
+from frame_ring import FrameRing, FrameSlot
+from sign_classifier import SignRecognizer, classify_crops, extract_hand_crop
+from frame_sampler import AdaptiveSampler
+from landmark_tracker import LandmarkTracker
+from roi_tracker import RoiTracker
+from helpers.mediapipe_utils import (
+    LANDMARK_TIERS,
+    detect_landmarks,
+    frame_to_rgb,
+)
+from overlay_renderer import choose_overlay_detail, draw_overlay, draw_overlay_nv12
 import gc
-# Pool configuration
-
-inference_semaphore = asyncio.Semaphore(MAX_PARALLEL_TASKS)
+import logging
+import logs
+import metrics
+import weakref
+import numpy as np
+logger = logging.getLogger(__name__)
 
-mp_holistic = mp.solutions.holistic
-mp_drawing = mp.solutions.drawing_utils
-mp_face_mesh = mp.solutions.face_mesh
+# Pool configuration
 
 # GLOBAL SHARED RESOURCES (thread-safe)
 _global_executor = None
+_inference_scheduler = None
 
-# Pre-allocated MediaPipe Pool
+# Elastic MediaPipe pool (thread backend), predictions wait for an executor thread first
 _mediapipe_pool = None
+_prediction_slots = None
 _pool_lock = threading.Lock()
-_pool_initialized = False
+
+# Worker processes, used instead of the pool above when INFERENCE_BACKEND == "process"
+_process_pool = None
+
+# Tracks that are still running, read by admission control
+_live_tracks = weakref.WeakSet()
 
 
 def get_global_executor():
@@ -38,149 +67,284 @@ def get_global_executor():
     return _global_executor
 
 
-def initialize_mediapipe_pool():
-    """Initialize the pre-allocated MediaPipe pool"""
-    global _mediapipe_pool, _pool_initialized
-
-    if _pool_initialized:
-        return
-
-    with _pool_lock:
-        if _pool_initialized:  # Double-check locking
-            return
-
-        _mediapipe_pool = queue.Queue(maxsize=MAX_INFERENCE_WORKERS)
-
-        # Pre-allocate MediaPipe instances
-        for i in range(MAX_INFERENCE_WORKERS):
-            try:
-                holistic = mp_holistic.Holistic(
-                    min_detection_confidence=0.5, min_tracking_confidence=0.5
-                )
-                _mediapipe_pool.put(holistic)
-                print(f"✅ Created MediaPipe instance {i+1}/{MAX_INFERENCE_WORKERS}")
-            except Exception as e:
-                print(f"❌ Failed to create MediaPipe instance {i+1}: {e}")
-                break
-
-        _pool_initialized = True
-        print(f"🎉 MediaPipe pool initialized with {_mediapipe_pool.qsize()} instances")
+def get_process_pool():
+    global _process_pool
+    if _process_pool is None:
+        with _pool_lock:
+            if _process_pool is None:
+                _process_pool = ProcessInferencePool(MAX_INFERENCE_WORKERS, default_landmark_tier())
+    return _process_pool
+
+
+def get_inference_scheduler():
+    global _inference_scheduler
+    if _inference_scheduler is None:
+        if INFERENCE_BACKEND == "process":
+            predict_fn = get_process_pool().predict
+        else:
+            predict_fn = predict_frame
+        _inference_scheduler = InferenceScheduler(
+            predict_fn, get_global_executor, classify_fn=classify_crops
+        )
+    return _inference_scheduler
 
 
-def get_mediapipe_instance():
-    """Get a MediaPipe instance from the pool (blocking)"""
-    if not _pool_initialized:
+def get_mediapipe_pool():
+    global _mediapipe_pool
+    if _mediapipe_pool is None:
+        with _pool_lock:
+            if _mediapipe_pool is None:
+                _mediapipe_pool = MediaPipePool()
+    return _mediapipe_pool
+
+
+def get_prediction_slots():
+    """One slot per executor thread, frames wait here (asynchronously) rather than in a thread"""
+    global _prediction_slots
+    if _prediction_slots is None:
+        _prediction_slots = asyncio.Semaphore(MAX_INFERENCE_WORKERS)
+    return _prediction_slots
+
+
+def initialize_inference_backend():
+    """
+    Start the configured backend ahead of the first frame (blocking, call from a thread):
+    worker processes with their models loaded, or the pool's first instances.
+    """
+    if INFERENCE_BACKEND == "process":
+        logger.info("🔄 Starting MediaPipe worker processes...")
+        get_process_pool()
+    else:
+        logger.info("🔄 Initializing MediaPipe pool...")
         initialize_mediapipe_pool()
 
-    try:
-        # Get instance from pool (blocks if empty)
-        return _mediapipe_pool.get(timeout=5.0)
-    except queue.Empty:
-        print("⚠️ MediaPipe pool exhausted, creating temporary instance")
-        try:
-            temp_instance = mp_holistic.Holistic(
-                min_detection_confidence=0.5, min_tracking_confidence=0.5
-            )
-            return temp_instance
-        except Exception as e:
-            print(f"❌ Failed to create temporary MediaPipe: {e}")
-            return None
 
+def initialize_mediapipe_pool(tier=None):
+    """Create the pool's minimum and warm spare instances of a tier (the deployment's default if None)"""
+    tier = tier or default_landmark_tier()
+    pool = get_mediapipe_pool()
+    pool.prewarm(tier, MIN_MEDIAPIPE_INSTANCES + WARM_SPARE_INSTANCES)
+    logger.info("🎉 MediaPipe pool initialized with %s instances", pool.size())
+
+
+def default_landmark_tier():
+    """Tier configured for this deployment, the most accurate automatic one for "auto" """
+    if LANDMARK_TIER == "auto":
+        return AUTO_LANDMARK_TIERS[0][0]
+    return LANDMARK_TIER
+
+
+def choose_landmark_tier(load, degraded=False):
+    """Landmark tier for a new session, only varies with the load when LANDMARK_TIER is "auto" """
+    if LANDMARK_TIER != "auto":
+        return LANDMARK_TIER
+
+    tier = OVERLOADED_LANDMARK_TIER
+    for candidate, ceiling in AUTO_LANDMARK_TIERS:
+        if load < ceiling:
+            tier = candidate
+            break
+    if degraded:
+        # Tiers are ordered most accurate first, degraded sessions get at most the capped one
+        tier = LANDMARK_TIERS[
+            max(LANDMARK_TIERS.index(tier), LANDMARK_TIERS.index(DEGRADED_LANDMARK_TIER))
+        ]
+    return tier
+
+
+def release_session_instance(session_id):
+    """Let another session claim the MediaPipe instance (or worker) the session was tracking on"""
+    if INFERENCE_BACKEND == "process":
+        if _process_pool is not None:
+            _process_pool.drop_session(session_id)
+    elif _mediapipe_pool is not None:
+        _mediapipe_pool.drop_session(session_id)
+
+
+def get_inference_load():
+    """0..1 busy estimate of the shared inference resources (pool usage, queued sessions)"""
+    status = get_pool_status()
+    load = status.get("in_use", 0) / max(status.get("capacity", status["total"]), 1)
+    if _inference_scheduler is not None:
+        scheduler_status = _inference_scheduler.get_status()
+        load = max(
+            load,
+            scheduler_status["pending_sessions"] / scheduler_status["max_batch_size"],
+        )
+    return load
 
-def return_mediapipe_instance(instance):
-    """Return a MediaPipe instance to the pool"""
-    if instance is None:
-        return
 
-    try:
-        # Only return to pool if there's space (don't block)
-        _mediapipe_pool.put_nowait(instance)
-    except queue.Full:
-        # Pool is full, this might be a temporary instance
-        try:
-            instance.close()
-        except Exception as e:
-            print(f"⚠️ Error closing MediaPipe instance: {e}")
+def get_session_rates():
+    """
+    Current inference rate (fps) the sampler grants each live session admitted at full
+    rate. Degraded sessions are capped at DEGRADED_MAX_INFERENCE_FPS, their rate says
+    nothing about how starved the worker is.
+    """
+    return [
+        track._sampler.get_stats()["target_fps"] for track in list(_live_tracks) if not track._degraded
+    ]
 
 
 def get_pool_status():
     """Get current pool status for monitoring"""
-    if not _pool_initialized or _mediapipe_pool is None:
+    if INFERENCE_BACKEND == "process":
+        if _process_pool is None:
+            return {"available": 0, "total": MAX_INFERENCE_WORKERS, "initialized": False}
+        return _process_pool.get_status()
+
+    if _mediapipe_pool is None:
         return {"available": 0, "total": MAX_INFERENCE_WORKERS, "initialized": False}
 
-    return {
-        "available": _mediapipe_pool.qsize(),
-        "total": MAX_INFERENCE_WORKERS,
-        "initialized": True,
-        "in_use": MAX_INFERENCE_WORKERS - _mediapipe_pool.qsize(),
-    }
-
-
-def mediapipe_detection(image, model):
-    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    image_rgb.flags.writeable = False
-    results = model.process(image_rgb)
-    image_rgb.flags.writeable = True
-    return cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR), results
-
-
-def draw_styled_landmarks(image, results):
-    if results.face_landmarks:
-        mp_drawing.draw_landmarks(
-            image,
-            results.face_landmarks,
-            mp_face_mesh.FACEMESH_TESSELATION,
-            mp_drawing.DrawingSpec(color=(80, 110, 10), thickness=1, circle_radius=1),
-            mp_drawing.DrawingSpec(color=(80, 256, 121), thickness=1, circle_radius=1),
-        )
-    if results.pose_landmarks:
-        mp_drawing.draw_landmarks(
-            image,
-            results.pose_landmarks,
-            mp_holistic.POSE_CONNECTIONS,
-            mp_drawing.DrawingSpec(color=(80, 22, 10), thickness=2, circle_radius=4),
-            mp_drawing.DrawingSpec(color=(80, 44, 121), thickness=2, circle_radius=2),
-        )
-    if results.left_hand_landmarks:
-        mp_drawing.draw_landmarks(
-            image,
-            results.left_hand_landmarks,
-            mp_holistic.HAND_CONNECTIONS,
-            mp_drawing.DrawingSpec(color=(121, 22, 76), thickness=2, circle_radius=4),
-            mp_drawing.DrawingSpec(color=(121, 44, 250), thickness=2, circle_radius=2),
+    # The pool may hold more instances than can run at once (spares, other tiers),
+    # the load is measured against the executor threads
+    return {**_mediapipe_pool.get_status(), "capacity": MAX_INFERENCE_WORKERS}
+
+
+def _detect(holistic, slot, reset):
+    """Landmarks and hand crop of the slot's frame, runs on an executor thread"""
+    img = slot.array
+    started = time.perf_counter()
+    if reset:
+        holistic.reset()  # last ran another session's frame, drop its tracking state
+    landmarks = detect_landmarks(img, holistic, slot.roi, slot.max_side)
+    timings = {"mediapipe": time.perf_counter() - started}
+    hand_crop = extract_hand_crop(img, landmarks)
+    return {"landmarks": landmarks, "hand_crop": hand_crop, "timings": timings}
+
+
+async def predict_frame(slot):
+    """Prediction on a pooled MediaPipe instance, returns landmarks and hand crop (None on failure)"""
+    pool = get_mediapipe_pool()
+    started = time.perf_counter()
+    # The instance before the shared slot: a session waiting for its own busy instance
+    # must not hold a slot other sessions' frames could run in
+    try:
+        holistic, reset = await asyncio.wait_for(
+            pool.acquire(slot.tier, slot.session_id), POOL_ACQUIRE_TIMEOUT_SECONDS
         )
-    if results.right_hand_landmarks:
-        mp_drawing.draw_landmarks(
-            image,
-            results.right_hand_landmarks,
-            mp_holistic.HAND_CONNECTIONS,
-            mp_drawing.DrawingSpec(color=(245, 117, 66), thickness=2, circle_radius=4),
-            mp_drawing.DrawingSpec(color=(245, 66, 230), thickness=2, circle_radius=2),
+    except asyncio.TimeoutError:
+        logs.log_limited(
+            logger, logging.WARNING, ("no_instance", slot.session_id),
+            "⚠️ No MediaPipe %s instance available, skipping frame", slot.tier,
+            extra={"session": slot.session_id},
         )
+        return None
+
+    try:
+        async with get_prediction_slots():
+            waited = time.perf_counter() - started
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    get_global_executor(), _detect, holistic, slot, reset
+                )
+            except Exception as e:
+                # Per frame: a broken instance or bad input would otherwise log at the frame rate
+                logs.log_limited(
+                    logger, logging.ERROR, ("prediction_error", slot.session_id), "MediaPipe prediction error: %s", e,
+                    extra={"session": slot.session_id},
+                )
+                return None
+    finally:
+        # Always return instance to pool
+        pool.release(holistic, slot.tier)
+
+    result["timings"]["pool_wait"] = waited
+    return result
 
 
 class VideoTransformTrack(MediaStreamTrack):
+    """
+    Processed echo of a remote video track.
+
+    output_mode "annotated" sends back every incoming frame with the most
+    recent landmarks drawn on it (see LandmarkTracker), so the video keeps the
+    source frame rate while inference runs at the sampler's lower rate.
+    "landmarks" forwards the incoming frames untouched and leaves drawing to
+    the browser (results go out through on_result, e.g. to a data channel).
+    Degraded sessions (see admission.py) are sampled at DEGRADED_MAX_INFERENCE_FPS at most.
+    The landmark tier is fixed for the session (see choose_landmark_tier).
+
+    The source can be bound late (bind()), so the track is added to the peer
+    connection and the answer sent before the remote track shows up; recv()
+    waits for the source. A track serves one peer connection, every offer
+    (including a renegotiation) gets a new session and track.
+    """
+
     kind = "video"
 
-    def __init__(self, track):
+    def __init__(
+        self, track=None, session_id=None, output_mode=OUTPUT_MODE, on_result=None, degraded=False
+    ):
         super().__init__()
-        self._track = track
-        self._counter = 0
-        self._latest_result = None
+        self._track = None
+        self._source_bound = asyncio.Event()
+        self._session_id = session_id or self.id
+        self._annotate = output_mode == "annotated"
+        self._on_result = on_result  # called as on_result(session_id, result, pts)
+        self._recognizer = SignRecognizer()
+        self._sampler = AdaptiveSampler(
+            load_fn=get_inference_load,
+            max_fps=DEGRADED_MAX_INFERENCE_FPS if degraded else MAX_INFERENCE_FPS,
+        )
+        self._landmarks = LandmarkTracker()
+        self._roi = RoiTracker()
+        self._tier = choose_landmark_tier(get_inference_load(), degraded)
+        self._degraded = degraded
+        self._overlay_detail = choose_overlay_detail(get_inference_load(), degraded)
+        self._has_result = False
+        self._ring = None
         self._tasks = set()
         self._stopped = False
+        self.last_frame_at = None  # monotonic time the source last delivered a frame
+        _live_tracks.add(self)
+        if track is not None:
+            self.bind(track)
+
+    def bind(self, track):
+        """Use track as the source, an offer with several videos echoes the first one"""
+        if self._track is not None:
+            return
+        self._track = track
+        self._source_bound.set()
+
+    async def _next_source_frame(self):
+        while self._track is None:
+            if self._stopped:
+                raise MediaStreamError
+            await self._source_bound.wait()
+        return await self._track.recv()
 
     async def recv(self):
-        frame = await self._track.recv()
-        img = frame.to_ndarray(format="bgr24")
-        self._counter += 1
+        frame = await self._next_source_frame()
+        frame_time = self._frame_time(frame)
+        self.last_frame_at = time.monotonic()
 
         should_schedule = (
-            self._counter % PROCESS_EVERY_N_FRAMES == 0 or self._latest_result is None
-        ) and not self._stopped and len(self._tasks) < MAX_INFERENCE_WORKERS 
+            not self._stopped
+            and len(self._tasks) < MAX_INFERENCE_WORKERS
+            and self._sampler.should_sample(frame, time.monotonic(), self._has_result)
+        )
+        landmarks = self._landmarks.at(frame_time) if self._annotate else None
 
         if should_schedule:
-            task = asyncio.create_task(self._schedule_prediction(img.copy()))
+            # One swscale pass from the decoded frame to the model's (downscaled) rgb24 input
+            started = time.perf_counter()
+            roi = self._roi.box
+            load = get_inference_load()
+            max_side = self._roi.input_side(load)
+            # Drawing follows the same load, the overlay gets simpler before frames run late
+            self._overlay_detail = choose_overlay_detail(load, self._degraded)
+            img = frame_to_rgb(frame, roi, max_side)
+            metrics.observe("decode", time.perf_counter() - started, self._session_id)
+
+            slot = self._to_slot(img, frame)
+            slot.roi = roi
+            slot.max_side = max_side
+            slot.tier = self._tier
+            slot.session_id = self._session_id
+            task = asyncio.create_task(
+                self._schedule_prediction(slot, frame.pts, frame_time)
+            )
             self._tasks.add(task)
 
             def _done_cb(t: asyncio.Task):
@@ -188,45 +352,101 @@ class VideoTransformTrack(MediaStreamTrack):
 
             task.add_done_callback(_done_cb)
 
-
-        output = self._latest_result if self._latest_result is not None else img
-        new_frame = VideoFrame.from_ndarray(output, format="bgr24")
+        if landmarks is None:
+            # Browser draws the landmarks itself, or nothing recent enough to draw:
+            # the decoded frame goes out untouched
+            return frame
+        return self._composite(frame, landmarks)
+
+    def _composite(self, frame, landmarks):
+        """Outgoing frame with the landmarks drawn on it, in nv12 unless the size is odd"""
+        nv12 = frame.width % 2 == 0 and frame.height % 2 == 0
+        started = time.perf_counter()
+        img = frame.to_ndarray(format="nv12" if nv12 else "bgr24")
+        metrics.observe("decode", time.perf_counter() - started, self._session_id)
+
+        started = time.perf_counter()
+        if nv12:
+            draw_overlay_nv12(img, frame.width, frame.height, landmarks, self._overlay_detail)
+        else:
+            draw_overlay(img, landmarks, self._overlay_detail)
+        metrics.observe("draw", time.perf_counter() - started, self._session_id)
+
+        started = time.perf_counter()
+        new_frame = VideoFrame.from_ndarray(img, format="nv12" if nv12 else "bgr24")
+        metrics.observe("encode", time.perf_counter() - started, self._session_id)
         new_frame.pts = frame.pts
         new_frame.time_base = frame.time_base
         return new_frame
 
-    async def _schedule_prediction(self, img):
-        async with inference_semaphore:
-            loop = asyncio.get_running_loop()
-            result = await loop.run_in_executor(
-                get_global_executor(), self._sync_predict, img
-            )
-            if result is not None:
-                self._latest_result = result
-
-    def _sync_predict(self, img):
-        """Thread-safe prediction using pool-based MediaPipe instances"""
-        holistic = None
+    @staticmethod
+    def _frame_time(frame):
+        """Source timestamp of the frame in seconds, results are aligned on it"""
+        if frame.pts is None or frame.time_base is None:
+            return time.monotonic()
+        return float(frame.pts * frame.time_base)
+
+    def _to_slot(self, img, frame):
+        """Hand the decoded frame to inference without copying it more than once"""
+        if INFERENCE_BACKEND != "process":
+            # Decoded array is fresh and only read afterwards
+            return FrameSlot.standalone(img)
+
+        height, width = img.shape[:2]
+        if self._ring is None:
+            # Sized for the full frame, the scaled model input varies with ROI and load
+            self._ring = FrameRing(FRAME_RING_SLOTS, frame.height * frame.width * 3)
+        slot = self._ring.acquire(height, width)
+        if slot is None:
+            # Ring exhausted or resolution grew past the slot size
+            return FrameSlot.standalone(img)
+        np.copyto(slot.array, img)
+        return slot
+
+    async def _schedule_prediction(self, slot, pts, frame_time):
+        submitted = time.monotonic()
         try:
-            # Get instance from pool
-            holistic = get_mediapipe_instance()
-            if holistic is None:
-                return img  # Return original frame if no instance available
+            # Batched together with frames from other sessions
+            result = await get_inference_scheduler().submit(self._session_id, slot)
+        finally:
+            # Only landmarks are kept, the frame itself is not needed any more
+            slot.release()
 
-            output_img, results = mediapipe_detection(img, holistic)
-            draw_styled_landmarks(output_img, results)
-            return output_img
+        if result is None or self._stopped:
+            return
 
-        except Exception as e:
-            print(f"MediaPipe prediction error: {e}")
-            return img
-        finally:
-            # Always return instance to pool
-            if holistic is not None:
-                return_mediapipe_instance(holistic)
+        latency = time.monotonic() - submitted
+        self._sampler.on_result(latency)
+        metrics.observe("inference", latency, self._session_id)
+
+        self._has_result = True
+        self._landmarks.update(result["landmarks"], frame_time)
+        self._roi.update(result["landmarks"])
+        if "probabilities" in result:
+            result["sign"] = self._recognizer.update(result["probabilities"])
+        if self._on_result is not None:
+            try:
+                self._on_result(self._session_id, result, pts)
+            except Exception as e:
+                logs.log_limited(
+                    logger, logging.ERROR, ("result_callback", self._session_id), "❌ Result callback error: %s", e,
+                    extra={"session": self._session_id},
+                )
+
+    def memory_bytes(self):
+        """Buffers and results this session holds on to"""
+        held = self._landmarks.nbytes()
+        if self._ring is not None:
+            held += self._ring.slots * self._ring.slot_bytes
+        return held
 
     async def _stopVideoTransformTrack(self):
         self._stopped = True
+        self._source_bound.set()  # recv() still waiting for a source gives up
+        _live_tracks.discard(self)
+        metrics.drop_session(self._session_id)
+        get_inference_scheduler().drop_session(self._session_id)
+        release_session_instance(self._session_id)
         tasks = list(self._tasks)
         for t in tasks:
             t.cancel()
@@ -234,50 +454,47 @@ class VideoTransformTrack(MediaStreamTrack):
             await asyncio.gather(*tasks, return_exceptions=True)
 
         self._tasks.clear()
-        self._latest_result = None
+        self._landmarks.clear()
+        if self._ring is not None:
+            self._ring.close()
+            if _process_pool is not None:
+                _process_pool.detach_ring(self._ring.shm_name)
+            self._ring = None
 
 
 def cleanup_global_resources():
     """Cleanup pre-allocated MediaPipe pool and executor"""
-    global _global_executor, _mediapipe_pool, _pool_initialized
+    global _global_executor, _inference_scheduler, _mediapipe_pool, _prediction_slots
+    global _process_pool
+
+    logger.info("🧹 Starting cleanup of global resources...")
 
-    print("🧹 Starting cleanup of global resources...")
+    # Pending frames are dropped together with the scheduler
+    _inference_scheduler = None
 
     # Cleanup executor
     if _global_executor:
         try:
             _global_executor.shutdown(wait=True)
-            print("✅ ThreadPoolExecutor cleaned up")
+            logger.info("✅ ThreadPoolExecutor cleaned up")
         except Exception as e:
-            print(f"⚠️ ThreadPoolExecutor cleanup error: {e}")
+            logger.warning("⚠️ ThreadPoolExecutor cleanup error: %s", e)
         finally:
             _global_executor = None
 
-    # Cleanup MediaPipe pool
-    cleanup_count = 0
-    if _mediapipe_pool is not None:
-        with _pool_lock:
-            while not _mediapipe_pool.empty():
-                try:
-                    instance = _mediapipe_pool.get_nowait()
-                    instance.close()
-                    cleanup_count += 1
-                except (queue.Empty, Exception) as e:
-                    if not isinstance(e, queue.Empty):
-                        print(f"⚠️ Pool instance cleanup error: {e}")
-                    break
+    # Cleanup worker processes
+    if _process_pool is not None:
+        _process_pool.close()
+        _process_pool = None
+        logger.info("✅ MediaPipe worker processes stopped")
 
+    # Cleanup MediaPipe pool, instances still in use are closed when released
+    cleanup_count = 0
+    with _pool_lock:
+        if _mediapipe_pool is not None:
+            cleanup_count = _mediapipe_pool.close()
             _mediapipe_pool = None
-            _pool_initialized = False
-
-    print(f"✅ Cleaned up {cleanup_count} MediaPipe instances")
-    print("🎉 Global cleanup completed")
-
+        _prediction_slots = None
 
-# Auto-initialize pool on module import
-print("🔄 Auto-initializing MediaPipe pool...")
-initialize_mediapipe_pool()
-print(f"📊 Current instance count: {_mediapipe_pool.qsize() if _mediapipe_pool else 0}")
-print(
-    f"📏 Len pcs: {_mediapipe_pool.qsize() if _mediapipe_pool else 0}"
-)  # User's requested monitoring
+    logger.info("✅ Cleaned up %s MediaPipe instances", cleanup_count)
+    logger.info("🎉 Global cleanup completed")
@@ -0,0 +1,49 @@
+package com.signaro.backend.websocket;
+
+import org.springframework.web.socket.WebSocketSession;
+
+/**
+ * One registered AI worker (a uvicorn worker process of the ai service).
+ * sessions is the worker's own count from its "load" reports, bumped optimistically on routing.
+ */
+public class AiWorker {
+    private final String id;
+    private final WebSocketSession session;
+    private final int capacity;
+    private volatile int sessions;
+
+    public AiWorker(String id, WebSocketSession session, int capacity, int sessions) {
+        this.id = id;
+        this.session = session;
+        this.capacity = capacity;
+        this.sessions = sessions;
+    }
+
+    public String getId() {
+        return id;
+    }
+
+    public WebSocketSession getSession() {
+        return session;
+    }
+
+    public int getCapacity() {
+        return capacity;
+    }
+
+    public int getSessions() {
+        return sessions;
+    }
+
+    public void setSessions(int sessions) {
+        this.sessions = sessions;
+    }
+
+    public boolean hasCapacity() {
+        return sessions < capacity;
+    }
+
+    public double load() {
+        return (double) sessions / Math.max(capacity, 1);
+    }
+}
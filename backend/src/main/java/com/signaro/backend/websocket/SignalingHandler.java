@@ -1,5 +1,6 @@
 package com.signaro.backend.websocket;
 
+import com.fasterxml.jackson.databind.JsonNode;
 import com.fasterxml.jackson.databind.ObjectMapper;
 import com.fasterxml.jackson.databind.node.ObjectNode;
 import org.springframework.stereotype.Component;
@@ -8,18 +9,34 @@ import org.springframework.web.socket.TextMessage;
 import org.springframework.web.socket.WebSocketSession;
 import org.springframework.web.socket.handler.TextWebSocketHandler;
 
+import java.io.IOException;
 import java.util.Arrays;
+import java.util.Comparator;
 import java.util.Map;
 import java.util.concurrent.ConcurrentHashMap;
-import java.util.concurrent.atomic.AtomicReference;
 import java.util.stream.Collectors;
 
+/**
+ * Relays WebRTC signaling between browsers (client=js) and AI workers (client=python).
+ * <p>
+ * Workers register with an id and capacity ({"type":"register","worker","capacity","sessions"})
+ * and report {"type":"load","worker","sessions"} after every offer/close. The first message of a
+ * JS client binds it to the least loaded worker with free capacity; all its later offer/ice/close
+ * messages go to that same worker. A reject from the worker unbinds the client again.
+ */
 @Component
 public class SignalingHandler extends TextWebSocketHandler {
-    private final ConcurrentHashMap<String, WebSocketSession> jsClients = new ConcurrentHashMap<>();
-    private final AtomicReference<WebSocketSession> pythonClient = new AtomicReference<>();
+    private static final int RETRY_AFTER_SECONDS = 10;
 
-    String clientId = "a89das687cz"; // for 1 person, for testing purposes
+    private final ObjectMapper mapper = new ObjectMapper();
+    // clientId (JS websocket session id) -> JS session
+    private final ConcurrentHashMap<String, WebSocketSession> jsClients = new ConcurrentHashMap<>();
+    // workerId -> registered AI worker
+    private final ConcurrentHashMap<String, AiWorker> workers = new ConcurrentHashMap<>();
+    // python websocket session id -> workerId, filled on register
+    private final ConcurrentHashMap<String, String> workerSessions = new ConcurrentHashMap<>();
+    // clientId -> workerId holding the client's peer connection
+    private final ConcurrentHashMap<String, String> routes = new ConcurrentHashMap<>();
 
     @Override
     public void afterConnectionEstablished(WebSocketSession session) throws Exception {
@@ -43,73 +60,146 @@ public class SignalingHandler extends TextWebSocketHandler {
 
 //        ws://localhost:8080/stream?client=python
 //        ws://localhost:8080/stream?client=js&token=1asd21
+        session.getAttributes().put("clientType", clientType);
         if ("python".equals(clientType)) {
-            pythonClient.set(session);
+            // becomes a routable worker once it sends "register"
             System.out.println("Python connected");
         } else {
+            String clientId = session.getId();
             jsClients.put(clientId, session);
             System.out.println("JS client connected: " + clientId);
         }
     }
+
     @Override
     protected void handleTextMessage(WebSocketSession session, TextMessage message) throws Exception {
-        String payload = message.getPayload();
-
-        if (session.equals(pythonClient.get())) {
-            // stream to JS clients
-//            String clientId = extractClientIdFromPayload(payload); // we will have to extract 'to' from payload
-            WebSocketSession jsClient = jsClients.get(clientId);
-            if (jsClient != null && jsClient.isOpen()) {
-                jsClient.sendMessage(new TextMessage(payload));
-            } else {
-                System.out.println("Target JS session not ready yet: " + clientId);
-            }
+        if ("python".equals(session.getAttributes().get("clientType"))) {
+            handleWorkerMessage(session, message.getPayload());
         } else {
-            // stream to python
-            WebSocketSession python = pythonClient.get();
+            handleClientMessage(session.getId(), message.getPayload());
+        }
+    }
+
+    private void handleWorkerMessage(WebSocketSession session, String payload) throws IOException {
+        JsonNode node = mapper.readTree(payload);
+        String type = node.path("type").asText();
+
+        if ("register".equals(type)) {
+            String workerId = node.path("worker").asText();
+            JsonNode sessions = node.path("sessions");
+            AiWorker worker = new AiWorker(workerId, session, node.path("capacity").asInt(1), sessions.size());
+            workers.put(workerId, worker);
+            workerSessions.put(session.getId(), workerId);
+            // a reconnecting worker keeps the clients it still holds
+            sessions.forEach(clientId -> routes.put(clientId.asText(), workerId));
+            System.out.println("AI worker registered: " + workerId + " (capacity " + worker.getCapacity() + ")");
+            return;
+        }
 
-//            String clientId = getClientIdForSession(session);
-            String payloadWithFrom = addFromToPayload(payload, clientId);
+        AiWorker worker = workers.get(workerSessions.getOrDefault(session.getId(), ""));
+        if (worker == null) {
+            System.out.println("Message from unregistered AI worker, ignoring: " + type);
+            return;
+        }
+
+        if ("load".equals(type)) {
+            worker.setSessions(node.path("sessions").asInt());
+            return;
+        }
 
-            if (python != null && python.isOpen()) {
-                python.sendMessage(new TextMessage(payloadWithFrom));
-            } else {
-                System.out.println("Python not connected");
+        String clientId = node.path("to").asText();
+        if ("reject".equals(type)) {
+            routes.remove(clientId);
+        }
+
+        WebSocketSession jsClient = jsClients.get(clientId);
+        if (jsClient != null && jsClient.isOpen()) {
+            send(jsClient, payload);
+        } else {
+            System.out.println("Target JS session not ready yet: " + clientId);
+        }
+    }
+
+    private void handleClientMessage(String clientId, String payload) throws IOException {
+        AiWorker worker = workers.get(routes.getOrDefault(clientId, ""));
+        if (worker == null) {
+            worker = pickWorker();
+            if (worker == null) {
+                System.out.println("No AI worker available for " + clientId);
+                rejectClient(clientId);
+                return;
             }
+            routes.put(clientId, worker.getId());
+            worker.setSessions(worker.getSessions() + 1); // optimistic until the worker reports its load
+            System.out.println("JS client " + clientId + " routed to AI worker " + worker.getId());
+        }
+
+        String payloadWithFrom = addFromToPayload(payload, clientId);
+        if (worker.getSession().isOpen()) {
+            send(worker.getSession(), payloadWithFrom);
+        } else {
+            System.out.println("AI worker not connected: " + worker.getId());
         }
+
+        if ("close".equals(mapper.readTree(payload).path("type").asText())) {
+            routes.remove(clientId);
+        }
+    }
+
+    private AiWorker pickWorker() {
+        return workers.values().stream()
+                .filter(w -> w.getSession().isOpen() && w.hasCapacity())
+                .min(Comparator.comparingDouble(AiWorker::load))
+                .orElse(null);
+    }
+
+    private void rejectClient(String clientId) throws IOException {
+        WebSocketSession jsClient = jsClients.get(clientId);
+        if (jsClient == null || !jsClient.isOpen()) {
+            return;
+        }
+        ObjectNode reject = mapper.createObjectNode();
+        reject.put("type", "reject");
+        reject.put("mode", "reject");
+        reject.put("reason", "no_worker");
+        reject.put("retryAfter", RETRY_AFTER_SECONDS);
+        send(jsClient, mapper.writeValueAsString(reject));
     }
 
     @Override
     public void afterConnectionClosed(WebSocketSession session, CloseStatus status) throws Exception {
-        if (session.equals(pythonClient.get())) {
-            pythonClient.set(null);
+        if ("python".equals(session.getAttributes().get("clientType"))) {
+            String workerId = workerSessions.remove(session.getId());
+            // routes stay, a worker that reconnects lists its sessions again when it registers
+            if (workerId != null && workers.get(workerId) != null
+                    && workers.get(workerId).getSession().equals(session)) {
+                workers.remove(workerId);
+                System.out.println("AI worker disconnected: " + workerId);
+            }
         } else {
-            String disconnectedClientId = findClientIdBySession(session);
-            if (disconnectedClientId != null) {
-                jsClients.remove(disconnectedClientId);
-
-                System.out.println("JS client disconnected: " + clientId + " (session: " + session.getId() + ")");
+            String disconnectedClientId = session.getId();
+            if (jsClients.remove(disconnectedClientId) != null) {
+                System.out.println("JS client disconnected: " + disconnectedClientId);
                 sendCloseNotificationToAI(disconnectedClientId);
-
             }
         }
     }
 
     private void sendCloseNotificationToAI(String clientId) {
-        WebSocketSession python = pythonClient.get();
-        if (python == null || !python.isOpen()) {
-            System.err.println("Cannot send close notification - Python client not connected");
+        AiWorker worker = workers.get(routes.getOrDefault(clientId, ""));
+        routes.remove(clientId);
+        if (worker == null || !worker.getSession().isOpen()) {
+            System.err.println("Cannot send close notification - AI worker for " + clientId + " not connected");
             return;
         }
 
         try {
-            ObjectMapper mapper = new ObjectMapper();
             ObjectNode closeMessage = mapper.createObjectNode();
             closeMessage.put("type", "close");
             closeMessage.put("from", clientId);
 
             String jsonMessage = mapper.writeValueAsString(closeMessage);
-            python.sendMessage(new TextMessage(jsonMessage));
+            send(worker.getSession(), jsonMessage);
 
         } catch (Exception e) {
             System.err.println("Error sending close notification to AI: " + e.getMessage());
@@ -117,18 +207,15 @@ public class SignalingHandler extends TextWebSocketHandler {
         }
     }
 
-    private String findClientIdBySession(WebSocketSession session) {
-        for (Map.Entry<String, WebSocketSession> entry : jsClients.entrySet()) {
-            if (entry.getValue().equals(session)) {
-                return entry.getKey();
-            }
+    // WebSocketSession.sendMessage must not be called concurrently for one session
+    private void send(WebSocketSession session, String payload) throws IOException {
+        synchronized (session) {
+            session.sendMessage(new TextMessage(payload));
         }
-        return null;
     }
 
     public String addFromToPayload(String payload, String clientId) {
         try {
-            ObjectMapper mapper = new ObjectMapper();
             ObjectNode node = (ObjectNode) mapper.readTree(payload);
             node.put("from", clientId);  // add "from" field with clientId
             return mapper.writeValueAsString(node);
@@ -6,10 +6,13 @@ import { Button } from "@/components/ui/shadcn/button";
 import { typography } from "@/components/ui/typography";
 import ContentWrapper from "@/components/ui/ContentWrapper";
 import { cameraSize } from "@/constants/webrtc";
+import { LandmarksMessage } from "@/models/webRtc";
+import LandmarkOverlay from "@/components/WebRTC/LandmarkOverlay";
 
 interface CameraProps {
   localWebcamRef: RefObject<HTMLVideoElement | null>;
   remoteWebcamRef: RefObject<HTMLVideoElement | null>;
+  landmarksRef: RefObject<LandmarksMessage | null>;
   error?: string | null;
   title?: string;
 }
@@ -17,24 +20,32 @@ interface CameraProps {
 const Camera = ({
   localWebcamRef,
   remoteWebcamRef,
+  landmarksRef,
   title,
 }: CameraProps): JSX.Element => {
   return (
     <div>
       <ContentWrapper gap="5px" direction="column">
         <h4 css={typography.textL}>{title || "Local webcam"}</h4>
-        <video
-          ref={localWebcamRef}
-          id="localWebcam"
-          autoPlay
-          playsInline
+        <div
           css={css`
-            border-radius: var(--radius);
-            width: ${cameraSize.width}px;
-            height: ${cameraSize.height}px;
-            background-color: black;
+            position: relative;
           `}
-        ></video>
+        >
+          <video
+            ref={localWebcamRef}
+            id="localWebcam"
+            autoPlay
+            playsInline
+            css={css`
+              border-radius: var(--radius);
+              width: ${cameraSize.width}px;
+              height: ${cameraSize.height}px;
+              background-color: black;
+            `}
+          ></video>
+          <LandmarkOverlay landmarksRef={landmarksRef} />
+        </div>
       </ContentWrapper>
 
       {/* <div
@@ -0,0 +1,81 @@
+import { JSX, RefObject, useEffect, useRef } from "react";
+import { css } from "@emotion/react";
+import { LandmarksMessage } from "@/models/webRtc";
+import {
+  cameraSize,
+  HAND_CONNECTIONS,
+  POSE_CONNECTIONS,
+} from "@/constants/webrtc";
+
+interface LandmarkOverlayProps {
+  landmarksRef: RefObject<LandmarksMessage | null>;
+}
+
+const drawConnections = (
+  ctx: CanvasRenderingContext2D,
+  points: number[][] | null,
+  connections: [number, number][],
+  color: string
+) => {
+  if (!points) return;
+  const { width, height } = ctx.canvas;
+
+  ctx.strokeStyle = color;
+  ctx.lineWidth = 2;
+  ctx.beginPath();
+  connections.forEach(([from, to]) => {
+    ctx.moveTo(points[from][0] * width, points[from][1] * height);
+    ctx.lineTo(points[to][0] * width, points[to][1] * height);
+  });
+  ctx.stroke();
+
+  ctx.fillStyle = color;
+  points.forEach(([x, y]) => {
+    ctx.fillRect(x * width - 2, y * height - 2, 4, 4);
+  });
+};
+
+// Draws the landmarks sent over the data channel on top of the local webcam
+const LandmarkOverlay = ({ landmarksRef }: LandmarkOverlayProps): JSX.Element => {
+  const canvasRef = useRef<HTMLCanvasElement | null>(null);
+
+  useEffect(() => {
+    let frameId: number;
+    let lastDrawn: LandmarksMessage | null = null;
+
+    const render = () => {
+      const ctx = canvasRef.current?.getContext("2d");
+      const landmarks = landmarksRef.current;
+
+      if (ctx && landmarks !== lastDrawn) {
+        lastDrawn = landmarks;
+        ctx.clearRect(0, 0, ctx.canvas.width, ctx.canvas.height);
+        if (landmarks) {
+          drawConnections(ctx, landmarks.pose, POSE_CONNECTIONS, "rgb(121, 44, 80)");
+          drawConnections(ctx, landmarks.left_hand, HAND_CONNECTIONS, "rgb(250, 44, 121)");
+          drawConnections(ctx, landmarks.right_hand, HAND_CONNECTIONS, "rgb(230, 66, 245)");
+        }
+      }
+      frameId = requestAnimationFrame(render);
+    };
+
+    frameId = requestAnimationFrame(render);
+    return () => cancelAnimationFrame(frameId);
+  }, [landmarksRef]);
+
+  return (
+    <canvas
+      ref={canvasRef}
+      width={cameraSize.width}
+      height={cameraSize.height}
+      css={css`
+        position: absolute;
+        top: 0;
+        left: 0;
+        pointer-events: none;
+      `}
+    />
+  );
+};
+
+export default LandmarkOverlay;
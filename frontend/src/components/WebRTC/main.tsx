@@ -11,12 +11,21 @@ const WebRtc = () => {
   const {
     localWebcamRef,
     remoteWebcamRef,
+    landmarksRef,
+    recognizedText,
     makeOffer,
     error,
     disconnect,
     readyWebRtcConnect,
   } = useWebRtc();
 
+  // letters recognized by the server show up in the translation box
+  useEffect(() => {
+    if (recognizedText) {
+      setInputText(recognizedText);
+    }
+  }, [recognizedText]);
+
 
   return (
     <ContentWrapper
@@ -33,6 +42,7 @@ const WebRtc = () => {
             title="Webcam"
             localWebcamRef={localWebcamRef}
             remoteWebcamRef={remoteWebcamRef}
+            landmarksRef={landmarksRef}
           />
           <TranslateInput
             title="English"
@@ -1,23 +1,58 @@
 import { servers } from "@/constants/webrtc";
+import {
+  AdmissionInfo,
+  LandmarksMessage,
+  SignMessage,
+} from "@/models/webRtc";
 import { RefObject, useEffect, useRef, useState } from "react";
 
 interface UseWebRtcReturn {
   localWebcamRef: RefObject<HTMLVideoElement | null>;
   remoteWebcamRef: RefObject<HTMLVideoElement | null>;
+  landmarksRef: RefObject<LandmarksMessage | null>;
+  recognizedText: string;
   makeOffer: () => Promise<void>;
   disconnect: () => Promise<void>;
   error: string | null;
   readyWebRtcConnect: boolean;
 }
 
+const applyDegradedVideo = async (
+  pc: RTCPeerConnection,
+  admission: AdmissionInfo
+) => {
+  for (const sender of pc.getSenders()) {
+    if (sender.track?.kind !== "video") continue;
+    const { width } = sender.track.getSettings();
+    const params = sender.getParameters();
+    if (!params.encodings?.length) continue;
+    params.encodings.forEach((encoding) => {
+      if (width && admission.maxWidth && width > admission.maxWidth) {
+        encoding.scaleResolutionDownBy = width / admission.maxWidth;
+      }
+      if (admission.maxFps) {
+        encoding.maxFramerate = admission.maxFps;
+      }
+    });
+    try {
+      await sender.setParameters(params);
+    } catch (e) {
+      console.warn("setParameters failed:", e);
+    }
+  }
+};
+
 const UseWebRtc = (): UseWebRtcReturn => {
   const localWebcamRef = useRef<HTMLVideoElement | null>(null);
   const remoteWebcamRef = useRef<HTMLVideoElement | null>(null);
   const pcRef = useRef<RTCPeerConnection | null>(null);
   const wsRef = useRef<WebSocket | null>(null);
   const localStreamRef = useRef<MediaStream | null>(null);
+  // latest landmarks from the server, drawn by the browser instead of the server
+  const landmarksRef = useRef<LandmarksMessage | null>(null);
 
   const [readyWebRtcConnect, setReadyWebRtcConnect] = useState(false);
+  const [recognizedText, setRecognizedText] = useState("");
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
@@ -58,6 +93,7 @@ const UseWebRtc = (): UseWebRtcReturn => {
 
     try {
       setError(null);
+      setRecognizedText("");
 
       const remoteStream = new MediaStream();
       const pc = new RTCPeerConnection(servers);
@@ -70,6 +106,21 @@ const UseWebRtc = (): UseWebRtcReturn => {
         pc.addTrack(track, localStreamRef.current!);
       });
 
+      // created before the offer so it is negotiated together with the video,
+      // kept reliable so recognized signs are never dropped
+      const landmarksChannel = pc.createDataChannel("landmarks", {
+        ordered: false,
+      });
+      landmarksChannel.onmessage = (event) => {
+        const msg = JSON.parse(event.data);
+        if (msg.type === "landmarks") {
+          landmarksRef.current = msg;
+        } else if (msg.type === "sign") {
+          const sign = msg as SignMessage;
+          setRecognizedText((text) => text + sign.label);
+        }
+      };
+
       pc.ontrack = (event) => {
         event.streams[0].getTracks().forEach((track) => {
           remoteStream.addTrack(track);
@@ -125,10 +176,27 @@ const UseWebRtc = (): UseWebRtcReturn => {
 
         if (!pcRef.current) return;
 
+        if (msg.type === "reject") {
+          const info = msg as AdmissionInfo;
+          setError(
+            `Server is busy (${info.reason}), try again in ${info.retryAfter}s`
+          );
+          pcRef.current.close();
+          pcRef.current = null;
+          ws.close();
+          return;
+        }
+
         if (msg.type === "answer") {
           const desc = new RTCSessionDescription(msg.sdp);
           await pcRef.current.setRemoteDescription(desc);
 
+          const admission = msg.admission as AdmissionInfo | undefined;
+          if (admission?.mode === "degraded") {
+            // server is loaded, send it less video instead of being dropped
+            await applyDegradedVideo(pcRef.current, admission);
+          }
+
           while (pendingCandidates.length > 0) {
             const candidate = pendingCandidates.shift();
             try {
@@ -190,6 +258,8 @@ const UseWebRtc = (): UseWebRtcReturn => {
         remoteWebcamRef.current.srcObject = null;
       }
 
+      landmarksRef.current = null;
+
       if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
         wsRef.current.close();
         wsRef.current = null;
@@ -209,6 +279,8 @@ const UseWebRtc = (): UseWebRtcReturn => {
   return {
     localWebcamRef,
     remoteWebcamRef,
+    landmarksRef,
+    recognizedText,
     makeOffer,
     disconnect,
     readyWebRtcConnect,
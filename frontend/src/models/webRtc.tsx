@@ -1,5 +1,40 @@
 type SignalMsg =
   | { type: "offer"; sdp: any; from?: string; to?: string }
-  | { type: "answer"; sdp: any; from?: string; to?: string }
+  | {
+      type: "answer";
+      sdp: any;
+      admission?: AdmissionInfo;
+      from?: string;
+      to?: string;
+    }
+  | ({ type: "reject"; from?: string; to?: string } & AdmissionInfo)
   | { type: "ice"; candidate: any; from?: string; to?: string }
-  | { type: "ready"; from?: string };
\ No newline at end of file
+  | { type: "ready"; from?: string };
+
+// server side admission control, degraded sessions should send smaller video
+export type AdmissionInfo = {
+  mode: "accept" | "degraded" | "reject";
+  reason: string | null;
+  maxWidth?: number;
+  maxFps?: number;
+  retryAfter?: number;
+};
+
+// [x, y, z] (pose adds visibility), normalized to the frame size
+type LandmarkPoint = number[];
+
+export type LandmarksMessage = {
+  type: "landmarks";
+  pts: number | null;
+  pose: LandmarkPoint[] | null;
+  face: LandmarkPoint[] | null;
+  left_hand: LandmarkPoint[] | null;
+  right_hand: LandmarkPoint[] | null;
+};
+
+export type SignMessage = {
+  type: "sign";
+  pts: number | null;
+  label: string;
+  confidence: number;
+};